@@ -0,0 +1,113 @@
+"""Cold start of many emulator instances on the Home Assistant stand-in.
+
+Sets up --entries config entries while Home Assistant is still starting,
+like HA does after a restart, and reports:
+
+- setup: time until every entry is set up
+- first door command: time from the start of the setup until a relay
+  command to the last instance is answered with 200
+- started: time spent in the work deferred until Home Assistant started
+
+The setup phases of the entries (as shown in the diagnostics download) are
+summed up per phase.
+
+Usage:
+    python benchmarks/bench_cold_start.py --entries 50 --relays 16 --repeat 5
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import base64
+import logging
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+
+from aiohttp import ClientSession
+from aiohttp.test_utils import TestServer
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import tests.conftest  # noqa: E402,F401  installs the Home Assistant shim
+from custom_components.relay_emulator_2n.const import DOMAIN, SETUP_TIMES_KEY  # noqa: E402
+from tests.ha_fake import FakeConfigEntry, FakeHass  # noqa: E402
+
+AUTHORIZATION = {"Authorization": "Basic " + base64.b64encode(b"admin:2n").decode()}
+
+
+async def cold_start(args: argparse.Namespace, config_dir: str) -> dict[str, float]:
+    """Start once and return the measured durations in milliseconds."""
+    hass = FakeHass(config_dir, running=False)
+    server = TestServer(hass.http.app)
+    await server.start_server()
+    entries = [
+        FakeConfigEntry(
+            {
+                "subpath": f"door-{index}",
+                "username": "admin",
+                "relay_count": args.relays,
+                "button_count": args.buttons,
+            },
+            {"password": "2n", "auth_mode": "both", "basic_auth_tls_only": False},
+        )
+        for index in range(args.entries)
+    ]
+    url = str(server.make_url(f"/door-{args.entries - 1}/api/relay/ctrl?relay=1&value=on"))
+
+    try:
+        async with ClientSession() as session:
+            start = time.perf_counter()
+            for entry in entries:
+                await hass.config_entries.async_add(entry)
+            setup = time.perf_counter()
+            async with session.get(url, headers=AUTHORIZATION) as response:
+                await response.read()
+            first_command = time.perf_counter()
+            assert response.status == 200, response.status
+
+            hass.async_start()
+            started = time.perf_counter()
+    finally:
+        await server.close()
+
+    result = {
+        "setup": (setup - start) * 1000,
+        "first door command": (first_command - start) * 1000,
+        "started": (started - first_command) * 1000,
+    }
+    phases: dict[str, float] = defaultdict(float)
+    for timing in hass.data[DOMAIN].get(SETUP_TIMES_KEY, {}).values():
+        for phase, duration_ms in timing.as_dict()["phases"].items():
+            phases[f"  {phase}"] += duration_ms
+    result.update(phases)
+    return result
+
+
+def main() -> None:
+    """Run the benchmark and print the best of --repeat cold starts."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=50)
+    parser.add_argument("--relays", type=int, default=16)
+    parser.add_argument("--buttons", type=int, default=2)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    logging.basicConfig(handlers=[logging.NullHandler()])
+
+    best: dict[str, float] = {}
+    for _ in range(args.repeat):
+        with tempfile.TemporaryDirectory() as config_dir:
+            result = asyncio.run(cold_start(args, config_dir))
+        for name, duration_ms in result.items():
+            best[name] = min(best.get(name, duration_ms), duration_ms)
+
+    print(f"{args.entries} entries, {args.relays} relays and {args.buttons} buttons each")
+    for name, duration_ms in best.items():
+        print(f"{name:<24} {duration_ms:>10.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
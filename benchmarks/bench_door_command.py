@@ -0,0 +1,136 @@
+"""End-to-end latency of a door command on the Home Assistant stand-in.
+
+Sets up the integration on the in-repo fake of Home Assistant core
+(`tests/ha_fake.py`): the config entry is set up like HA does it, the view is
+registered on a real aiohttp router and the switch service call runs through
+the service registry and state machine into RelaySwitch. Each command is an
+authenticated relay control request over a local HTTP connection; the digest
+challenge round trip is excluded so the numbers cover a single request.
+
+Usage:
+    python benchmarks/bench_door_command.py --commands 2000
+    python benchmarks/bench_door_command.py --profile door.pstats
+
+With --profile, the commands run under cProfile and the statistics are
+written to the given file (inspect them with `python -m pstats door.pstats`).
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import cProfile
+import hashlib
+import logging
+import re
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from aiohttp import ClientSession
+from aiohttp.test_utils import TestServer
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import tests.conftest  # noqa: E402,F401  installs the Home Assistant shim
+from tests.ha_fake import FakeConfigEntry, FakeHass  # noqa: E402
+
+SUBPATH = "2n-relay"
+USERNAME = "admin"
+PASSWORD = "2n"
+
+CHALLENGE_FIELD = re.compile(r'(\w+)="([^"]*)"')
+
+
+def authorization(challenge: str, uri: str, nc: int) -> str:
+    """Answer a digest challenge like a 2N device."""
+    fields = dict(CHALLENGE_FIELD.findall(challenge))
+    realm, nonce = fields["realm"], fields["nonce"]
+    ha1 = hashlib.md5(f"{USERNAME}:{realm}:{PASSWORD}".encode()).hexdigest()
+    ha2 = hashlib.md5(f"GET:{uri}".encode()).hexdigest()
+    response = hashlib.md5(f"{ha1}:{nonce}:{nc:08x}:bench:auth:{ha2}".encode()).hexdigest()
+    return (
+        f'Digest username="{USERNAME}", realm="{realm}", nonce="{nonce}", uri="{uri}", '
+        f'response="{response}", qop="auth", nc={nc:08x}, cnonce="bench"'
+    )
+
+
+async def run(args: argparse.Namespace, config_dir: str) -> int:
+    """Set up the integration, send the commands and print the report."""
+    hass = FakeHass(config_dir)
+    await hass.config_entries.async_add(
+        FakeConfigEntry(
+            {"subpath": SUBPATH, "username": USERNAME, "relay_count": args.relays, "button_count": 0},
+            {"password": PASSWORD},
+        )
+    )
+
+    server = TestServer(hass.http.app)
+    await server.start_server()
+    base_url = str(server.make_url("")).rstrip("/")
+    uris = [
+        f"/{SUBPATH}/api/relay/ctrl?relay={relay}&value={value}"
+        for relay in range(1, args.relays + 1)
+        for value in ("on", "off")
+    ]
+
+    profiler = cProfile.Profile() if args.profile else None
+    samples = []
+    try:
+        async with ClientSession() as session:
+            for index in range(args.commands):
+                uri = uris[index % len(uris)]
+                # Fetch a fresh nonce per command like 2N devices, outside the measurement
+                if profiler:
+                    profiler.disable()
+                async with session.get(base_url + uri) as response:
+                    challenge = response.headers["WWW-Authenticate"]
+                headers = {"Authorization": authorization(challenge, uri, 1)}
+                if profiler:
+                    profiler.enable()
+
+                start = time.perf_counter_ns()
+                async with session.get(base_url + uri, headers=headers) as response:
+                    await response.read()
+                samples.append(time.perf_counter_ns() - start)
+                if response.status != 200:
+                    print(f"Command failed with status {response.status}")
+                    return 1
+            if profiler:
+                profiler.disable()
+    finally:
+        await server.close()
+
+    samples.sort()
+    print(f"{args.commands} door commands, {args.relays} relays")
+    print(
+        "latency us:  "
+        f"mean {statistics.fmean(samples) / 1000:.1f}  "
+        f"p50 {samples[len(samples) // 2] / 1000:.1f}  "
+        f"p99 {samples[int(len(samples) * 0.99)] / 1000:.1f}"
+    )
+    print(f"service calls: {len(hass.services.calls)}")
+    if profiler:
+        profiler.dump_stats(args.profile)
+        print(f"Profile written to {args.profile}")
+    return 0
+
+
+def main() -> int:
+    """Parse arguments and run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--commands", type=int, default=1000)
+    parser.add_argument("--relays", type=int, default=4)
+    parser.add_argument("--profile", metavar="FILE", help="write cProfile statistics to FILE")
+    args = parser.parse_args()
+
+    # Relay commands are logged; measure the logging calls, not terminal output
+    logging.basicConfig(handlers=[logging.NullHandler()])
+
+    with tempfile.TemporaryDirectory() as config_dir:
+        return asyncio.run(run(args, config_dir))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,76 @@
+"""Benchmark relay entity setup time and memory per relay.
+
+Runs the switch platform setup against the Home Assistant shim used by the
+tests, so no Home Assistant installation is needed.
+
+Usage:
+    python benchmarks/bench_entity_setup.py [--counts 16 64 256] [--repeat 5]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gc
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import tests.conftest  # noqa: E402,F401  installs the Home Assistant shim
+from custom_components.relay_emulator_2n import switch  # noqa: E402
+
+
+async def setup_relays(relay_count: int) -> tuple[list, float]:
+    """Run the switch platform setup for one entry.
+
+    Returns the created entities and the setup duration in seconds.
+    """
+    hass = SimpleNamespace(data={})
+    entry = SimpleNamespace(
+        entry_id=f"bench_{relay_count}",
+        data={"subpath": "bench", "relay_count": relay_count},
+    )
+    entities: list = []
+    start = time.perf_counter()
+    await switch.async_setup_entry(hass, entry, entities.extend)
+    return entities, time.perf_counter() - start
+
+
+def measure(relay_count: int, repeat: int) -> tuple[float, float]:
+    """Return best setup time and allocated bytes, both per relay."""
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        _, seconds = asyncio.run(setup_relays(relay_count))
+        best = min(best, seconds)
+
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    entities, _ = asyncio.run(setup_relays(relay_count))
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    allocated = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    assert len(entities) == relay_count
+
+    return best / relay_count, allocated / relay_count
+
+
+def main() -> None:
+    """Run the benchmark and print one line per relay count."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--counts", type=int, nargs="+", default=[16, 64, 256])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'relays':>8} {'setup us/relay':>16} {'bytes/relay':>12}")
+    for relay_count in args.counts:
+        seconds, allocated = measure(relay_count, args.repeat)
+        print(f"{relay_count:>8} {seconds * 1e6:>16.1f} {allocated:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,316 @@
+"""Micro-benchmarks for the RelayView2N request path.
+
+Drives RelayView2N._handle_request directly with the DummyHass/Registry
+shims from the handler tests, so the numbers cover digest verification,
+routing and the handlers without any HTTP server overhead.
+
+Usage:
+    python benchmarks/bench_request_path.py                   # run and print
+    python benchmarks/bench_request_path.py --save-baseline   # store results
+    python benchmarks/bench_request_path.py --check           # compare to baseline
+
+--check exits with status 1 if the mean latency of any scenario exceeds
+its baseline by more than --threshold (a fraction, default 0.5).
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import base64
+import gc
+import hashlib
+import json
+import logging
+import statistics
+import sys
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import tests.conftest  # noqa: E402,F401  installs the Home Assistant shim
+import homeassistant.helpers.entity_registry as er  # noqa: E402
+from custom_components.relay_emulator_2n.audit import AuditLog  # noqa: E402
+from custom_components.relay_emulator_2n.http_server import RelayView2N, compute_ha1  # noqa: E402
+from tests.test_handlers import DummyEntry, DummyHass, Registry  # noqa: E402
+
+BASELINE_FILE = Path(__file__).with_name("baseline_request_path.json")
+
+SUBPATH = "2n-relay"
+USERNAME = "admin"
+PASSWORD = "2n"
+RELAY_COUNT = 16
+LARGE_RELAY_COUNT = 256
+USER_COUNT = 500
+
+
+class BenchRequest:
+    """Minimal stand-in for aiohttp's web.Request."""
+
+    def __init__(self, path: str, query: dict[str, str] | None = None, method: str = "GET") -> None:
+        self.method = method
+        self.query = query or {}
+        self.headers: dict[str, str] = {}
+        query_string = "&".join(f"{key}={value}" for key, value in self.query.items())
+        self.rel_url = f"/{SUBPATH}/{path}" + (f"?{query_string}" if query_string else "")
+        self.path_qs = self.rel_url
+        self.remote = "127.0.0.1"
+
+
+def digest_header(view: RelayView2N, request: BenchRequest, password: str = PASSWORD) -> str:
+    """Build a digest Authorization header the way a 2N client would."""
+    nonce = view.auth.generate_nonce()
+    nc, cnonce = "00000001", "benchcnonce"
+    ha1 = hashlib.md5(f"{USERNAME}:{view.auth.realm}:{password}".encode()).hexdigest()
+    ha2 = hashlib.md5(f"{request.method}:{request.rel_url}".encode()).hexdigest()
+    response = hashlib.md5(f"{ha1}:{nonce}:{nc}:{cnonce}:auth:{ha2}".encode()).hexdigest()
+    return (
+        f'Digest username="{USERNAME}", realm="{view.auth.realm}", nonce="{nonce}", '
+        f'uri="{request.rel_url}", response="{response}", qop="auth", nc="{nc}", cnonce="{cnonce}"'
+    )
+
+
+def basic_header(view: RelayView2N, request: BenchRequest) -> str:
+    """Build a Basic Authorization header."""
+    return "Basic " + base64.b64encode(f"{USERNAME}:{PASSWORD}".encode()).decode()
+
+
+def make_view(
+    auth_mode: str = "digest", user_count: int = 0, relay_count: int = RELAY_COUNT
+) -> RelayView2N:
+    """Create a view with registered, mirrored relays and user_count restricted users."""
+    hass = DummyHass()
+    entry = DummyEntry("bench1234", {"subpath": SUBPATH, "username": USERNAME})
+
+    mapping = {}
+    for relay_num in range(1, relay_count + 1):
+        entity_id = f"switch.bench_relay_{relay_num}"
+        mapping[f"{entry.entry_id}_relay_{relay_num}"] = entity_id
+        hass.states[entity_id] = SimpleNamespace(state="on" if relay_num % 2 else "off")
+    registry = Registry(mapping)
+    er.async_get = lambda hass_arg: registry
+
+    view = RelayView2N(
+        hass, entry, SUBPATH, USERNAME, PASSWORD, relay_count, 0,
+        auth_mode=auth_mode, basic_auth_tls_only=False,
+        users={f"device{n}": compute_ha1(f"device{n}", "pw") for n in range(user_count)},
+        permissions={f"device{n}": {"relays": [n % relay_count + 1]} for n in range(user_count)},
+    )
+    # Like the switch entities do when they are added
+    for relay_num in range(1, relay_count + 1):
+        view.set_relay_state(relay_num, relay_num % 2 == 1)
+    return view
+
+
+@dataclass
+class Scenario:
+    """One request shape to benchmark."""
+
+    name: str
+    path: str
+    query: dict[str, str]
+    expected_status: int
+    authorize: Callable[[RelayView2N, BenchRequest], str | None]
+    auth_mode: str = "digest"
+    user_count: int = 0
+    relay_count: int = RELAY_COUNT
+    audit: bool = False
+
+
+SCENARIOS = [
+    Scenario("challenge", "api/relay/status", {}, 401, lambda view, req: None),
+    Scenario(
+        "control", "api/relay/ctrl", {"relay": "1", "value": "on"}, 200, digest_header
+    ),
+    Scenario(
+        "control_basic",
+        "api/relay/ctrl",
+        {"relay": "1", "value": "on"},
+        200,
+        basic_header,
+        auth_mode="basic",
+    ),
+    Scenario(
+        "control_audited",
+        "api/relay/ctrl",
+        {"relay": "1", "value": "on"},
+        200,
+        digest_header,
+        audit=True,
+    ),
+    Scenario(
+        f"control_{USER_COUNT}_users",
+        "api/relay/ctrl",
+        {"relay": "1", "value": "on"},
+        200,
+        digest_header,
+        user_count=USER_COUNT,
+    ),
+    Scenario(
+        "control_json",
+        "api/relay/ctrl",
+        {"relay": "1", "value": "on", "format": "json"},
+        200,
+        digest_header,
+    ),
+    Scenario(f"status_{RELAY_COUNT}_relays", "api/relay/status", {}, 200, digest_header),
+    Scenario(
+        f"status_{RELAY_COUNT}_relays_json",
+        "api/relay/status",
+        {"format": "json"},
+        200,
+        digest_header,
+    ),
+    Scenario(
+        f"status_{RELAY_COUNT}_relays_bitmask",
+        "api/relay/status",
+        {"format": "bitmask"},
+        200,
+        digest_header,
+    ),
+    Scenario(
+        f"status_{LARGE_RELAY_COUNT}_relays",
+        "api/relay/status",
+        {},
+        200,
+        digest_header,
+        relay_count=LARGE_RELAY_COUNT,
+    ),
+    Scenario(
+        f"status_{LARGE_RELAY_COUNT}_relays_single",
+        "api/relay/status",
+        {"relay": "200"},
+        200,
+        digest_header,
+        relay_count=LARGE_RELAY_COUNT,
+    ),
+    Scenario(
+        f"status_{LARGE_RELAY_COUNT}_relays_bitmask",
+        "api/relay/status",
+        {"format": "bitmask"},
+        200,
+        digest_header,
+        relay_count=LARGE_RELAY_COUNT,
+    ),
+    Scenario("not_found", "api/unknown", {}, 404, digest_header),
+    Scenario(
+        "auth_failure",
+        "api/relay/status",
+        {},
+        401,
+        lambda view, req: digest_header(view, req, password="wrong"),
+    ),
+]
+
+
+async def run_scenario(scenario: Scenario, iterations: int) -> dict[str, float]:
+    """Run one scenario and return throughput and latency statistics."""
+    view = make_view(scenario.auth_mode, scenario.user_count, scenario.relay_count)
+    if scenario.audit:
+        # Measures queueing the event; the batched write runs in the executor
+        loop = asyncio.get_running_loop()
+        audit_hass = SimpleNamespace(
+            loop=loop,
+            async_create_task=loop.create_task,
+            async_add_executor_job=lambda func, *args: loop.run_in_executor(None, func, *args),
+        )
+        view.audit = AuditLog(audit_hass, ":memory:")
+    request = BenchRequest(scenario.path, scenario.query)
+    auth_header = scenario.authorize(view, request)
+    if auth_header:
+        request.headers["Authorization"] = auth_header
+
+    path = scenario.path
+    response = await view._handle_request(request, path)
+    if response.status != scenario.expected_status:
+        raise RuntimeError(
+            f"{scenario.name}: expected status {scenario.expected_status}, got {response.status}"
+        )
+
+    handle = view._handle_request
+    samples = []
+    perf_counter_ns = time.perf_counter_ns
+    gc.collect()
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        for _ in range(iterations):
+            call_start = perf_counter_ns()
+            await handle(request, path)
+            samples.append(perf_counter_ns() - call_start)
+            view.hass.services.calls.clear()
+        elapsed = time.perf_counter() - start
+    finally:
+        gc.enable()
+
+    samples.sort()
+    return {
+        "requests_per_second": iterations / elapsed,
+        "mean_us": statistics.fmean(samples) / 1000,
+        "p50_us": samples[len(samples) // 2] / 1000,
+        "p99_us": samples[int(len(samples) * 0.99)] / 1000,
+    }
+
+
+async def run_all(iterations: int, only: list[str] | None) -> dict[str, dict[str, float]]:
+    """Run all (or the selected) scenarios."""
+    results = {}
+    for scenario in SCENARIOS:
+        if only and scenario.name not in only:
+            continue
+        results[scenario.name] = await run_scenario(scenario, iterations)
+    return results
+
+
+def check_against_baseline(results: dict[str, dict[str, float]], threshold: float) -> bool:
+    """Print a comparison with the stored baseline and return True if within threshold."""
+    baseline = json.loads(BASELINE_FILE.read_text())
+    ok = True
+    for name, result in results.items():
+        if name not in baseline:
+            print(f"{name}: no baseline, skipped")
+            continue
+        limit = baseline[name]["mean_us"] * (1 + threshold)
+        ratio = result["mean_us"] / baseline[name]["mean_us"]
+        status = "ok" if result["mean_us"] <= limit else "REGRESSION"
+        ok = ok and status == "ok"
+        print(f"{name}: {ratio:.2f}x baseline ({status})")
+    return ok
+
+
+def main() -> int:
+    """Run the benchmarks."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=5000)
+    parser.add_argument("--scenario", action="append", help="only run the named scenario")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--check", action="store_true")
+    parser.add_argument("--threshold", type=float, default=0.5)
+    args = parser.parse_args()
+
+    # Auth failures log warnings; measure the logging calls, not terminal output
+    logging.basicConfig(handlers=[logging.NullHandler()])
+
+    results = asyncio.run(run_all(args.iterations, args.scenario))
+
+    print(f"{'scenario':<28} {'req/s':>10} {'mean us':>9} {'p50 us':>9} {'p99 us':>9}")
+    for name, result in results.items():
+        print(
+            f"{name:<28} {result['requests_per_second']:>10.0f} {result['mean_us']:>9.1f} "
+            f"{result['p50_us']:>9.1f} {result['p99_us']:>9.1f}"
+        )
+
+    if args.save_baseline:
+        BASELINE_FILE.write_text(json.dumps(results, indent=2, sort_keys=True) + "\n")
+        print(f"Baseline written to {BASELINE_FILE.name}")
+
+    if args.check and not check_against_baseline(results, args.threshold):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,247 @@
+"""Load generator simulating a fleet of 2N intercoms.
+
+Serves RelayView2N on a local aiohttp test server (using the Home Assistant
+shim from the tests) and drives it with simulated 2N clients. Every client
+performs the full digest handshake for each command, like a 2N device
+sending an HTTP command: an unauthenticated request, the 401 challenge and
+the authenticated retry. With --auth basic, clients send Basic credentials
+with the first request instead. Everything runs offline on localhost.
+
+Usage:
+    python benchmarks/load_test.py --clients 50 --duration 10 --think-time 0.2
+    python benchmarks/load_test.py --clients 50 --auth basic
+
+The report shows throughput, latency percentiles of complete commands
+(both round trips with digest auth) and the size of the server's nonce cache over time.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import base64
+import hashlib
+import logging
+import random
+import re
+import secrets
+import statistics
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from types import SimpleNamespace
+
+from aiohttp import ClientSession, web
+from aiohttp.test_utils import TestServer
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import tests.conftest  # noqa: E402,F401  installs the Home Assistant shim
+import homeassistant.helpers.entity_registry as er  # noqa: E402
+from custom_components.relay_emulator_2n.http_server import RelayView2N  # noqa: E402
+from tests.test_handlers import DummyEntry, DummyHass, Registry  # noqa: E402
+
+SUBPATH = "2n-relay"
+USERNAME = "admin"
+PASSWORD = "2n"
+
+CHALLENGE_FIELD = re.compile(r'(\w+)="([^"]*)"')
+BASIC_AUTHORIZATION = "Basic " + base64.b64encode(f"{USERNAME}:{PASSWORD}".encode()).decode()
+
+
+@dataclass
+class Stats:
+    """Results collected by all clients."""
+
+    latencies: list[float] = field(default_factory=list)
+    errors: int = 0
+    completed_in_interval: int = 0
+
+
+def make_app(relay_count: int, auth_mode: str) -> tuple[web.Application, RelayView2N]:
+    """Create an aiohttp app serving the emulator view."""
+    hass = DummyHass()
+    entry = DummyEntry("load1234", {"subpath": SUBPATH, "username": USERNAME})
+
+    mapping = {}
+    for relay_num in range(1, relay_count + 1):
+        entity_id = f"switch.load_relay_{relay_num}"
+        mapping[f"{entry.entry_id}_relay_{relay_num}"] = entity_id
+        hass.states[entity_id] = SimpleNamespace(state="off")
+    registry = Registry(mapping)
+    er.async_get = lambda hass_arg: registry
+
+    # The test server is plain HTTP; allow Basic auth without TLS
+    view = RelayView2N(
+        hass, entry, SUBPATH, USERNAME, PASSWORD, relay_count, 0,
+        auth_mode=auth_mode, basic_auth_tls_only=False,
+    )
+
+    async def handle(request: web.Request) -> web.Response:
+        response = await view._handle_request(request, request.match_info["path"])
+        # The dummy service registry records calls; keep memory flat
+        hass.services.calls.clear()
+        return response
+
+    app = web.Application()
+    app.router.add_route("*", view.url, handle)
+    return app, view
+
+
+def authorization(challenge: str, method: str, uri: str) -> str:
+    """Answer a digest challenge like a 2N device."""
+    fields = dict(CHALLENGE_FIELD.findall(challenge))
+    realm, nonce = fields["realm"], fields["nonce"]
+    nc, cnonce = "00000001", secrets.token_hex(8)
+    ha1 = hashlib.md5(f"{USERNAME}:{realm}:{PASSWORD}".encode()).hexdigest()
+    ha2 = hashlib.md5(f"{method}:{uri}".encode()).hexdigest()
+    response = hashlib.md5(f"{ha1}:{nonce}:{nc}:{cnonce}:auth:{ha2}".encode()).hexdigest()
+    return (
+        f'Digest username="{USERNAME}", realm="{realm}", nonce="{nonce}", uri="{uri}", '
+        f'response="{response}", qop="auth", nc={nc}, cnonce="{cnonce}"'
+    )
+
+
+async def client_loop(
+    session: ClientSession,
+    base_url: str,
+    relay_count: int,
+    status_ratio: float,
+    think_time: float,
+    deadline: float,
+    stats: Stats,
+    auth_mode: str,
+) -> None:
+    """Send commands until the deadline, each with a full digest handshake or Basic auth."""
+    while time.monotonic() < deadline:
+        if random.random() < status_ratio:
+            uri = f"/{SUBPATH}/api/relay/status"
+        else:
+            relay = random.randint(1, relay_count)
+            value = random.choice(("on", "off"))
+            uri = f"/{SUBPATH}/api/relay/ctrl?relay={relay}&value={value}"
+
+        start = time.perf_counter()
+        try:
+            if auth_mode == "basic":
+                headers = {"Authorization": BASIC_AUTHORIZATION}
+            else:
+                async with session.get(base_url + uri) as response:
+                    await response.read()
+                    challenge = response.headers.get("WWW-Authenticate", "")
+                if response.status != 401 or not challenge:
+                    raise RuntimeError(f"expected digest challenge, got {response.status}")
+                headers = {"Authorization": authorization(challenge, "GET", uri)}
+
+            async with session.get(base_url + uri, headers=headers) as response:
+                await response.read()
+            if response.status != 200:
+                raise RuntimeError(f"authenticated request failed with {response.status}")
+        except Exception:
+            stats.errors += 1
+        else:
+            stats.latencies.append(time.perf_counter() - start)
+            stats.completed_in_interval += 1
+
+        if think_time:
+            await asyncio.sleep(random.uniform(0, 2 * think_time))
+
+
+async def report_loop(view: RelayView2N, stats: Stats, interval: float, deadline: float) -> None:
+    """Print throughput and nonce cache size every interval."""
+    started = time.monotonic()
+    while time.monotonic() < deadline:
+        await asyncio.sleep(interval)
+        print(
+            f"t={time.monotonic() - started:6.1f}s  "
+            f"{stats.completed_in_interval / interval:8.0f} cmd/s  "
+            f"nonce cache: {len(view.auth.nonce_cache):5d}  errors: {stats.errors}"
+        )
+        stats.completed_in_interval = 0
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    """Return a percentile of an already sorted list."""
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+async def run(args: argparse.Namespace) -> int:
+    """Run the load test and print the report."""
+    app, view = make_app(args.relays, args.auth)
+    server = TestServer(app)
+    await server.start_server()
+    base_url = str(server.make_url("")).rstrip("/")
+
+    stats = Stats()
+    deadline = time.monotonic() + args.duration
+    print(
+        f"{args.clients} clients, {args.relays} relays, status ratio {args.status_ratio}, "
+        f"think time {args.think_time}s, {args.duration}s, {args.auth} auth"
+    )
+
+    started = time.perf_counter()
+    try:
+        async with ClientSession() as session:
+            await asyncio.gather(
+                report_loop(view, stats, args.interval, deadline),
+                *(
+                    client_loop(
+                        session,
+                        base_url,
+                        args.relays,
+                        args.status_ratio,
+                        args.think_time,
+                        deadline,
+                        stats,
+                        args.auth,
+                    )
+                    for _ in range(args.clients)
+                ),
+            )
+    finally:
+        await server.close()
+    elapsed = time.perf_counter() - started
+
+    if not stats.latencies:
+        print("No command completed")
+        return 1
+
+    latencies = sorted(stats.latencies)
+    print()
+    print(f"commands:    {len(latencies)} ({stats.errors} errors)")
+    round_trips = 1 if args.auth == "basic" else 2
+    print(
+        f"throughput:  {len(latencies) / elapsed:.0f} cmd/s "
+        f"({round_trips * len(latencies) / elapsed:.0f} HTTP req/s)"
+    )
+    print(
+        "latency ms:  "
+        f"mean {statistics.fmean(latencies) * 1000:.2f}  "
+        f"p50 {percentile(latencies, 0.50) * 1000:.2f}  "
+        f"p95 {percentile(latencies, 0.95) * 1000:.2f}  "
+        f"p99 {percentile(latencies, 0.99) * 1000:.2f}"
+    )
+    print(f"nonce cache: {len(view.auth.nonce_cache)} entries at end")
+    return 1 if stats.errors else 0
+
+
+def main() -> int:
+    """Parse arguments and run the load test."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=20, help="number of simulated 2N devices")
+    parser.add_argument("--duration", type=float, default=10.0, help="test duration in seconds")
+    parser.add_argument("--think-time", type=float, default=0.1, help="mean pause between commands in seconds")
+    parser.add_argument("--status-ratio", type=float, default=0.3, help="fraction of status requests")
+    parser.add_argument("--relays", type=int, default=16, help="number of relays of the instance")
+    parser.add_argument("--interval", type=float, default=1.0, help="report interval in seconds")
+    parser.add_argument("--auth", choices=("digest", "basic"), default="digest", help="authentication of the clients")
+    args = parser.parse_args()
+
+    # Auth failures and relay commands are logged; keep the report readable
+    logging.basicConfig(handlers=[logging.NullHandler()])
+
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,19 +4,56 @@
 This component emulates a 2N IP relay unit and provides HTTP endpoints
 that are compatible with 2N access control units (intercoms, readers, etc.).
 """
+import asyncio
 import logging
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
-from homeassistant.const import Platform
-from homeassistant.helpers import entity_registry as er
-
-from .const import DOMAIN, CONF_RELAY_COUNT, CONF_BUTTON_COUNT
-from .http_server import setup_http_server, cleanup_http_server
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.const import EVENT_CORE_CONFIG_UPDATE, EVENT_HOMEASSISTANT_STOP, Platform
+from homeassistant.helpers import config_validation as cv, entity_registry as er
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.start import async_at_started
+
+from .const import (
+    DOMAIN,
+    CONF_RELAY_COUNT,
+    CONF_BUTTON_COUNT,
+    AUDIT_DATABASE,
+    AUDIT_KEY,
+    HTTP_SERVER_KEY,
+    SETUP_TIMES_KEY,
+    STATE_STORE_KEY,
+    URLS_KEY,
+)
+from .audit import AuditLog, AuditLogView
+from .export import ProvisioningExportView
+from .http_server import async_update_options, setup_http_server, cleanup_http_server
+from .monitor import (
+    SETUP_PHASE_CLEANUP,
+    SETUP_PHASE_DEFERRED,
+    SETUP_PHASE_HTTP,
+    SETUP_PHASE_PLATFORMS,
+    SETUP_PHASE_STORE,
+    SetupTimer,
+)
+from .services import async_setup_services
+from .store import RelayStateStore
+from .urls import SIGNAL_URLS_UPDATED, get_endpoint_urls
 
 _LOGGER = logging.getLogger(__name__)
 
 PLATFORMS: list[Platform] = [Platform.SWITCH, Platform.BUTTON]
 
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+
+def expected_unique_ids(entry_id: str, relay_count: int, button_count: int) -> set[tuple[str, str]]:
+    """Return the (domain, unique id) of every entity an entry should have."""
+    return {
+        ("switch", f"{entry_id}_relay_{relay_num}") for relay_num in range(1, relay_count + 1)
+    } | {
+        ("button", f"{entry_id}_button_{button_num}") for button_num in range(1, button_count + 1)
+    }
+
 
 async def async_cleanup_orphaned_entities(
     hass: HomeAssistant,
@@ -24,46 +61,128 @@ async def async_cleanup_orphaned_entities(
     new_relay_count: int,
     new_button_count: int,
 ) -> None:
-    """Remove entities that are no longer in the new count range.
-    
-    When users decrease the number of relays or buttons, this function
-    removes the corresponding entities from Home Assistant to prevent
-    orphaned entities in the entity registry.
-    """
-    old_relay_count = int(entry.data.get(CONF_RELAY_COUNT, 0))
-    old_button_count = int(entry.data.get(CONF_BUTTON_COUNT, 0))
+    """Remove registry entities of an entry that are not in the new count range.
 
+    The entities of the entry are enumerated once and diffed against the
+    expected unique ids, so entities left behind by decreased counts, changed
+    unique ids or interrupted setups are all removed in one pass. Missing
+    entities are created again when the platforms add the entities.
+    """
     entity_registry = er.async_get(hass)
-
-    # Remove orphaned relay entities if count decreased
-    if new_relay_count < old_relay_count:
-        for relay_num in range(new_relay_count + 1, old_relay_count + 1):
-            unique_id = f"{entry.entry_id}_relay_{relay_num}"
-            entity_id = entity_registry.async_get_entity_id("switch", DOMAIN, unique_id)
-            if entity_id:
-                _LOGGER.info("Removing orphaned relay entity: %s (relay %d)", entity_id, relay_num)
-                entity_registry.async_remove(entity_id)
-
-    # Remove orphaned button entities if count decreased
-    if new_button_count < old_button_count:
-        for button_num in range(new_button_count + 1, old_button_count + 1):
-            unique_id = f"{entry.entry_id}_button_{button_num}"
-            entity_id = entity_registry.async_get_entity_id("button", DOMAIN, unique_id)
-            if entity_id:
-                _LOGGER.info("Removing orphaned button entity: %s (button %d)", entity_id, button_num)
-                entity_registry.async_remove(entity_id)
+    expected = expected_unique_ids(entry.entry_id, int(new_relay_count), int(new_button_count))
+
+    orphaned = [
+        registry_entry
+        for registry_entry in er.async_entries_for_config_entry(entity_registry, entry.entry_id)
+        if (registry_entry.domain, registry_entry.unique_id) not in expected
+    ]
+    for registry_entry in orphaned:
+        _LOGGER.info(
+            "Removing orphaned entity: %s (unique id %s)",
+            registry_entry.entity_id,
+            registry_entry.unique_id,
+        )
+        entity_registry.async_remove(registry_entry.entity_id)
+
+
+async def async_setup(hass: HomeAssistant, config: dict) -> bool:
+    """Set up the integration services, the provisioning export and the audit log."""
+    async_setup_services(hass)
+    hass.http.register_view(ProvisioningExportView(hass))
+
+    # Shared by the instances with the audit log enabled; the database is
+    # only created once an event is written or queried
+    audit = AuditLog(hass, hass.config.path(AUDIT_DATABASE))
+    hass.data.setdefault(DOMAIN, {})[AUDIT_KEY] = audit
+    hass.http.register_view(AuditLogView(audit))
+
+    async def _async_close_audit(event: Event) -> None:
+        await audit.async_close()
+
+    hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, _async_close_audit)
+
+    # Entries are not unloaded when Home Assistant stops, so the webhook
+    # events still queued are sent here
+    async def _async_stop_webhooks(event: Event) -> None:
+        views = hass.data.get(DOMAIN, {}).get(HTTP_SERVER_KEY, {}).values()
+        await asyncio.gather(
+            *(view.webhooks.async_stop() for view in views if view.webhooks is not None)
+        )
+
+    hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, _async_stop_webhooks)
+    return True
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
-    """Set up 2N Relay Emulator from a config entry."""
+    """Set up 2N Relay Emulator from a config entry.
+
+    The route is registered first, so door commands are served as soon as
+    the entities exist. Work not needed to serve them (the URL attributes
+    and the event loop lag sampling) is deferred until Home Assistant has
+    started.
+    """
+    timer = SetupTimer()
     hass.data.setdefault(DOMAIN, {})
     hass.data[DOMAIN][entry.entry_id] = entry.data
+    hass.data[DOMAIN].setdefault(SETUP_TIMES_KEY, {})[entry.entry_id] = timer
 
     # Set up the HTTP server
     await setup_http_server(hass, entry)
+    timer.mark(SETUP_PHASE_HTTP)
+
+    # Load persisted relay states before entities are added
+    store = RelayStateStore(hass, entry.entry_id)
+    await store.async_load()
+    hass.data[DOMAIN].setdefault(STATE_STORE_KEY, {})[entry.entry_id] = store
+    timer.mark(SETUP_PHASE_STORE)
+
+    # Remove entities left behind by earlier setups before the platforms add
+    # the current ones
+    await async_cleanup_orphaned_entities(
+        hass,
+        entry,
+        int(entry.data.get(CONF_RELAY_COUNT, 0)),
+        int(entry.data.get(CONF_BUTTON_COUNT, 0)),
+    )
+    timer.mark(SETUP_PHASE_CLEANUP)
+
+    # Endpoint URLs are cached until the Home Assistant URL configuration changes
+    urls = get_endpoint_urls(hass, entry)
+    # Entities added while Home Assistant is starting wait for the start
+    # to render their URL attributes
+    urls.deferred = not hass.is_running
+
+    @callback
+    def _async_core_config_updated(event: Event) -> None:
+        urls.invalidate()
+        async_dispatcher_send(hass, SIGNAL_URLS_UPDATED.format(entry.entry_id))
+
+    entry.async_on_unload(
+        hass.bus.async_listen(EVENT_CORE_CONFIG_UPDATE, _async_core_config_updated)
+    )
+
+    # User and relay target changes from the options flow apply to the
+    # running view without reload
+    entry.async_on_unload(entry.add_update_listener(async_update_options))
 
     # Forward the setup to the switch platform
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    timer.mark(SETUP_PHASE_PLATFORMS)
+
+    @callback
+    def _async_started(hass: HomeAssistant) -> None:
+        """Add the URL attributes and start monitoring once HA has started."""
+        timer.restart()
+        urls.deferred = False
+        async_dispatcher_send(hass, SIGNAL_URLS_UPDATED.format(entry.entry_id))
+        view = hass.data[DOMAIN].get(HTTP_SERVER_KEY, {}).get(entry.entry_id)
+        if view is not None and view.monitor:
+            view.monitor.start()
+        timer.mark(SETUP_PHASE_DEFERRED)
+        _LOGGER.debug("Set up '%s' in phases (ms): %s", entry.title, timer.as_dict()["phases"])
+
+    # Runs right away when the entry is set up after Home Assistant started
+    entry.async_on_unload(async_at_started(hass, _async_started))
 
     return True
 
@@ -89,8 +208,25 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     if unload_ok:
         try:
             hass.data[DOMAIN].pop(entry.entry_id, None)
+            hass.data[DOMAIN].get(URLS_KEY, {}).pop(entry.entry_id, None)
+            hass.data[DOMAIN].get(SETUP_TIMES_KEY, {}).pop(entry.entry_id, None)
+            store = hass.data[DOMAIN].get(STATE_STORE_KEY, {}).pop(entry.entry_id, None)
+            if store:
+                # Write pending relay states so a reload starts from them
+                await store.async_flush()
+            audit = hass.data[DOMAIN].get(AUDIT_KEY)
+            if audit is not None:
+                await audit.async_flush()
         except Exception as err:
             _LOGGER.error("Error cleaning up data storage: %s", err)
             # Still return unload_ok since platforms were successfully unloaded
 
     return unload_ok
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove persisted relay states and audit events when a config entry is deleted."""
+    await RelayStateStore(hass, entry.entry_id).async_remove()
+    audit = hass.data.get(DOMAIN, {}).get(AUDIT_KEY)
+    if audit is not None:
+        await audit.async_purge(entry.entry_id)
@@ -0,0 +1,339 @@
+"""Audit log of access events for 2N Relay Emulator.
+
+Relay commands, button triggers and authentication failures of instances
+with the audit log enabled are stored in a SQLite database in the
+configuration directory, shared by all instances.
+
+Recording an event only appends it to an in-memory queue, so a door command
+never waits for the database. The queue is written in one transaction per
+batch in the executor, at the latest AUDIT_FLUSH_INTERVAL seconds after the
+first queued event. Old events are pruned per instance according to its
+retention.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import sqlite3
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from typing import Any
+
+from aiohttp import web
+from homeassistant.components.http import HomeAssistantView
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    AUDIT_BATCH_SIZE,
+    AUDIT_FLUSH_INTERVAL,
+    AUDIT_MAX_PAGE_SIZE,
+    AUDIT_PAGE_SIZE,
+    AUDIT_PRUNE_INTERVAL,
+    AUDIT_QUEUE_SIZE,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+AUDIT_EVENT_RELAY = "relay"
+AUDIT_EVENT_BUTTON = "button"
+AUDIT_EVENT_AUTH_FAILURE = "auth_failure"
+
+AUDIT_FIELDS = (
+    "id",
+    "time",
+    "entry_id",
+    "subpath",
+    "event",
+    "user",
+    "number",
+    "action",
+    "status",
+    "remote",
+)
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS events (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        time REAL NOT NULL,
+        entry_id TEXT NOT NULL,
+        subpath TEXT,
+        event TEXT NOT NULL,
+        user TEXT,
+        number INTEGER,
+        action TEXT,
+        status INTEGER,
+        remote TEXT
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS events_time ON events (time)",
+    "CREATE INDEX IF NOT EXISTS events_entry_time ON events (entry_id, time)",
+)
+_INSERT = (
+    "INSERT INTO events (time, entry_id, subpath, event, user, number, action, status, remote)"
+    " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+
+# (time, entry_id, subpath, event, user, number, action, status, remote)
+AuditRecord = tuple[Any, ...]
+
+
+class AuditLog:
+    """Batched writer and reader of the audit database."""
+
+    def __init__(self, hass: HomeAssistant, path: str) -> None:
+        """Initialize the audit log; the database is opened on first use."""
+        self.hass = hass
+        self.path = path
+        # Retention in days of the instances writing to the log
+        self.retention: dict[str, float] = {}
+        self.written = 0
+        self.dropped = 0
+        self._queue: deque[AuditRecord] = deque(maxlen=AUDIT_QUEUE_SIZE)
+        self._cancel_flush: Callable[[], None] | None = None
+        # One write at a time; a flush waits for the write in progress
+        self._flush_lock = asyncio.Lock()
+        self._reported_dropped = 0
+        self._last_prune = 0.0
+        self._connection: sqlite3.Connection | None = None
+        # Serializes flushes and queries running in executor threads
+        self._lock = threading.Lock()
+
+    @property
+    def queued(self) -> int:
+        """Return the number of events waiting to be written."""
+        return len(self._queue)
+
+    @callback
+    def record(
+        self,
+        entry_id: str,
+        subpath: str,
+        event: str,
+        user: str | None,
+        number: int | None,
+        action: str | None,
+        status: int,
+        remote: str | None,
+    ) -> None:
+        """Queue an event; the oldest queued event is dropped when the queue is full."""
+        if len(self._queue) == AUDIT_QUEUE_SIZE:
+            self.dropped += 1
+        self._queue.append(
+            (time.time(), entry_id, subpath, event, user, number, action, status, remote)
+        )
+        if self._cancel_flush is None:
+            self._schedule_flush(
+                0 if len(self._queue) >= AUDIT_BATCH_SIZE else AUDIT_FLUSH_INTERVAL
+            )
+        elif len(self._queue) == AUDIT_BATCH_SIZE:
+            # A full batch is written right away instead of after the interval
+            self._schedule_flush(0)
+
+    def _schedule_flush(self, delay: float) -> None:
+        if self._cancel_flush is not None:
+            self._cancel_flush()
+
+        @callback
+        def _async_flush_later(_now: Any) -> None:
+            self._cancel_flush = None
+            self.hass.async_create_task(self.async_flush())
+
+        self._cancel_flush = async_call_later(self.hass, delay, _async_flush_later)
+
+    def as_dict(self, entry_id: str) -> dict[str, Any]:
+        """Return the audit log state of an instance for diagnostics."""
+        return {
+            "enabled": entry_id in self.retention,
+            "retention_days": self.retention.get(entry_id),
+            "queued": len(self._queue),
+            "written": self.written,
+            "dropped": self.dropped,
+        }
+
+    async def async_flush(self) -> None:
+        """Write the queued events in one transaction."""
+        if self._cancel_flush is not None:
+            self._cancel_flush()
+            self._cancel_flush = None
+        async with self._flush_lock:
+            if not self._queue:
+                return
+            records = list(self._queue)
+            self._queue.clear()
+            prune_before: dict[str, float] = {}
+            now = time.time()
+            if now - self._last_prune >= AUDIT_PRUNE_INTERVAL:
+                self._last_prune = now
+                prune_before = {
+                    entry_id: now - days * 86400 for entry_id, days in self.retention.items()
+                }
+            try:
+                await self.hass.async_add_executor_job(self._write, records, prune_before)
+                self.written += len(records)
+            except sqlite3.Error as err:
+                _LOGGER.error("Failed to write %d audit events: %s", len(records), err)
+
+        if self.dropped > self._reported_dropped:
+            _LOGGER.warning(
+                "Audit queue full, %d events were dropped",
+                self.dropped - self._reported_dropped,
+            )
+            self._reported_dropped = self.dropped
+
+    async def async_close(self) -> None:
+        """Write the queued events and close the database."""
+        await self.async_flush()
+        if self._connection is not None:
+            await self.hass.async_add_executor_job(self._close)
+
+    async def async_purge(self, entry_id: str) -> None:
+        """Delete all events of an instance."""
+        self.retention.pop(entry_id, None)
+        await self.async_flush()
+        await self.hass.async_add_executor_job(self._purge, entry_id)
+
+    async def async_query(
+        self,
+        start: float | None = None,
+        end: float | None = None,
+        entry_id: str | None = None,
+        event: str | None = None,
+        after: int = 0,
+        limit: int = AUDIT_PAGE_SIZE,
+    ) -> tuple[list[dict[str, Any]], int | None]:
+        """Return a page of events and the cursor of the next page.
+
+        Events are ordered by id, which follows the time they were recorded.
+        The cursor is None on the last page.
+        """
+        await self.async_flush()
+        clauses = ["id > ?"]
+        params: list[Any] = [after]
+        for clause, value in (
+            ("time >= ?", start),
+            ("time < ?", end),
+            ("entry_id = ?", entry_id),
+            ("event = ?", event),
+        ):
+            if value is not None:
+                clauses.append(clause)
+                params.append(value)
+        # One more row than requested tells whether there is a next page
+        params.append(limit + 1)
+        sql = (
+            f"SELECT {', '.join(AUDIT_FIELDS)} FROM events WHERE {' AND '.join(clauses)}"
+            " ORDER BY id LIMIT ?"
+        )
+        rows = await self.hass.async_add_executor_job(self._read, sql, params)
+        events = [dict(zip(AUDIT_FIELDS, row)) for row in rows[:limit]]
+        return events, events[-1]["id"] if len(rows) > limit else None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            connection = sqlite3.connect(self.path, check_same_thread=False)
+            with connection:
+                for statement in _SCHEMA:
+                    connection.execute(statement)
+            self._connection = connection
+        return self._connection
+
+    def _write(self, records: list[AuditRecord], prune_before: dict[str, float]) -> None:
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                connection.executemany(_INSERT, records)
+                connection.executemany(
+                    "DELETE FROM events WHERE entry_id = ? AND time < ?",
+                    prune_before.items(),
+                )
+
+    def _purge(self, entry_id: str) -> None:
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                connection.execute("DELETE FROM events WHERE entry_id = ?", (entry_id,))
+
+    def _read(self, sql: str, params: list[Any]) -> list[tuple[Any, ...]]:
+        with self._lock:
+            return self._connect().execute(sql, params).fetchall()
+
+    def _close(self) -> None:
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+def _timestamp(value: str | None) -> float | None:
+    """Parse unix seconds or an ISO 8601 time; raise ValueError if invalid.
+
+    ISO times without an offset are UTC, like the stored event times, so a
+    query means the same regardless of the server time zone.
+    """
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parsed = dt_util.parse_datetime(value)
+    if parsed is None:
+        raise ValueError(f"Invalid time: {value}")
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=dt_util.UTC)
+    return parsed.timestamp()
+
+
+class AuditLogView(HomeAssistantView):
+    """Query the audit log page by page.
+
+    Protected by Home Assistant authentication and restricted to admins.
+    """
+
+    url = "/api/relay_emulator_2n/audit"
+    name = "api:relay_emulator_2n:audit"
+    requires_auth = True
+
+    def __init__(self, audit: AuditLog) -> None:
+        """Initialize the view."""
+        self.audit = audit
+
+    async def get(self, request: web.Request) -> web.Response:
+        """Handle audit log queries.
+
+        Endpoint: /api/relay_emulator_2n/audit?start=...&end=...&entry_id=...&event=...&after=...&limit=...
+
+        start and end are unix seconds or ISO 8601 times, UTC unless they
+        have an offset. A response with a next cursor continues with
+        after=<next>.
+        """
+        user = request.get("hass_user")
+        if user is None or not user.is_admin:
+            return web.Response(status=403, text="Forbidden")
+
+        query = request.query
+        try:
+            start = _timestamp(query.get("start"))
+            end = _timestamp(query.get("end"))
+            after = int(query.get("after", 0))
+            limit = int(query.get("limit", AUDIT_PAGE_SIZE))
+        except ValueError:
+            return web.Response(status=400, text="Invalid start, end, after or limit parameter")
+        if not 1 <= limit <= AUDIT_MAX_PAGE_SIZE:
+            return web.Response(
+                status=400, text=f"Invalid limit. Must be between 1 and {AUDIT_MAX_PAGE_SIZE}"
+            )
+
+        try:
+            events, next_cursor = await self.audit.async_query(
+                start, end, query.get("entry_id"), query.get("event"), after, limit
+            )
+        except sqlite3.Error as err:
+            _LOGGER.error("Failed to query the audit log: %s", err)
+            return web.Response(status=503, text="Audit log unavailable")
+        return web.json_response({"events": events, "next": next_cursor})
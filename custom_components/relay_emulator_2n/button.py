@@ -9,9 +9,12 @@ from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.entity import DeviceInfo
-from homeassistant.helpers.network import get_url
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 
-from .const import DOMAIN, VERSION, CONF_BUTTON_COUNT
+from .const import DOMAIN, CONF_BUTTON_COUNT, HTTP_SERVER_KEY
+from .entity import build_device_info
+from .urls import SIGNAL_URLS_UPDATED, get_endpoint_urls
+from .webhooks import WEBHOOK_EVENT_BUTTON
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -25,11 +28,10 @@ async def async_setup_entry(
     button_count = int(entry.data.get(CONF_BUTTON_COUNT, 0))
 
     if button_count > 0:
-        entities = []
-        for button_num in range(1, button_count + 1):
-            entities.append(RelayButton(hass, entry, button_num))
-
-        async_add_entities(entities)
+        device_info = build_device_info(entry)
+        async_add_entities(
+            [RelayButton(hass, entry, button_num, device_info) for button_num in range(1, button_count + 1)]
+        )
 
 
 class RelayButton(ButtonEntity):
@@ -37,8 +39,16 @@ class RelayButton(ButtonEntity):
 
     _attr_has_entity_name = True
     _attr_available = True
+    # Static URLs, available from the get_endpoint_url service and diagnostics
+    _unrecorded_attributes = frozenset({"button_trigger_url", "button_status_url"})
 
-    def __init__(self, hass: HomeAssistant, entry: ConfigEntry, button_num: int) -> None:
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entry: ConfigEntry,
+        button_num: int,
+        device_info: DeviceInfo | None = None,
+    ) -> None:
         """Initialize the relay button."""
         self.hass = hass
         self._entry = entry
@@ -50,43 +60,42 @@ class RelayButton(ButtonEntity):
         # Set entity name
         self._attr_name = f"Button {button_num}"
         
-        # Device info
-        self._attr_device_info = DeviceInfo(
-            identifiers={(DOMAIN, entry.entry_id)},
-            name=f"IP Relay Emulator for 2N (/{entry.data['subpath']})",
-            manufacturer="Home Assistant",
-            model="IP Relay Emulator for 2N",
-            sw_version=VERSION,
+        # Device info, shared between all entities of the entry
+        self._attr_device_info = device_info or build_device_info(entry)
+
+    async def async_added_to_hass(self) -> None:
+        """Subscribe to endpoint URL updates."""
+        await super().async_added_to_hass()
+
+        # Rewrite the URL attributes when the Home Assistant URL changes
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass,
+                SIGNAL_URLS_UPDATED.format(self._entry.entry_id),
+                self.async_write_ha_state,
+            )
         )
 
+    async def async_press(self) -> None:
+        """Handle the button press.
+
+        The press itself is recorded by Home Assistant as the button state,
+        which automations can trigger on. It is also reported to the webhooks
+        of the instance.
+        """
+        _LOGGER.debug("Button %d pressed", self._button_num)
+        view = self.hass.data.get(DOMAIN, {}).get(HTTP_SERVER_KEY, {}).get(self._entry.entry_id)
+        if view is not None and view.webhooks is not None:
+            view.webhooks.send(WEBHOOK_EVENT_BUTTON, self._button_num, "pressed")
+
     @property
     def extra_state_attributes(self) -> dict[str, Any]:
         """Return entity-specific state attributes."""
         try:
-            # Get base URL
-            base_url = get_url(self.hass, allow_internal=False, allow_external=True) or get_url(
-                self.hass, allow_internal=True
-            )
-            
-            # If URL is None, Home Assistant might not be fully configured yet
-            if not base_url:
-                _LOGGER.debug(
-                    "Cannot generate button URLs for button %d: get_url() returned None. "
-                    "This typically means Home Assistant URL is not configured yet.",
-                    self._button_num,
-                )
-                return {
-                    "button_number": self._button_num,
-                    "error": "Home Assistant URL not configured",
-                }
-            
-            subpath = self._entry.data.get("subpath", "2n-relay")
-            
-            return {
-                "button_number": self._button_num,
-                "button_trigger_url": f"{base_url}/{subpath}/api/button/trigger?button={self._button_num}",
-                "button_status_url": f"{base_url}/{subpath}/api/button/status?button={self._button_num}",
-            }
+            urls = get_endpoint_urls(self.hass, self._entry)
+            if urls.deferred:
+                return {"button_number": self._button_num}
+            return urls.button_attributes(self._button_num)
         except Exception as err:
             _LOGGER.exception(
                 "Unexpected error generating button URLs for button %d",
@@ -4,6 +4,7 @@ from __future__ import annotations
 import logging
 import re
 from typing import Any
+from urllib.parse import urlsplit
 
 import voluptuous as vol
 
@@ -13,18 +14,56 @@ from homeassistant.data_entry_flow import FlowResult
 from homeassistant.helpers import selector
 
 from . import async_cleanup_orphaned_entities
+from .http_server import compute_ha1
+from .subpaths import SubpathTrie
 from .const import (
     DOMAIN,
+    AUDIT_KEY,
     CONF_SUBPATH,
     CONF_USERNAME,
     CONF_PASSWORD,
     CONF_RELAY_COUNT,
     CONF_BUTTON_COUNT,
+    CONF_USERS,
+    CONF_PERMISSIONS,
+    CONF_PERMISSION_RELAYS,
+    CONF_PERMISSION_BUTTONS,
+    CONF_NEW_USERNAME,
+    CONF_NEW_PASSWORD,
+    CONF_NEW_RELAYS,
+    CONF_NEW_BUTTONS,
+    CONF_REMOVE_USERS,
+    CONF_AUTH_MODE,
+    CONF_BASIC_AUTH_TLS_ONLY,
+    CONF_PERFORMANCE_MONITOR,
+    CONF_SLOW_REQUEST_THRESHOLD,
+    CONF_REQUEST_TRACING,
+    CONF_PULSE_DURATION,
+    CONF_RELAY_TARGETS,
+    CONF_TARGET_RELAY,
+    CONF_TARGET_ENTITIES,
+    CONF_TARGET_ON_SERVICE,
+    CONF_TARGET_OFF_SERVICE,
+    CONF_AUDIT_LOG,
+    CONF_AUDIT_RETENTION_DAYS,
+    CONF_WEBHOOK_URLS,
     DEFAULT_SUBPATH,
     DEFAULT_USERNAME,
     DEFAULT_PASSWORD,
     DEFAULT_RELAY_COUNT,
     DEFAULT_BUTTON_COUNT,
+    DEFAULT_AUTH_MODE,
+    DEFAULT_BASIC_AUTH_TLS_ONLY,
+    DEFAULT_PERFORMANCE_MONITOR,
+    DEFAULT_SLOW_REQUEST_THRESHOLD,
+    DEFAULT_REQUEST_TRACING,
+    DEFAULT_PULSE_DURATION,
+    DEFAULT_AUDIT_LOG,
+    DEFAULT_AUDIT_RETENTION_DAYS,
+    MAX_RELAY_COUNT,
+    MAX_BUTTON_COUNT,
+    MAX_AUDIT_RETENTION_DAYS,
+    AUTH_MODES,
 )
 
 _LOGGER = logging.getLogger(__name__)
@@ -49,6 +88,59 @@ def validate_subpath(subpath: str) -> str:
     return subpath
 
 
+def validate_webhook_urls(urls: list[str]) -> list[str]:
+    """Validate and normalize webhook URLs; empty entries are dropped."""
+    urls = [url.strip() for url in urls if url.strip()]
+    for url in urls:
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.netloc:
+            raise ValueError(f"Webhook URL must be an http or https URL: {url}")
+    return urls
+
+
+def subpath_error(
+    entries: list[config_entries.ConfigEntry], subpath: str, entry_id: str | None = None
+) -> str | None:
+    """Return the error key if the subpath overlaps the subpath of another entry.
+
+    Subpaths overlap when one is a prefix of the other in path segments:
+    the route of "door" would also receive the requests for "door/garage".
+    """
+    subpaths: SubpathTrie[str] = SubpathTrie()
+    for entry in entries:
+        if entry.entry_id != entry_id:
+            subpaths.add(entry.data.get(CONF_SUBPATH, DEFAULT_SUBPATH), entry.entry_id)
+    conflict = subpaths.conflict(subpath)
+    if conflict is None:
+        return None
+    return "subpath_in_use" if conflict == subpath else "subpath_overlaps"
+
+
+AUTH_MODE_SELECTOR = selector.SelectSelector(
+    selector.SelectSelectorConfig(
+        options=AUTH_MODES,
+        translation_key=CONF_AUTH_MODE,
+        mode=selector.SelectSelectorMode.DROPDOWN,
+    )
+)
+
+
+def _numbers(count: int) -> list[str]:
+    """Return the relay or button numbers 1..count as selector options."""
+    return [str(number) for number in range(1, int(count) + 1)]
+
+
+def _number_selector(numbers: list[str]) -> selector.SelectSelector:
+    """Return a multi-select of relay or button numbers."""
+    return selector.SelectSelector(
+        selector.SelectSelectorConfig(
+            options=numbers,
+            multiple=True,
+            mode=selector.SelectSelectorMode.LIST,
+        )
+    )
+
+
 class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     """Handle a config flow for IP Relay Emulator for 2N."""
 
@@ -65,10 +157,9 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 subpath = validate_subpath(user_input[CONF_SUBPATH])
                 user_input[CONF_SUBPATH] = subpath
                 
-                for entry in self._async_current_entries():
-                    if entry.data.get(CONF_SUBPATH) == subpath:
-                        errors["subpath"] = "subpath_in_use"
-                        break
+                error = subpath_error(self._async_current_entries(), subpath)
+                if error:
+                    errors["subpath"] = error
 
                 if not errors:
                     # Convert to int to handle float from NumberSelector
@@ -85,6 +176,8 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                         },
                         options={
                             CONF_PASSWORD: user_input[CONF_PASSWORD],
+                            CONF_AUTH_MODE: user_input[CONF_AUTH_MODE],
+                            CONF_BASIC_AUTH_TLS_ONLY: user_input[CONF_BASIC_AUTH_TLS_ONLY],
                         },
                     )
 
@@ -100,17 +193,21 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 vol.Required(CONF_SUBPATH, default=DEFAULT_SUBPATH): str,
                 vol.Required(CONF_USERNAME, default=DEFAULT_USERNAME): str,
                 vol.Required(CONF_PASSWORD, default=DEFAULT_PASSWORD): str,
+                vol.Required(CONF_AUTH_MODE, default=DEFAULT_AUTH_MODE): AUTH_MODE_SELECTOR,
+                vol.Required(
+                    CONF_BASIC_AUTH_TLS_ONLY, default=DEFAULT_BASIC_AUTH_TLS_ONLY
+                ): bool,
                 vol.Required(CONF_RELAY_COUNT, default=DEFAULT_RELAY_COUNT): selector.NumberSelector(
                     selector.NumberSelectorConfig(
                         min=0,
-                        max=16,
+                        max=MAX_RELAY_COUNT,
                         mode=selector.NumberSelectorMode.BOX,
                     )
                 ),
                 vol.Required(CONF_BUTTON_COUNT, default=DEFAULT_BUTTON_COUNT): selector.NumberSelector(
                     selector.NumberSelectorConfig(
                         min=0,
-                        max=16,
+                        max=MAX_BUTTON_COUNT,
                         mode=selector.NumberSelectorMode.BOX,
                     )
                 ),
@@ -134,12 +231,64 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
     """Handle options flow for IP Relay Emulator for 2N."""
 
     async def async_step_init(self, user_input=None):
+        """Choose between instance settings, user management and relay targets."""
+        return self.async_show_menu(step_id="init", menu_options=["settings", "users", "targets"])
+
+    async def async_step_settings(self, user_input=None):
         """Manage the options."""
+        errors: dict[str, str] = {}
         if user_input is not None:
+            try:
+                user_input[CONF_SUBPATH] = validate_subpath(user_input[CONF_SUBPATH])
+            except ValueError as err:
+                errors[CONF_SUBPATH] = "invalid_subpath"
+                _LOGGER.error("Invalid subpath: %s", err)
+            else:
+                error = subpath_error(
+                    self.hass.config_entries.async_entries(DOMAIN),
+                    user_input[CONF_SUBPATH],
+                    self.config_entry.entry_id,
+                )
+                if error:
+                    errors[CONF_SUBPATH] = error
+            try:
+                user_input[CONF_WEBHOOK_URLS] = validate_webhook_urls(
+                    user_input.get(CONF_WEBHOOK_URLS, [])
+                )
+            except ValueError as err:
+                errors[CONF_WEBHOOK_URLS] = "invalid_webhook_url"
+                _LOGGER.error("Invalid webhook URL: %s", err)
+
+        if user_input is not None and not errors:
             # Convert to int to handle float from NumberSelector
             relay_count = int(user_input[CONF_RELAY_COUNT])
             button_count = int(user_input[CONF_BUTTON_COUNT])
+            options = {
+                CONF_PASSWORD: user_input[CONF_PASSWORD],
+                CONF_AUTH_MODE: user_input[CONF_AUTH_MODE],
+                CONF_BASIC_AUTH_TLS_ONLY: user_input[CONF_BASIC_AUTH_TLS_ONLY],
+                CONF_PERFORMANCE_MONITOR: user_input[CONF_PERFORMANCE_MONITOR],
+                CONF_SLOW_REQUEST_THRESHOLD: int(user_input[CONF_SLOW_REQUEST_THRESHOLD]),
+                CONF_REQUEST_TRACING: user_input[CONF_REQUEST_TRACING],
+                CONF_PULSE_DURATION: user_input[CONF_PULSE_DURATION],
+                CONF_AUDIT_LOG: user_input[CONF_AUDIT_LOG],
+                CONF_AUDIT_RETENTION_DAYS: int(user_input[CONF_AUDIT_RETENTION_DAYS]),
+                CONF_WEBHOOK_URLS: user_input[CONF_WEBHOOK_URLS],
+                CONF_USERS: self.config_entry.options.get(CONF_USERS, {}),
+                CONF_PERMISSIONS: self.config_entry.options.get(CONF_PERMISSIONS, {}),
+                CONF_RELAY_TARGETS: self.config_entry.options.get(CONF_RELAY_TARGETS, {}),
+            }
             
+            # Events of an instance whose audit log is switched off are no
+            # longer pruned, so they are deleted
+            audit = self.hass.data.get(DOMAIN, {}).get(AUDIT_KEY)
+            if (
+                audit is not None
+                and self.config_entry.options.get(CONF_AUDIT_LOG, DEFAULT_AUDIT_LOG)
+                and not options[CONF_AUDIT_LOG]
+            ):
+                await audit.async_purge(self.config_entry.entry_id)
+
             # Clean up orphaned entities before updating and reloading
             # This handles the case when users decrease relay/button counts
             await async_cleanup_orphaned_entities(
@@ -158,9 +307,7 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
                     CONF_RELAY_COUNT: relay_count,
                     CONF_BUTTON_COUNT: button_count,
                 },
-                options={
-                    CONF_PASSWORD: user_input[CONF_PASSWORD],
-                },
+                options=options,
             )
             
             # Reload the integration
@@ -168,12 +315,7 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
             
             # Return options payload as well. In OptionsFlow, returning empty data
             # can cause HA to overwrite options with {} after this method exits.
-            return self.async_create_entry(
-                title="",
-                data={
-                    CONF_PASSWORD: user_input[CONF_PASSWORD],
-                },
-            )
+            return self.async_create_entry(title="", data=options)
 
         # Get current values with safe defaults
         current_subpath = self.config_entry.data.get(CONF_SUBPATH, DEFAULT_SUBPATH)
@@ -182,30 +324,215 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
             CONF_PASSWORD,
             self.config_entry.data.get(CONF_PASSWORD, DEFAULT_PASSWORD)
         )
+        current_auth_mode = self.config_entry.options.get(CONF_AUTH_MODE, DEFAULT_AUTH_MODE)
+        current_basic_auth_tls_only = self.config_entry.options.get(
+            CONF_BASIC_AUTH_TLS_ONLY, DEFAULT_BASIC_AUTH_TLS_ONLY
+        )
         current_relay_count = self.config_entry.data.get(CONF_RELAY_COUNT, DEFAULT_RELAY_COUNT)
         current_button_count = self.config_entry.data.get(CONF_BUTTON_COUNT, DEFAULT_BUTTON_COUNT)
+        current_monitor = self.config_entry.options.get(
+            CONF_PERFORMANCE_MONITOR, DEFAULT_PERFORMANCE_MONITOR
+        )
+        current_threshold = self.config_entry.options.get(
+            CONF_SLOW_REQUEST_THRESHOLD, DEFAULT_SLOW_REQUEST_THRESHOLD
+        )
+        current_tracing = self.config_entry.options.get(
+            CONF_REQUEST_TRACING, DEFAULT_REQUEST_TRACING
+        )
+        current_pulse_duration = self.config_entry.options.get(
+            CONF_PULSE_DURATION, DEFAULT_PULSE_DURATION
+        )
+        current_audit_log = self.config_entry.options.get(CONF_AUDIT_LOG, DEFAULT_AUDIT_LOG)
+        current_audit_retention = self.config_entry.options.get(
+            CONF_AUDIT_RETENTION_DAYS, DEFAULT_AUDIT_RETENTION_DAYS
+        )
+        current_webhook_urls = self.config_entry.options.get(CONF_WEBHOOK_URLS, [])
 
         return self.async_show_form(
-            step_id="init",
+            step_id="settings",
             data_schema=vol.Schema(
                 {
                     vol.Required(CONF_SUBPATH, default=current_subpath): str,
                     vol.Required(CONF_USERNAME, default=current_username): str,
                     vol.Required(CONF_PASSWORD, default=current_password): str,
+                    vol.Required(CONF_AUTH_MODE, default=current_auth_mode): AUTH_MODE_SELECTOR,
+                    vol.Required(
+                        CONF_BASIC_AUTH_TLS_ONLY, default=current_basic_auth_tls_only
+                    ): bool,
                     vol.Required(CONF_RELAY_COUNT, default=current_relay_count): selector.NumberSelector(
                         selector.NumberSelectorConfig(
                             min=0,
-                            max=16,
+                            max=MAX_RELAY_COUNT,
                             mode=selector.NumberSelectorMode.BOX,
                         )
                     ),
                     vol.Required(CONF_BUTTON_COUNT, default=current_button_count): selector.NumberSelector(
                         selector.NumberSelectorConfig(
                             min=0,
-                            max=16,
+                            max=MAX_BUTTON_COUNT,
+                            mode=selector.NumberSelectorMode.BOX,
+                        )
+                    ),
+                    vol.Required(CONF_PULSE_DURATION, default=current_pulse_duration): selector.NumberSelector(
+                        selector.NumberSelectorConfig(
+                            min=0.1,
+                            max=600,
+                            step=0.1,
+                            unit_of_measurement="s",
+                            mode=selector.NumberSelectorMode.BOX,
+                        )
+                    ),
+                    vol.Required(CONF_PERFORMANCE_MONITOR, default=current_monitor): bool,
+                    vol.Required(CONF_SLOW_REQUEST_THRESHOLD, default=current_threshold): selector.NumberSelector(
+                        selector.NumberSelectorConfig(
+                            min=10,
+                            max=10000,
+                            unit_of_measurement="ms",
+                            mode=selector.NumberSelectorMode.BOX,
+                        )
+                    ),
+                    vol.Required(CONF_REQUEST_TRACING, default=current_tracing): bool,
+                    vol.Required(CONF_AUDIT_LOG, default=current_audit_log): bool,
+                    vol.Required(CONF_AUDIT_RETENTION_DAYS, default=current_audit_retention): selector.NumberSelector(
+                        selector.NumberSelectorConfig(
+                            min=1,
+                            max=MAX_AUDIT_RETENTION_DAYS,
+                            unit_of_measurement="d",
                             mode=selector.NumberSelectorMode.BOX,
                         )
                     ),
+                    vol.Optional(CONF_WEBHOOK_URLS, default=current_webhook_urls): selector.TextSelector(
+                        selector.TextSelectorConfig(
+                            type=selector.TextSelectorType.URL,
+                            multiple=True,
+                        )
+                    ),
+                }
+            ),
+            errors=errors,
+        )
+
+    async def async_step_users(self, user_input=None):
+        """Add or remove additional users; applied without reload."""
+        users = dict(self.config_entry.options.get(CONF_USERS, {}))
+        permissions = dict(self.config_entry.options.get(CONF_PERMISSIONS, {}))
+        relays = _numbers(self.config_entry.data.get(CONF_RELAY_COUNT, 0))
+        buttons = _numbers(self.config_entry.data.get(CONF_BUTTON_COUNT, 0))
+        errors: dict[str, str] = {}
+
+        if user_input is not None:
+            for username in user_input.get(CONF_REMOVE_USERS, []):
+                users.pop(username, None)
+                permissions.pop(username, None)
+
+            new_username = user_input.get(CONF_NEW_USERNAME, "").strip()
+            if new_username:
+                if ":" in new_username:
+                    errors[CONF_NEW_USERNAME] = "invalid_username"
+                elif new_username in users or new_username == self.config_entry.data.get(CONF_USERNAME):
+                    errors[CONF_NEW_USERNAME] = "username_in_use"
+                elif not user_input.get(CONF_NEW_PASSWORD):
+                    errors[CONF_NEW_PASSWORD] = "password_required"
+                else:
+                    # Only HA1 is stored for additional users
+                    users[new_username] = compute_ha1(new_username, user_input[CONF_NEW_PASSWORD])
+                    # Only restrictions are stored; a user with every relay and
+                    # button selected also gets relays and buttons added later
+                    permission = {}
+                    new_relays = sorted(int(relay) for relay in user_input.get(CONF_NEW_RELAYS, relays))
+                    if len(new_relays) < len(relays):
+                        permission[CONF_PERMISSION_RELAYS] = new_relays
+                    new_buttons = sorted(int(button) for button in user_input.get(CONF_NEW_BUTTONS, buttons))
+                    if len(new_buttons) < len(buttons):
+                        permission[CONF_PERMISSION_BUTTONS] = new_buttons
+                    if permission:
+                        permissions[new_username] = permission
+
+            if not errors:
+                # The update listener applies the users to the running view
+                return self.async_create_entry(
+                    title="",
+                    data={
+                        **self.config_entry.options,
+                        CONF_USERS: users,
+                        CONF_PERMISSIONS: permissions,
+                    },
+                )
+
+        return self.async_show_form(
+            step_id="users",
+            data_schema=vol.Schema(
+                {
+                    vol.Optional(CONF_NEW_USERNAME): str,
+                    vol.Optional(CONF_NEW_PASSWORD): str,
+                    vol.Optional(CONF_NEW_RELAYS, default=relays): _number_selector(relays),
+                    vol.Optional(CONF_NEW_BUTTONS, default=buttons): _number_selector(buttons),
+                    vol.Optional(CONF_REMOVE_USERS, default=[]): selector.SelectSelector(
+                        selector.SelectSelectorConfig(
+                            options=sorted(users),
+                            multiple=True,
+                            mode=selector.SelectSelectorMode.LIST,
+                        )
+                    ),
+                }
+            ),
+            errors=errors,
+            description_placeholders={
+                "username": self.config_entry.data.get(CONF_USERNAME, DEFAULT_USERNAME),
+                "count": str(len(users)),
+            },
+        )
+
+    async def async_step_targets(self, user_input=None):
+        """Bind a relay to target entities; applied without reload."""
+        targets = dict(self.config_entry.options.get(CONF_RELAY_TARGETS, {}))
+        relays = _numbers(self.config_entry.data.get(CONF_RELAY_COUNT, 0))
+        errors: dict[str, str] = {}
+
+        if user_input is not None:
+            relay = user_input[CONF_TARGET_RELAY]
+            target = {CONF_TARGET_ENTITIES: user_input.get(CONF_TARGET_ENTITIES, [])}
+            for key in (CONF_TARGET_ON_SERVICE, CONF_TARGET_OFF_SERVICE):
+                service = user_input.get(key, "").strip()
+                if service and not re.match(r"^[a-z0-9_]+\.[a-z0-9_]+$", service):
+                    errors[key] = "invalid_service"
+                elif service:
+                    target[key] = service
+
+            if not errors:
+                # Without entities the relay only switches its own switch again
+                if target[CONF_TARGET_ENTITIES]:
+                    targets[relay] = target
+                else:
+                    targets.pop(relay, None)
+                # The update listener applies the targets to the running view
+                return self.async_create_entry(
+                    title="",
+                    data={**self.config_entry.options, CONF_RELAY_TARGETS: targets},
+                )
+
+        return self.async_show_form(
+            step_id="targets",
+            data_schema=vol.Schema(
+                {
+                    vol.Required(CONF_TARGET_RELAY): selector.SelectSelector(
+                        selector.SelectSelectorConfig(
+                            options=relays,
+                            mode=selector.SelectSelectorMode.DROPDOWN,
+                        )
+                    ),
+                    vol.Optional(CONF_TARGET_ENTITIES, default=[]): selector.EntitySelector(
+                        selector.EntitySelectorConfig(multiple=True)
+                    ),
+                    vol.Optional(CONF_TARGET_ON_SERVICE, default=""): str,
+                    vol.Optional(CONF_TARGET_OFF_SERVICE, default=""): str,
                 }
             ),
+            errors=errors,
+            description_placeholders={
+                "targets": ", ".join(
+                    f"{relay}: {len(targets[relay][CONF_TARGET_ENTITIES])}"
+                    for relay in sorted(targets, key=int)
+                ) or "-",
+            },
         )
@@ -9,6 +9,29 @@ CONF_USERNAME = "username"
 CONF_PASSWORD = "password"
 CONF_RELAY_COUNT = "relay_count"
 CONF_BUTTON_COUNT = "button_count"
+CONF_USERS = "users"
+CONF_PERMISSIONS = "permissions"
+CONF_PERMISSION_RELAYS = "relays"
+CONF_PERMISSION_BUTTONS = "buttons"
+CONF_NEW_USERNAME = "new_username"
+CONF_NEW_PASSWORD = "new_password"
+CONF_NEW_RELAYS = "new_relays"
+CONF_NEW_BUTTONS = "new_buttons"
+CONF_REMOVE_USERS = "remove_users"
+CONF_AUTH_MODE = "auth_mode"
+CONF_BASIC_AUTH_TLS_ONLY = "basic_auth_tls_only"
+CONF_PERFORMANCE_MONITOR = "performance_monitor"
+CONF_SLOW_REQUEST_THRESHOLD = "slow_request_threshold"
+CONF_REQUEST_TRACING = "request_tracing"
+CONF_PULSE_DURATION = "pulse_duration"
+CONF_RELAY_TARGETS = "relay_targets"
+CONF_TARGET_RELAY = "relay"
+CONF_TARGET_ENTITIES = "entities"
+CONF_TARGET_ON_SERVICE = "on_service"
+CONF_TARGET_OFF_SERVICE = "off_service"
+CONF_AUDIT_LOG = "audit_log"
+CONF_AUDIT_RETENTION_DAYS = "audit_retention_days"
+CONF_WEBHOOK_URLS = "webhook_urls"
 
 # Default values
 DEFAULT_SUBPATH = "2n-relay"
@@ -16,6 +39,80 @@ DEFAULT_USERNAME = "admin"
 DEFAULT_PASSWORD = "2n"
 DEFAULT_RELAY_COUNT = 2
 DEFAULT_BUTTON_COUNT = 0
+DEFAULT_REALM = "2N"
+DEFAULT_AUTH_MODE = "digest"
+DEFAULT_BASIC_AUTH_TLS_ONLY = True
+DEFAULT_PERFORMANCE_MONITOR = False
+DEFAULT_SLOW_REQUEST_THRESHOLD = 200  # milliseconds
+DEFAULT_REQUEST_TRACING = False
+DEFAULT_PULSE_DURATION = 5  # seconds a relay stays on after a switch trigger
+DEFAULT_AUDIT_LOG = False
+DEFAULT_AUDIT_RETENTION_DAYS = 90
+
+# Authentication modes
+AUTH_MODE_DIGEST = "digest"
+AUTH_MODE_BASIC = "basic"
+AUTH_MODE_BOTH = "both"
+AUTH_MODES = [AUTH_MODE_DIGEST, AUTH_MODE_BASIC, AUTH_MODE_BOTH]
+
+# Limits
+MAX_RELAY_COUNT = 256
+MAX_BUTTON_COUNT = 256
+MAX_AUDIT_RETENTION_DAYS = 3650
+
+# Services called on relay target entities: (off, on) by entity domain
+TARGET_SERVICES = {
+    "lock": ("lock.lock", "lock.unlock"),
+    "cover": ("cover.close_cover", "cover.open_cover"),
+    "valve": ("valve.close_valve", "valve.open_valve"),
+    "button": (None, "button.press"),
+    "input_button": (None, "input_button.press"),
+    "scene": (None, "scene.turn_on"),
+}
+DEFAULT_TARGET_SERVICES = ("homeassistant.turn_off", "homeassistant.turn_on")
+
+# 2N HTTP API error codes
+API_ERROR_INSUFFICIENT_PRIVILEGES = 10
+API_ERROR_MISSING_PARAMETER = 11
+API_ERROR_INVALID_PARAMETER = 12
+API_ERROR_PROCESSING = 14
 
 # HTTP server keys
 HTTP_SERVER_KEY = "http_server"
+
+# Endpoint URL cache
+URLS_KEY = "endpoint_urls"
+
+# Subpath trie of the registered views
+SUBPATH_INDEX_KEY = "subpath_index"
+
+# Setup phase durations per entry
+SETUP_TIMES_KEY = "setup_times"
+
+# Relay state persistence
+STATE_STORE_KEY = "state_store"
+STORAGE_VERSION = 1
+STATE_SAVE_INTERVAL = 10  # seconds between coalesced writes
+
+# Performance monitoring
+LOOP_LAG_INTERVAL = 0.5  # seconds between event loop lag samples
+MONITOR_HISTORY_SIZE = 20  # slow requests and lag spikes kept for diagnostics
+TRACE_HISTORY_SIZE = 50  # request traces kept for diagnostics
+
+# Audit log of access events
+AUDIT_KEY = "audit"
+AUDIT_DATABASE = "relay_emulator_2n_audit.db"
+AUDIT_BATCH_SIZE = 100  # queued events that trigger an immediate write
+AUDIT_FLUSH_INTERVAL = 5  # seconds an event waits at most before it is written
+AUDIT_QUEUE_SIZE = 10000  # queued events kept while writes fall behind
+AUDIT_PRUNE_INTERVAL = 3600  # seconds between retention prunes
+AUDIT_PAGE_SIZE = 100  # events per query page by default
+AUDIT_MAX_PAGE_SIZE = 1000
+
+# Outbound webhooks of relay and button events
+WEBHOOK_BATCH_DELAY = 0.2  # seconds events are collected before a batch is sent
+WEBHOOK_BATCH_SIZE = 50  # events per request
+WEBHOOK_QUEUE_SIZE = 1000  # events kept per URL while it is unreachable
+WEBHOOK_TIMEOUT = 10  # seconds per request
+WEBHOOK_RETRY_DELAY = 1  # seconds before the first retry, doubled per failure
+WEBHOOK_MAX_RETRY_DELAY = 300
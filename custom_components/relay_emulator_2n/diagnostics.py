@@ -0,0 +1,66 @@
+"""Diagnostics support for 2N Relay Emulator."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import (
+    DOMAIN,
+    CONF_PASSWORD,
+    CONF_USERS,
+    CONF_WEBHOOK_URLS,
+    HTTP_SERVER_KEY,
+    SETUP_TIMES_KEY,
+)
+from .urls import get_endpoint_urls
+
+# Webhook URLs often carry tokens
+TO_REDACT = {CONF_PASSWORD, CONF_USERS, CONF_WEBHOOK_URLS}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    view = hass.data.get(DOMAIN, {}).get(HTTP_SERVER_KEY, {}).get(entry.entry_id)
+    setup_timer = hass.data.get(DOMAIN, {}).get(SETUP_TIMES_KEY, {}).get(entry.entry_id)
+
+    diagnostics: dict[str, Any] = {
+        "entry": {
+            "data": async_redact_data(dict(entry.data), TO_REDACT),
+            "options": async_redact_data(dict(entry.options), TO_REDACT),
+        },
+    }
+    if setup_timer is not None:
+        diagnostics["setup"] = setup_timer.as_dict()
+    if view is None:
+        return diagnostics
+
+    diagnostics["http"] = {
+        "url": view.url,
+        "auth_mode": view.auth_mode,
+        "basic_auth_tls_only": view.basic_auth_tls_only,
+        "users": sorted(view.auth.users),
+        "relay_count": view.relay_count,
+        "button_count": view.button_count,
+        "pulse_duration": view.pulse_duration,
+        "nonce_cache_size": len(view.auth.nonce_cache),
+    }
+    # The URL attributes are not recorded, so they are included here
+    diagnostics["endpoint_urls"] = get_endpoint_urls(hass, entry).as_dict()
+    diagnostics["performance"] = (
+        view.monitor.as_dict() if view.monitor else {"enabled": False}
+    )
+    diagnostics["request_traces"] = (
+        view.tracer.as_dict() if view.tracer else {"enabled": False}
+    )
+    diagnostics["audit"] = (
+        view.audit.as_dict(entry.entry_id) if view.audit else {"enabled": False}
+    )
+    diagnostics["webhooks"] = (
+        view.webhooks.as_dict() if view.webhooks else {"enabled": False}
+    )
+    return diagnostics
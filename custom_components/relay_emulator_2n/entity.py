@@ -0,0 +1,21 @@
+"""Shared entity helpers for 2N Relay Emulator."""
+from __future__ import annotations
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.helpers.entity import DeviceInfo
+
+from .const import DOMAIN, VERSION
+
+
+def build_device_info(entry: ConfigEntry) -> DeviceInfo:
+    """Return the device info of a config entry.
+
+    Platforms build it once and share it between all their entities.
+    """
+    return DeviceInfo(
+        identifiers={(DOMAIN, entry.entry_id)},
+        name=f"IP Relay Emulator for 2N (/{entry.data['subpath']})",
+        manufacturer="Home Assistant",
+        model="IP Relay Emulator for 2N",
+        sw_version=VERSION,
+    )
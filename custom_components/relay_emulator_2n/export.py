@@ -0,0 +1,124 @@
+"""Bulk provisioning export for 2N Relay Emulator."""
+from __future__ import annotations
+
+import csv
+import io
+import json
+import logging
+from collections.abc import Iterator
+from typing import Any
+
+from aiohttp import web
+from homeassistant.core import HomeAssistant
+from homeassistant.components.http import HomeAssistantView
+
+from .const import DOMAIN, HTTP_SERVER_KEY, URLS_KEY
+
+_LOGGER = logging.getLogger(__name__)
+
+EXPORT_FORMAT_JSON = "json"
+EXPORT_FORMAT_CSV = "csv"
+EXPORT_FORMATS = (EXPORT_FORMAT_JSON, EXPORT_FORMAT_CSV)
+
+CSV_FIELDS = ("entry_id", "subpath", "realm", "username", "type", "number", "action", "url")
+
+
+def iter_instances(hass: HomeAssistant) -> Iterator[dict[str, Any]]:
+    """Yield the provisioning data of each loaded instance.
+
+    Instances are built one at a time from the cached endpoint URLs, so the
+    cost of a consumer that streams them stays flat with many instances.
+    """
+    domain_data = hass.data.get(DOMAIN, {})
+    views = domain_data.get(HTTP_SERVER_KEY, {})
+
+    for entry_id, urls in list(domain_data.get(URLS_KEY, {}).items()):
+        view = views.get(entry_id)
+        instance = urls.as_dict()
+        instance["realm"] = view.auth.realm if view else None
+        instance["username"] = view.auth.username if view else None
+        yield instance
+
+
+def iter_json_chunks(hass: HomeAssistant) -> Iterator[str]:
+    """Yield a JSON document of all instances in chunks."""
+    yield '{"instances": ['
+    separator = ""
+    for instance in iter_instances(hass):
+        yield separator + json.dumps(instance)
+        separator = ", "
+    yield "]}\n"
+
+
+def iter_csv_chunks(hass: HomeAssistant) -> Iterator[str]:
+    """Yield a CSV document with one row per endpoint URL in chunks."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_FIELDS)
+
+    for instance in iter_instances(hass):
+        common = (instance["entry_id"], instance["subpath"], instance["realm"], instance["username"])
+        for kind, items in (("relay", instance["relays"]), ("button", instance["buttons"])):
+            for attrs in items:
+                number = attrs[f"{kind}_number"]
+                for key, value in attrs.items():
+                    if key.endswith("_url"):
+                        action = key[len(kind) + 1:-len("_url")]
+                        writer.writerow((*common, kind, number, action, value))
+
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+class ProvisioningExportView(HomeAssistantView):
+    """Stream endpoint URLs of all instances for bulk provisioning.
+
+    Protected by Home Assistant authentication and restricted to admins.
+    """
+
+    url = "/api/relay_emulator_2n/export"
+    name = "api:relay_emulator_2n:export"
+    requires_auth = True
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the view."""
+        self.hass = hass
+
+    async def get(self, request: web.Request) -> web.StreamResponse:
+        """Handle export requests.
+
+        Endpoint: /api/relay_emulator_2n/export?format=json|csv
+        """
+        user = request.get("hass_user")
+        if user is None or not user.is_admin:
+            return web.Response(status=403, text="Forbidden")
+
+        export_format = request.query.get("format", EXPORT_FORMAT_JSON).lower()
+        if export_format not in EXPORT_FORMATS:
+            return web.Response(
+                status=400,
+                text=f"Invalid format. Must be one of: {', '.join(EXPORT_FORMATS)}",
+            )
+
+        if export_format == EXPORT_FORMAT_CSV:
+            chunks = iter_csv_chunks(self.hass)
+            content_type = "text/csv"
+        else:
+            chunks = iter_json_chunks(self.hass)
+            content_type = "application/json"
+
+        response = web.StreamResponse(
+            headers={
+                "Content-Type": f"{content_type}; charset=utf-8",
+                "Content-Disposition": f'attachment; filename="{DOMAIN}.{export_format}"',
+            }
+        )
+        await response.prepare(request)
+        for chunk in chunks:
+            await response.write(chunk.encode())
+        await response.write_eof()
+        return response
@@ -1,14 +1,19 @@
 """HTTP server for 2N Relay Emulation with Digest Authentication."""
+import asyncio
+import base64
+import binascii
 import hashlib
 import hmac
 import logging
+import re
 import secrets
 import time
 from aiohttp import web
-from typing import Dict, Optional, Tuple
-from homeassistant.core import HomeAssistant
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+from homeassistant.core import Context, HomeAssistant, callback
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.event import async_call_later
 from homeassistant.components.http import HomeAssistantView
 
 from .const import (
@@ -19,8 +24,70 @@ from .const import (
     CONF_PASSWORD,
     CONF_RELAY_COUNT,
     CONF_BUTTON_COUNT,
+    CONF_USERS,
+    CONF_PERMISSIONS,
+    CONF_PERMISSION_RELAYS,
+    CONF_PERMISSION_BUTTONS,
+    CONF_AUTH_MODE,
+    CONF_BASIC_AUTH_TLS_ONLY,
+    CONF_PERFORMANCE_MONITOR,
+    CONF_SLOW_REQUEST_THRESHOLD,
+    CONF_REQUEST_TRACING,
+    CONF_PULSE_DURATION,
+    CONF_RELAY_TARGETS,
+    CONF_TARGET_ENTITIES,
+    CONF_TARGET_ON_SERVICE,
+    CONF_TARGET_OFF_SERVICE,
+    CONF_AUDIT_LOG,
+    CONF_AUDIT_RETENTION_DAYS,
+    CONF_WEBHOOK_URLS,
+    DEFAULT_AUTH_MODE,
+    DEFAULT_BASIC_AUTH_TLS_ONLY,
+    DEFAULT_PERFORMANCE_MONITOR,
+    DEFAULT_REALM,
+    DEFAULT_SLOW_REQUEST_THRESHOLD,
+    DEFAULT_REQUEST_TRACING,
+    DEFAULT_PULSE_DURATION,
+    DEFAULT_TARGET_SERVICES,
+    DEFAULT_AUDIT_LOG,
+    DEFAULT_AUDIT_RETENTION_DAYS,
+    TARGET_SERVICES,
+    API_ERROR_INSUFFICIENT_PRIVILEGES,
+    API_ERROR_INVALID_PARAMETER,
+    API_ERROR_MISSING_PARAMETER,
+    API_ERROR_PROCESSING,
+    AUTH_MODE_BASIC,
+    AUTH_MODE_DIGEST,
+    AUDIT_KEY,
     HTTP_SERVER_KEY,
+    SUBPATH_INDEX_KEY,
 )
+from .audit import AUDIT_EVENT_AUTH_FAILURE, AUDIT_EVENT_BUTTON, AUDIT_EVENT_RELAY, AuditLog
+from .monitor import (
+    PHASE_LOOKUP,
+    PHASE_RESPONSE,
+    PHASE_SERVICE_CALL,
+    RequestMonitor,
+    RequestTracer,
+    mark_phase,
+    request_context,
+    track_request,
+)
+from .profiler import RequestProfiler
+from .responses import (
+    FORMAT_BITMASK,
+    FORMAT_JSON,
+    FORMAT_TEXT,
+    JSON_SUCCESS,
+    JsonTemplates,
+    api_error,
+    json_body_response,
+    response_format,
+    result_list,
+)
+from .subpaths import SubpathNode, SubpathTrie
+from .urls import get_endpoint_urls
+from .webhooks import WebhookForwarder
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -28,6 +95,9 @@ _LOGGER = logging.getLogger(__name__)
 NONCE_EXPIRY_SECONDS = 300  # 5 minutes
 MAX_NONCE_CACHE_SIZE = 1000  # Prevent memory exhaustion
 
+# aiohttp reports "{path:.*}" as "{path}" in the resource formatter
+_ROUTE_PATTERN_RE = re.compile(r"\{(\w+):[^{}]*\}")
+
 
 def _find_registered_resource(hass: HomeAssistant, view: HomeAssistantView):
     """Find the aiohttp resource for a registered HomeAssistantView."""
@@ -46,12 +116,13 @@ def _find_registered_resource(hass: HomeAssistant, view: HomeAssistantView):
     except Exception:
         pass
 
+    formatter = _ROUTE_PATTERN_RE.sub(r"{\1}", view.url)
     try:
         for resource in router.resources():
             if getattr(resource, "name", None) == view.name:
                 return resource
             info = resource.get_info()
-            if info.get("formatter") == view.url:
+            if info.get("formatter") in (view.url, formatter):
                 return resource
     except Exception:
         pass
@@ -105,11 +176,98 @@ def _unregister_view_from_router(hass: HomeAssistant, view: HomeAssistantView) -
     return removed
 
 
+def compute_ha1(username: str, password: str, realm: str = DEFAULT_REALM) -> str:
+    """Return the digest HA1 hash of a credential set."""
+    return hashlib.md5(f"{username}:{realm}:{password}".encode()).hexdigest()
+
+
+_DIGEST_USERNAME = re.compile(r'username="([^"]*)"')
+
+
+def claimed_username(auth_header: str) -> Optional[str]:
+    """Return the username an Authorization header claims, without verifying it."""
+    if auth_header.startswith("Basic "):
+        try:
+            decoded = base64.b64decode(auth_header[6:], validate=True).decode("utf-8")
+        except (binascii.Error, UnicodeDecodeError):
+            return None
+        return decoded.split(":", 1)[0]
+    match = _DIGEST_USERNAME.search(auth_header)
+    return match.group(1) if match else None
+
+
+def _bitmask(numbers) -> int:
+    """Return a bitmask with bit n - 1 set for every number n."""
+    mask = 0
+    for number in numbers:
+        mask |= 1 << (int(number) - 1)
+    return mask
+
+
+def compile_permissions(
+    permissions: Dict[str, Dict[str, Any]],
+) -> Tuple[Dict[str, int], Dict[str, int]]:
+    """Compile per-user relay and button permissions into bitmasks.
+
+    Returns {username: mask} tables for relays and buttons. Users without
+    an entry in a table may use every relay or button.
+    """
+    relay_acl: Dict[str, int] = {}
+    button_acl: Dict[str, int] = {}
+    for username, permission in permissions.items():
+        if CONF_PERMISSION_RELAYS in permission:
+            relay_acl[username] = _bitmask(permission[CONF_PERMISSION_RELAYS])
+        if CONF_PERMISSION_BUTTONS in permission:
+            button_acl[username] = _bitmask(permission[CONF_PERMISSION_BUTTONS])
+    return relay_acl, button_acl
+
+
+# (domain, service, entity_ids) of one service call
+TargetCall = Tuple[str, str, List[str]]
+
+
+def compile_relay_targets(
+    targets: Dict[str, Dict[str, Any]],
+) -> Dict[int, Tuple[List[TargetCall], List[TargetCall]]]:
+    """Compile relay target bindings into the service calls of each relay.
+
+    Returns {relay: (off_calls, on_calls)}. Targets sharing a service are
+    switched by a single call. Without a configured service, the service
+    follows from the entity domain (e.g. lock.unlock / lock.lock).
+    """
+    compiled: Dict[int, Tuple[List[TargetCall], List[TargetCall]]] = {}
+    for relay, target in targets.items():
+        calls: Tuple[Dict[Tuple[str, str], List[str]], ...] = ({}, {})
+        for entity_id in target.get(CONF_TARGET_ENTITIES, []):
+            defaults = TARGET_SERVICES.get(entity_id.split(".", 1)[0], DEFAULT_TARGET_SERVICES)
+            for index, key in enumerate((CONF_TARGET_OFF_SERVICE, CONF_TARGET_ON_SERVICE)):
+                service = target.get(key) or defaults[index]
+                if service:
+                    domain, _, name = service.partition(".")
+                    calls[index].setdefault((domain, name), []).append(entity_id)
+        off_calls, on_calls = (
+            [(domain, name, entity_ids) for (domain, name), entity_ids in by_service.items()]
+            for by_service in calls
+        )
+        if off_calls or on_calls:
+            compiled[int(relay)] = (off_calls, on_calls)
+    return compiled
+
+
 class DigestAuth:
     """Handle HTTP Digest Authentication compatible with 2N devices."""
 
-    def __init__(self, username: str, password: str, realm: str = "2N"):
-        """Initialize digest auth handler."""
+    def __init__(
+        self,
+        username: str,
+        password: str,
+        realm: str = DEFAULT_REALM,
+        users: Optional[Dict[str, str]] = None,
+    ):
+        """Initialize digest auth handler.
+
+        users maps additional usernames to their pre-calculated HA1.
+        """
         self.username = username
         self.password = password
         self.realm = realm
@@ -117,9 +275,15 @@ class DigestAuth:
         self.nonce_cache: Dict[str, float] = {}
         
         # Pre-calculate HA1 for better performance and to avoid storing raw password
-        self.ha1 = hashlib.md5(
-            f"{self.username}:{self.realm}:{self.password}".encode()
-        ).hexdigest()
+        self.ha1 = compute_ha1(self.username, self.password, self.realm)
+
+        # HA1 per username for O(1) lookup; the configured user always wins
+        self.users: Dict[str, str] = {}
+        self.set_users(users or {})
+
+    def set_users(self, users: Dict[str, str]) -> None:
+        """Replace the additional users with a {username: HA1} table."""
+        self.users = {**users, self.username: self.ha1}
 
     def _cleanup_expired_nonces(self) -> None:
         """Remove expired nonces from cache."""
@@ -157,8 +321,12 @@ class DigestAuth:
 
     def verify_response(self, auth_header: str, method: str, uri: str) -> bool:
         """Verify the digest authentication response."""
+        return self.authenticate_digest(auth_header, method, uri) is not None
+
+    def authenticate_digest(self, auth_header: str, method: str, uri: str) -> Optional[str]:
+        """Return the username of a valid digest authentication response."""
         if not auth_header or not auth_header.startswith("Digest "):
-            return False
+            return None
 
         # Parse the authorization header
         auth_data = {}
@@ -183,22 +351,23 @@ class DigestAuth:
         # Validate required fields
         if not all([username, realm, nonce, uri_from_auth, response]):
             _LOGGER.warning("Digest auth: Missing required fields")
-            return False
+            return None
 
-        if username != self.username or realm != self.realm:
+        ha1 = self.users.get(username)
+        if ha1 is None or realm != self.realm:
             _LOGGER.warning("Digest auth: Invalid username or realm")
-            return False
+            return None
 
         # SECURITY: Verify nonce is valid and not expired
         if nonce not in self.nonce_cache:
             _LOGGER.warning("Digest auth: Invalid or unknown nonce")
-            return False
+            return None
         
         nonce_timestamp = self.nonce_cache[nonce]
         if time.time() - nonce_timestamp > NONCE_EXPIRY_SECONDS:
             _LOGGER.warning("Digest auth: Expired nonce")
             del self.nonce_cache[nonce]
-            return False
+            return None
         
         # Mark nonce as used (remove from cache to prevent replay)
         # Note: For strict replay protection, uncomment the next line
@@ -210,27 +379,61 @@ class DigestAuth:
 
         if qop == "auth":
             expected_response = hashlib.md5(
-                f"{self.ha1}:{nonce}:{nc}:{cnonce}:{qop}:{ha2}".encode()
+                f"{ha1}:{nonce}:{nc}:{cnonce}:{qop}:{ha2}".encode()
             ).hexdigest()
         else:
-            expected_response = hashlib.md5(f"{self.ha1}:{nonce}:{ha2}".encode()).hexdigest()
+            expected_response = hashlib.md5(f"{ha1}:{nonce}:{ha2}".encode()).hexdigest()
 
         # Use constant-time comparison to prevent timing attacks
-        is_valid = hmac.compare_digest(response, expected_response)
-        
-        if not is_valid:
+        if not hmac.compare_digest(response, expected_response):
             _LOGGER.warning(
                 "Digest auth: Invalid response hash from %s", 
                 username
             )
-        
-        return is_valid
+            return None
+
+        return username
+
+    def verify_basic(self, auth_header: str) -> bool:
+        """Verify Basic authentication credentials against the pre-calculated HA1."""
+        return self.authenticate_basic(auth_header) is not None
+
+    def authenticate_basic(self, auth_header: str) -> Optional[str]:
+        """Return the username of valid Basic authentication credentials."""
+        if not auth_header or not auth_header.startswith("Basic "):
+            return None
+
+        try:
+            credentials = base64.b64decode(auth_header[6:].strip(), validate=True).decode()
+        except (binascii.Error, UnicodeDecodeError):
+            _LOGGER.warning("Basic auth: Malformed credentials")
+            return None
+
+        username, separator, password = credentials.partition(":")
+        if not separator:
+            _LOGGER.warning("Basic auth: Malformed credentials")
+            return None
+
+        # HA1 covers username and password; compare in constant time, also for
+        # unknown users
+        expected_ha1 = self.users.get(username, self.ha1)
+        ha1 = compute_ha1(username, password, self.realm)
+        is_valid = hmac.compare_digest(ha1, expected_ha1) and username in self.users
+
+        if not is_valid:
+            _LOGGER.warning("Basic auth: Invalid credentials from %s", username)
+            return None
+
+        return username
+
+
+_RELAY_STATUS_TEXT = ("off", "on", "unknown")
 
 
 class RelayView2N(HomeAssistantView):
     """HTTP View that emulates 2N IP relay endpoints."""
 
-    requires_auth = False  # We handle digest auth ourselves
+    requires_auth = False  # We handle digest and basic auth ourselves
     
     def __init__(
         self,
@@ -241,6 +444,12 @@ class RelayView2N(HomeAssistantView):
         password: str,
         relay_count: int,
         button_count: int,
+        auth_mode: str = DEFAULT_AUTH_MODE,
+        basic_auth_tls_only: bool = DEFAULT_BASIC_AUTH_TLS_ONLY,
+        users: Optional[Dict[str, str]] = None,
+        permissions: Optional[Dict[str, Dict[str, Any]]] = None,
+        pulse_duration: float = DEFAULT_PULSE_DURATION,
+        relay_targets: Optional[Dict[str, Dict[str, Any]]] = None,
     ):
         """Initialize the view."""
         self.hass = hass
@@ -248,16 +457,98 @@ class RelayView2N(HomeAssistantView):
         self.subpath = subpath.rstrip("/")
         self.relay_count = relay_count
         self.button_count = button_count
-        self.auth = DigestAuth(username, password)
+        self.auth = DigestAuth(username, password, users=users)
+        self.auth_mode = auth_mode
+        self.basic_auth_tls_only = basic_auth_tls_only
+        # Set once the error about basic mode on plain HTTP has been logged
+        self._reported_basic_without_tls = False
+        # Relay and button bitmasks of restricted users
+        self.relay_acl: Dict[str, int] = {}
+        self.button_acl: Dict[str, int] = {}
+        self.set_permissions(permissions or {})
+        # Seconds a relay stays on after /api/switch/ctrl?action=trigger
+        self.pulse_duration = pulse_duration
+        # Cancel callbacks of pending pulse ends by relay number
+        self._pulses: Dict[int, Callable[[], None]] = {}
+        # Incremented by every command of a relay; a pulse end is skipped
+        # once a newer command has switched the relay
+        self._generations: Dict[int, int] = {}
+        # Service calls of target entities switched together with a relay
+        self.relay_targets: Dict[int, Tuple[List[TargetCall], List[TargetCall]]] = {}
+        self.set_relay_targets(relay_targets or {})
+        self.json_templates = JsonTemplates(relay_count, button_count, self._system_info())
+
+        # Relay states mirrored by the switch entities: bit relay - 1 of
+        # relay_states is the state of a relay whose bit is set in relay_known
+        self.relay_states = 0
+        self.relay_known = 0
+        self._all_relays = (1 << relay_count) - 1
         
         # Set the URL and name for this view
         self.url = f"/{self.subpath}/{{path:.*}}"
         self.name = f"2n_relay_emulator:{entry.entry_id}"
+        # Node of the subpath in the shared subpath trie, set on registration
+        self.subpath_node: Optional[SubpathNode[RelayView2N]] = None
+
+        # Set by setup_http_server when performance monitoring or tracing is enabled
+        self.monitor: Optional[RequestMonitor] = None
+        self.tracer: Optional[RequestTracer] = None
+        # Set by the profile service until the requested number of requests is profiled
+        self.profiler: Optional[RequestProfiler] = None
+        # Set by setup_http_server when the audit log is enabled
+        self.audit: Optional[AuditLog] = None
+        # Set by setup_http_server when webhook URLs are configured; the
+        # relay switches and buttons send their events through it
+        self.webhooks: Optional[WebhookForwarder] = None
+
+    def set_permissions(self, permissions: Dict[str, Dict[str, Any]]) -> None:
+        """Replace the per-user relay and button permissions."""
+        # The configured user always has access to everything
+        permissions = {
+            username: permission
+            for username, permission in permissions.items()
+            if username != self.auth.username
+        }
+        self.relay_acl, self.button_acl = compile_permissions(permissions)
+
+    def set_relay_targets(self, relay_targets: Dict[str, Dict[str, Any]]) -> None:
+        """Replace the target entities switched together with the relays."""
+        self.relay_targets = {
+            relay: calls
+            for relay, calls in compile_relay_targets(relay_targets).items()
+            if relay <= self.relay_count
+        }
+
+    def _log_forbidden(self, request: web.Request, user: str, target: str) -> None:
+        """Log a command denied by the user permissions."""
+        _LOGGER.warning(
+            "User '%s' is not allowed to use %s on subpath '/%s' (from %s)",
+            user,
+            target,
+            self.subpath,
+            request.remote,
+        )
+
+    def _forbidden(
+        self, request: web.Request, user: str, target: str, fmt: str = FORMAT_TEXT
+    ) -> web.Response:
+        """Log a denied command and return a 403 response."""
+        self._log_forbidden(request, user, target)
+        return self._error(fmt, 403, "Forbidden", API_ERROR_INSUFFICIENT_PRIVILEGES)
+
+    @staticmethod
+    def _error(
+        fmt: str, status: int, text: str, code: int, param: Optional[str] = None
+    ) -> web.Response:
+        """Return an error response as text or in the 2N JSON format."""
+        if fmt == FORMAT_JSON:
+            return api_error(status, code, param)
+        return web.Response(status=status, text=text)
 
     def _log_auth_failure(self, request: web.Request, reason: str) -> None:
-        """Log digest auth failure with instance and path context."""
+        """Log auth failure with instance and path context."""
         _LOGGER.warning(
-            "Digest auth failed (%s) for instance=%s subpath='/%s' request_path='%s' from=%s",
+            "Auth failed (%s) for instance=%s subpath='/%s' request_path='%s' from=%s",
             reason,
             self.entry.entry_id,
             self.subpath,
@@ -265,27 +556,78 @@ class RelayView2N(HomeAssistantView):
             request.remote,
         )
 
+    def _basic_auth_allowed(self, request: web.Request) -> bool:
+        """Return True if the request may authenticate with Basic auth."""
+        if self.auth_mode == AUTH_MODE_DIGEST:
+            return False
+        return not self.basic_auth_tls_only or request.secure
+
+    def _unauthorized(self, request: web.Request, reason: str) -> web.Response:
+        """Log the auth failure and return a 401 response with challenges."""
+        self._log_auth_failure(request, reason)
+        # A missing header is the first step of every digest login, not a failure
+        if self.audit is not None and reason != "missing_authorization_header":
+            self.audit.record(
+                self.entry.entry_id,
+                self.subpath,
+                AUDIT_EVENT_AUTH_FAILURE,
+                claimed_username(request.headers["Authorization"]),
+                None,
+                reason,
+                401,
+                request.remote,
+            )
+        response = web.Response(status=401, text="Unauthorized")
+        if self.auth_mode != AUTH_MODE_BASIC:
+            response.headers.add("WWW-Authenticate", self.auth.create_challenge())
+        if self._basic_auth_allowed(request):
+            response.headers.add("WWW-Authenticate", f'Basic realm="{self.auth.realm}"')
+        elif self.auth_mode == AUTH_MODE_BASIC and not self._reported_basic_without_tls:
+            # No scheme is left to offer, so no request can ever authenticate
+            self._reported_basic_without_tls = True
+            _LOGGER.error(
+                "Subpath '/%s' only allows Basic auth over TLS, but is reached over plain "
+                "HTTP; serve Home Assistant over HTTPS or choose an auth mode with digest",
+                self.subpath,
+            )
+        return response
+
+    def _authenticate(self, request: web.Request) -> Union[str, web.Response]:
+        """Authenticate the request; return the username or a 401 response."""
+        auth_header = request.headers.get("Authorization")
+
+        if not auth_header:
+            return self._unauthorized(request, "missing_authorization_header")
+
+        if auth_header.startswith("Basic "):
+            # Basic auth needs no challenge round trip, but sends the password
+            if self.auth_mode == AUTH_MODE_DIGEST:
+                return self._unauthorized(request, "basic_auth_disabled")
+            if not self._basic_auth_allowed(request):
+                return self._unauthorized(request, "basic_auth_requires_tls")
+            user = self.auth.authenticate_basic(auth_header)
+            if user is None:
+                return self._unauthorized(request, "invalid_basic_credentials")
+            return user
+
+        if self.auth_mode == AUTH_MODE_BASIC:
+            return self._unauthorized(request, "digest_auth_disabled")
+
+        # Use the exact relative URL from the request for digest auth verification
+        # This ensures the URI matches exactly what the client sent, preventing auth bypass
+        user = self.auth.authenticate_digest(auth_header, request.method, str(request.rel_url))
+        if user is None:
+            return self._unauthorized(request, "invalid_digest_response")
+
+        return user
+
     def require_auth(self, handler):
-        """Decorator to require digest authentication."""
+        """Decorator to require authentication."""
 
         async def wrapper(request: web.Request, path: str = "") -> web.Response:
-            auth_header = request.headers.get("Authorization")
-            
-            # Use the exact relative URL from the request for digest auth verification
-            # This ensures the URI matches exactly what the client sent, preventing auth bypass
-            uri = str(request.rel_url)
-            
-            if not auth_header:
-                self._log_auth_failure(request, "missing_authorization_header")
-                response = web.Response(status=401, text="Unauthorized")
-                response.headers["WWW-Authenticate"] = self.auth.create_challenge()
-                return response
-
-            if not self.auth.verify_response(auth_header, request.method, uri):
-                self._log_auth_failure(request, "invalid_digest_response")
-                response = web.Response(status=401, text="Unauthorized")
-                response.headers["WWW-Authenticate"] = self.auth.create_challenge()
-                return response
+            user = self._authenticate(request)
+            if isinstance(user, web.Response):
+                return user
 
             return await handler(request, path)
 
@@ -293,33 +635,59 @@ class RelayView2N(HomeAssistantView):
 
     async def get(self, request: web.Request, path: str = "") -> web.Response:
         """Handle GET requests."""
-        return await self._handle_request(request, path)
+        view, path = self._dispatch(path)
+        return await view._handle_request(request, path)
 
     async def post(self, request: web.Request, path: str = "") -> web.Response:
         """Handle POST requests."""
-        return await self._handle_request(request, path)
+        view, path = self._dispatch(path)
+        return await view._handle_request(request, path)
+
+    def _dispatch(self, path: str) -> Tuple["RelayView2N", str]:
+        """Return the view with the longest subpath matching the request and the path below it.
+
+        The route of "door" also matches requests for an instance on
+        "door/garage"; which route aiohttp picks depends on the registration
+        order, so requests are passed on to the instance of the longest
+        matching subpath.
+        """
+        node = self.subpath_node
+        if node is None or not node.children:
+            return self, path
+        view, rest = node.longest_prefix(path)
+        if view is None:
+            return self, path
+        return view, rest
 
     async def _handle_request(self, request: web.Request, path: str = "") -> web.Response:
+        """Handle a request, timing its phases if monitoring or tracing is enabled."""
+        if self.monitor is None and self.tracer is None and self.profiler is None:
+            return await self._route_request(request, path)
+
+        profiler = self.profiler
+        if profiler is not None and not profiler.start_request():
+            profiler = None
+        try:
+            with track_request(request.method, path, self.monitor, self.tracer) as timer:
+                response = await self._route_request(request, path)
+                timer.status = response.status
+                return response
+        finally:
+            if profiler is not None:
+                profiler.end_request()
+
+    async def _route_request(self, request: web.Request, path: str) -> web.Response:
         """Route request to appropriate handler."""
         # Apply authentication
-        auth_header = request.headers.get("Authorization")
-        # Use the exact relative URL from the request for digest auth verification
-        uri = str(request.rel_url)
-        
-        if not auth_header:
-            self._log_auth_failure(request, "missing_authorization_header")
-            response = web.Response(status=401, text="Unauthorized")
-            response.headers["WWW-Authenticate"] = self.auth.create_challenge()
-            return response
+        user = self._authenticate(request)
+        if isinstance(user, web.Response):
+            return user
 
-        if not self.auth.verify_response(auth_header, request.method, uri):
-            self._log_auth_failure(request, "invalid_digest_response")
-            response = web.Response(status=401, text="Unauthorized")
-            response.headers["WWW-Authenticate"] = self.auth.create_challenge()
-            return response
+        mark_phase(PHASE_LOOKUP)
 
         # Route to handlers based on path
         path_lower = path.lower()
+        fmt = response_format(request)
         
         # Root path
         if path == "":
@@ -327,28 +695,99 @@ class RelayView2N(HomeAssistantView):
         
         # Relay control endpoints
         if path_lower in ("api/relay/ctrl", "relay/ctrl"):
-            return await self.handle_relay_control(request)
+            response = await self.handle_relay_control(request, user, fmt)
+            if self.audit is not None:
+                self._audit_command(
+                    request,
+                    user,
+                    AUDIT_EVENT_RELAY,
+                    request.query.get("relay", "1"),
+                    request.query.get("value"),
+                    response,
+                )
+            return response
         
         # Button trigger endpoints
         if path_lower in ("api/button/trigger", "button/trigger"):
-            return await self.handle_button_trigger(request)
+            response = await self.handle_button_trigger(request, user, fmt)
+            if self.audit is not None:
+                self._audit_command(
+                    request,
+                    user,
+                    AUDIT_EVENT_BUTTON,
+                    request.query.get("button", "1"),
+                    "trigger",
+                    response,
+                )
+            return response
         
         # Relay status endpoints
         if path_lower in ("api/relay/status", "relay/status"):
-            return await self.handle_relay_status(request)
+            return await self.handle_relay_status(request, fmt)
         
         # Button status endpoints
         if path_lower in ("api/button/status", "button/status"):
-            return await self.handle_button_status(request)
+            return await self.handle_button_status(request, fmt)
         
+        # Native 2N switch and io API
+        if path_lower == "api/switch/ctrl":
+            response = await self.handle_switch_control(request, user)
+            if self.audit is not None:
+                self._audit_command(
+                    request,
+                    user,
+                    AUDIT_EVENT_RELAY,
+                    request.query.get("switch"),
+                    request.query.get("action"),
+                    response,
+                )
+            return response
+
+        if path_lower == "api/switch/status":
+            return await self.handle_switch_status(request)
+
+        if path_lower == "api/io/status":
+            return await self.handle_io_status(request)
+
         # System info
         if path_lower == "api/system/info":
-            return await self.handle_system_info(request)
+            return await self.handle_system_info(request, fmt)
+        
+        # Endpoint URLs for copy/paste and provisioning
+        if path_lower == "api/get_urls":
+            return await self.handle_get_urls(request)
         
         # Unknown path
         return web.Response(status=404, text="Not Found")
 
-    async def handle_relay_control(self, request: web.Request) -> web.Response:
+    def _audit_command(
+        self,
+        request: web.Request,
+        user: str,
+        event: str,
+        number: Optional[str],
+        action: Optional[str],
+        response: web.Response,
+    ) -> None:
+        """Queue an audit event of a relay or button command, also if it was refused."""
+        try:
+            parsed: Optional[int] = int(number) if number is not None else None
+        except ValueError:
+            parsed = None
+        self.audit.record(
+            self.entry.entry_id,
+            self.subpath,
+            event,
+            user,
+            parsed,
+            action,
+            response.status,
+            request.remote,
+        )
+
+    async def handle_relay_control(
+        self, request: web.Request, user: Optional[str] = None, fmt: str = FORMAT_TEXT
+    ) -> web.Response:
         """
         Handle relay control requests.
         
@@ -357,45 +796,36 @@ class RelayView2N(HomeAssistantView):
         - /{subpath}/api/relay/ctrl?relay=X&value=off
         - /{subpath}/relay/ctrl?relay=X&value=on
         - /{subpath}/relay/ctrl?relay=X&value=off
+
+        Returns 403 if the authenticated user may not use the relay.
         """
         try:
             relay = int(request.query.get("relay", 1))
             value = request.query.get("value", "").lower()
 
             if relay < 1 or relay > self.relay_count:
-                return web.Response(
-                    status=400,
-                    text=f"Invalid relay number. Must be between 1 and {self.relay_count}",
+                return self._error(
+                    fmt,
+                    400,
+                    f"Invalid relay number. Must be between 1 and {self.relay_count}",
+                    API_ERROR_INVALID_PARAMETER,
+                    "relay",
                 )
 
             if value not in ["on", "off"]:
-                return web.Response(
-                    status=400, text="Invalid value. Must be 'on' or 'off'"
+                return self._error(
+                    fmt,
+                    400,
+                    "Invalid value. Must be 'on' or 'off'",
+                    API_ERROR_INVALID_PARAMETER,
+                    "value",
                 )
 
-            # Get the entity registry
-            entity_reg = er.async_get(self.hass)
-            
-            # Find the corresponding switch entity
-            entity_id = f"switch.2n_relay_{self.entry.entry_id[:8]}_relay_{relay}"
-            
-            # Try to find the entity by unique_id
-            unique_id = f"{self.entry.entry_id}_relay_{relay}"
-            entity_entry = entity_reg.async_get_entity_id("switch", DOMAIN, unique_id)
-            
-            if entity_entry:
-                entity_id = entity_entry
+            if not self.relay_acl.get(user, -1) & (1 << (relay - 1)):
+                return self._forbidden(request, user, f"relay {relay}", fmt)
 
-            # Call the appropriate service
-            service = "turn_on" if value == "on" else "turn_off"
-            
             try:
-                await self.hass.services.async_call(
-                    "switch",
-                    service,
-                    {"entity_id": entity_id},
-                    blocking=True,
-                )
+                await self._async_switch_relay(relay, value == "on")
                 
                 _LOGGER.info(
                     "Relay %d %s via HTTP request from %s",
@@ -404,6 +834,8 @@ class RelayView2N(HomeAssistantView):
                     request.remote,
                 )
                 
+                if fmt == FORMAT_JSON:
+                    return json_body_response(self.json_templates.relay_control(relay, value))
                 return web.Response(
                     status=200,
                     text=f"OK\nRelay {relay} is now {value}",
@@ -411,73 +843,365 @@ class RelayView2N(HomeAssistantView):
                 )
             except Exception as err:
                 _LOGGER.error("Failed to control relay %d: %s", relay, err)
-                return web.Response(status=500, text=f"Error: {err}")
+                return self._error(fmt, 500, f"Error: {err}", API_ERROR_PROCESSING)
 
         except ValueError:
-            return web.Response(status=400, text="Invalid relay parameter")
+            return self._error(
+                fmt, 400, "Invalid relay parameter", API_ERROR_INVALID_PARAMETER, "relay"
+            )
+
+    def _relay_entity_id(self, relay: int) -> str:
+        """Return the entity ID of the switch of a relay."""
+        unique_id = f"{self.entry.entry_id}_relay_{relay}"
+        entity_id = er.async_get(self.hass).async_get_entity_id("switch", DOMAIN, unique_id)
+        return entity_id or f"switch.2n_relay_{self.entry.entry_id[:8]}_relay_{relay}"
+
+    def set_relay_state(self, relay: int, is_on: bool) -> None:
+        """Mirror the state of a relay switch."""
+        bit = 1 << (relay - 1)
+        self.relay_known |= bit
+        if is_on:
+            self.relay_states |= bit
+        else:
+            self.relay_states &= ~bit
+
+    def clear_relay_state(self, relay: int) -> None:
+        """Forget the mirrored state of a removed relay switch."""
+        bit = 1 << (relay - 1)
+        self.relay_known &= ~bit
+        self.relay_states &= ~bit
+
+    def _relay_is_on(self, relay: int) -> bool:
+        """Return True if the switch of a relay is on; unknown relays are off."""
+        return self._relay_status(relay) == 1
+
+    def relay_bitmask(self) -> int:
+        """Return the states of all relays as a bitmask, bit 0 being relay 1."""
+        if self.relay_known == self._all_relays:
+            return self.relay_states
+        mask = self.relay_states
+        for relay in range(1, self.relay_count + 1):
+            if not self.relay_known & (1 << (relay - 1)) and self._relay_is_on(relay):
+                mask |= 1 << (relay - 1)
+        return mask
+
+    async def _async_switch_relay(
+        self, relay: int, turn_on: bool, context: Optional[Context] = None
+    ) -> None:
+        """Switch a relay and its target entities; ends a pending pulse of the relay."""
+        self._next_generation(relay)
+        await self._async_call_relay(relay, turn_on, context or request_context())
+
+    def _next_generation(self, relay: int) -> int:
+        """Start a new command of a relay, cancelling its pending pulse end."""
+        self._cancel_pulse(relay)
+        generation = self._generations.get(relay, 0) + 1
+        self._generations[relay] = generation
+        return generation
+
+    async def _async_call_relay(self, relay: int, turn_on: bool, context: Context) -> None:
+        """Call the services switching a relay and its target entities."""
+        switch_call = self.hass.services.async_call(
+            "switch",
+            "turn_on" if turn_on else "turn_off",
+            {"entity_id": self._relay_entity_id(relay)},
+            blocking=True,
+            context=context,
+        )
+        targets = self.relay_targets.get(relay)
+        mark_phase(PHASE_SERVICE_CALL)
+        if targets is None:
+            await switch_call
+            mark_phase(PHASE_RESPONSE)
+            return
+
+        # The switch mirrors the state while the targets are switched concurrently
+        calls = [
+            (f"{domain}.{service}", self.hass.services.async_call(
+                domain, service, {"entity_id": entity_ids}, blocking=True, context=context
+            ))
+            for domain, service, entity_ids in targets[turn_on]
+        ]
+        results = await asyncio.gather(
+            switch_call, *(call for _, call in calls), return_exceptions=True
+        )
+        mark_phase(PHASE_RESPONSE)
+        errors = [result for result in results if isinstance(result, Exception)]
+        for (service, _), result in zip(calls, results[1:]):
+            if isinstance(result, Exception):
+                _LOGGER.error("Failed to call %s for relay %d: %s", service, relay, result)
+        if errors:
+            raise errors[0]
+
+    async def _async_pulse_relay(self, relay: int) -> None:
+        """Switch a relay on and schedule switching it off after the pulse duration."""
+        generation = self._next_generation(relay)
+        parent = request_context()
+        await self._async_call_relay(relay, True, parent)
+        if self._generations.get(relay) != generation:
+            # A newer command switched the relay meanwhile and owns its state
+            return
+
+        @callback
+        def _async_end_pulse(_now) -> None:
+            self._pulses.pop(relay, None)
+            self.hass.async_create_task(self._async_end_pulse(relay, generation, parent))
+
+        self._pulses[relay] = async_call_later(self.hass, self.pulse_duration, _async_end_pulse)
+
+    async def _async_end_pulse(self, relay: int, generation: int, parent: Context) -> None:
+        """Switch a pulsed relay off unless a newer command switched it since."""
+        if self._generations.get(relay) != generation:
+            return
+        try:
+            await self._async_call_relay(relay, False, Context(parent_id=parent.id))
+        except Exception as err:
+            _LOGGER.error("Failed to end pulse of relay %d: %s", relay, err)
+
+    def _cancel_pulse(self, relay: int) -> None:
+        """Cancel the pending end of a relay pulse, if any."""
+        cancel = self._pulses.pop(relay, None)
+        if cancel is not None:
+            cancel()
+
+    def cancel_pulses(self) -> None:
+        """Cancel all pending pulse ends; the relays keep their state."""
+        for cancel in self._pulses.values():
+            cancel()
+        self._pulses.clear()
+
+    def _switch_numbers(self, request: web.Request) -> Union[range, web.Response]:
+        """Return the relays selected by the optional switch parameter."""
+        switch = request.query.get("switch")
+        if switch is None:
+            return range(1, self.relay_count + 1)
+        try:
+            number = int(switch)
+        except ValueError:
+            number = 0
+        if number < 1 or number > self.relay_count:
+            return api_error(400, API_ERROR_INVALID_PARAMETER, "switch")
+        return range(number, number + 1)
+
+    async def handle_switch_control(
+        self, request: web.Request, user: Optional[str] = None
+    ) -> web.Response:
+        """
+        Handle 2N switch control requests.
+
+        Native 2N endpoint:
+        - /{subpath}/api/switch/ctrl?switch=X&action=on
+        - /{subpath}/api/switch/ctrl?switch=X&action=off
+        - /{subpath}/api/switch/ctrl?switch=X&action=trigger
+
+        trigger switches the relay on for the pulse duration. Responses use
+        the 2N JSON format.
+        """
+        if "switch" not in request.query:
+            return api_error(400, API_ERROR_MISSING_PARAMETER, "switch")
+        switches = self._switch_numbers(request)
+        if isinstance(switches, web.Response):
+            return switches
+        relay = switches[0]
+
+        action = request.query.get("action")
+        if action is None:
+            return api_error(400, API_ERROR_MISSING_PARAMETER, "action")
+        action = action.lower()
+        if action not in ("on", "off", "trigger"):
+            return api_error(400, API_ERROR_INVALID_PARAMETER, "action")
+
+        if not self.relay_acl.get(user, -1) & (1 << (relay - 1)):
+            return self._forbidden(request, user, f"relay {relay}", FORMAT_JSON)
+
+        try:
+            if action == "trigger":
+                await self._async_pulse_relay(relay)
+            else:
+                await self._async_switch_relay(relay, action == "on")
+        except Exception as err:
+            _LOGGER.error("Failed to control switch %d: %s", relay, err)
+            return api_error(500, API_ERROR_PROCESSING)
 
-    async def handle_relay_status(self, request: web.Request) -> web.Response:
+        _LOGGER.info("Switch %d %s via HTTP request from %s", relay, action, request.remote)
+        return json_body_response(JSON_SUCCESS)
+
+    async def handle_switch_status(self, request: web.Request) -> web.Response:
+        """
+        Handle 2N switch status requests.
+
+        Native 2N endpoints:
+        - /{subpath}/api/switch/status
+        - /{subpath}/api/switch/status?switch=X
+        """
+        switches = self._switch_numbers(request)
+        if isinstance(switches, web.Response):
+            return switches
+
+        fragments = self.json_templates.switches
+        body = result_list(
+            b"switches", [fragments[relay - 1][self._relay_is_on(relay)] for relay in switches]
+        )
+        mark_phase(PHASE_RESPONSE)
+        return json_body_response(body)
+
+    async def handle_io_status(self, request: web.Request) -> web.Response:
+        """
+        Handle 2N io status requests.
+
+        Native 2N endpoint: /{subpath}/api/io/status
+
+        Relays are reported as outputs relayX, buttons as inputs inputX.
+        """
+        ports = [
+            fragments[self._relay_is_on(relay)]
+            for relay, fragments in enumerate(self.json_templates.relay_ports, start=1)
+        ]
+        ports.extend(self.json_templates.input_ports)
+        mark_phase(PHASE_RESPONSE)
+        return json_body_response(result_list(b"ports", ports))
+
+    def _relay_status(self, relay: int) -> Optional[int]:
+        """Return 0 (off), 1 (on) or 2 (unknown) for a relay, None if it has no state."""
+        bit = 1 << (relay - 1)
+        if self.relay_known & bit:
+            return 1 if self.relay_states & bit else 0
+
+        # Not mirrored (yet), e.g. a disabled entity: look the switch up in
+        # the registry and state machine
+        unique_id = f"{self.entry.entry_id}_relay_{relay}"
+        entity_id = er.async_get(self.hass).async_get_entity_id("switch", DOMAIN, unique_id)
+        if not entity_id:
+            return 2
+        state = self.hass.states.get(entity_id)
+        if state is None:
+            return None
+        return 1 if state.state == "on" else 0
+
+    def _parse_relays(self, value: str) -> List[int]:
+        """Return the relay numbers of a comma separated relay parameter."""
+        relays = [int(relay) for relay in value.split(",")]
+        for relay in relays:
+            if relay < 1 or relay > self.relay_count:
+                raise ValueError(relay)
+        return list(dict.fromkeys(relays))
+
+    async def handle_relay_status(
+        self, request: web.Request, fmt: str = FORMAT_TEXT
+    ) -> web.Response:
         """
         Handle relay status requests.
         
         2N compatible endpoints:
         - /{subpath}/api/relay/status
+        - /{subpath}/api/relay/status?relay=X
+        - /{subpath}/api/relay/status?relay=X,Y
         - /{subpath}/relay/status
+
+        ?format=bitmask returns the states as one integer, bit 0 being
+        relay 1. Relays not selected by the relay parameter are 0.
         """
+        relay_param = request.query.get("relay")
+        relays: Union[range, List[int]] = range(1, self.relay_count + 1)
+        if relay_param is not None:
+            try:
+                relays = self._parse_relays(relay_param)
+            except ValueError:
+                return self._error(
+                    fmt,
+                    400,
+                    f"Invalid relay number. Must be between 1 and {self.relay_count}",
+                    API_ERROR_INVALID_PARAMETER,
+                    "relay",
+                )
+
         try:
-            # Get the entity registry
-            entity_reg = er.async_get(self.hass)
-            
-            status_lines = []
-            for relay_num in range(1, self.relay_count + 1):
-                unique_id = f"{self.entry.entry_id}_relay_{relay_num}"
-                entity_id = entity_reg.async_get_entity_id("switch", DOMAIN, unique_id)
-                
-                if entity_id:
-                    state = self.hass.states.get(entity_id)
-                    if state:
-                        status = "on" if state.state == "on" else "off"
-                        status_lines.append(f"relay{relay_num}={status}")
+            if fmt == FORMAT_BITMASK:
+                if relay_param is None:
+                    mask = self.relay_bitmask()
                 else:
-                    status_lines.append(f"relay{relay_num}=unknown")
-
-            response_text = "\n".join(status_lines)
+                    mask = 0
+                    for relay_num in relays:
+                        if self._relay_is_on(relay_num):
+                            mask |= 1 << (relay_num - 1)
+                mark_phase(PHASE_RESPONSE)
+                return web.Response(status=200, text=str(mask), content_type="text/plain")
+
+            # 0 = off, 1 = on, 2 = unknown; relays without state are skipped
+            states = []
+            for relay_num in relays:
+                status = self._relay_status(relay_num)
+                if status is not None:
+                    states.append((relay_num, status))
+
+            mark_phase(PHASE_RESPONSE)
+            if fmt == FORMAT_JSON:
+                fragments = self.json_templates.relay_states
+                return json_body_response(
+                    result_list(
+                        b"relays", [fragments[relay_num - 1][status] for relay_num, status in states]
+                    )
+                )
+            response_text = "\n".join(
+                f"relay{relay_num}={_RELAY_STATUS_TEXT[status]}" for relay_num, status in states
+            )
             return web.Response(status=200, text=response_text, content_type="text/plain")
 
         except Exception as err:
             _LOGGER.error("Failed to get relay status: %s", err)
-            return web.Response(status=500, text=f"Error: {err}")
+            return self._error(fmt, 500, f"Error: {err}", API_ERROR_PROCESSING)
 
-    async def handle_button_trigger(self, request: web.Request) -> web.Response:
+    async def handle_button_trigger(
+        self, request: web.Request, user: Optional[str] = None, fmt: str = FORMAT_TEXT
+    ) -> web.Response:
         """
         Handle button trigger requests.
         
         2N compatible endpoints:
         - /{subpath}/api/button/trigger?button=X
         - /{subpath}/button/trigger?button=X
+
+        Returns 403 if the authenticated user may not use the button.
         """
         try:
             button = int(request.query.get("button", 1))
 
             if button < 1 or button > self.button_count:
-                return web.Response(
-                    status=400,
-                    text=f"Invalid button number. Must be between 1 and {self.button_count}",
+                return self._error(
+                    fmt,
+                    400,
+                    f"Invalid button number. Must be between 1 and {self.button_count}",
+                    API_ERROR_INVALID_PARAMETER,
+                    "button",
                 )
 
+            if not self.button_acl.get(user, -1) & (1 << (button - 1)):
+                return self._forbidden(request, user, f"button {button}", fmt)
+
+            # Get the entity registry
+            entity_reg = er.async_get(self.hass)
+
             # Find the corresponding button entity
+            entity_id = f"button.2n_relay_{self.entry.entry_id[:8]}_button_{button}"
+
+            # Try to find the entity by unique_id
             unique_id = f"{self.entry.entry_id}_button_{button}"
-            
+            entity_entry = entity_reg.async_get_entity_id("button", DOMAIN, unique_id)
+
+            if entity_entry:
+                entity_id = entity_entry
+
             # Trigger the button by calling button.press service
-            entity_id = f"button.2n_relay_{self.entry.entry_id[:8]}_button_{button}"
-            
             try:
+                mark_phase(PHASE_SERVICE_CALL)
                 await self.hass.services.async_call(
                     "button",
                     "press",
                     {"entity_id": entity_id},
                     blocking=True,
+                    context=request_context(),
                 )
+                mark_phase(PHASE_RESPONSE)
                 
                 _LOGGER.info(
                     "Button %d triggered via HTTP request from %s",
@@ -485,6 +1209,8 @@ class RelayView2N(HomeAssistantView):
                     request.remote,
                 )
                 
+                if fmt == FORMAT_JSON:
+                    return json_body_response(self.json_templates.button_trigger(button))
                 return web.Response(
                     status=200,
                     text=f"OK\nButton {button} triggered",
@@ -492,12 +1218,16 @@ class RelayView2N(HomeAssistantView):
                 )
             except Exception as err:
                 _LOGGER.error("Failed to trigger button %d: %s", button, err)
-                return web.Response(status=500, text=f"Error: {err}")
+                return self._error(fmt, 500, f"Error: {err}", API_ERROR_PROCESSING)
 
         except ValueError:
-            return web.Response(status=400, text="Invalid button parameter")
+            return self._error(
+                fmt, 400, "Invalid button parameter", API_ERROR_INVALID_PARAMETER, "button"
+            )
 
-    async def handle_button_status(self, request: web.Request) -> web.Response:
+    async def handle_button_status(
+        self, request: web.Request, fmt: str = FORMAT_TEXT
+    ) -> web.Response:
         """
         Handle button status requests.
         
@@ -507,6 +1237,9 @@ class RelayView2N(HomeAssistantView):
         
         Returns list of available buttons.
         """
+        if fmt == FORMAT_JSON:
+            return json_body_response(self.json_templates.button_status)
+
         try:
             status_lines = []
             for button_num in range(1, self.button_count + 1):
@@ -519,22 +1252,62 @@ class RelayView2N(HomeAssistantView):
             _LOGGER.error("Failed to get button status: %s", err)
             return web.Response(status=500, text=f"Error: {err}")
 
-    async def handle_system_info(self, request: web.Request) -> web.Response:
-        """
-        Handle system info requests (2N compatible).
-        
-        Endpoint: /{subpath}/api/system/info
-        """
-        info = {
+    def _system_info(self) -> Dict[str, Any]:
+        """Return the system information of this instance."""
+        return {
             "model": "IP Relay Emulator for 2N",
             "version": VERSION,
             "relays": self.relay_count,
             "buttons": self.button_count,
         }
+
+    async def handle_system_info(
+        self, request: web.Request, fmt: str = FORMAT_TEXT
+    ) -> web.Response:
+        """
+        Handle system info requests (2N compatible).
         
+        Endpoint: /{subpath}/api/system/info
+        """
+        if fmt == FORMAT_JSON:
+            return json_body_response(self.json_templates.system_info)
+
+        info = self._system_info()
         response_text = "\n".join([f"{k}={v}" for k, v in info.items()])
         return web.Response(status=200, text=response_text, content_type="text/plain")
 
+    async def handle_get_urls(self, request: web.Request) -> web.Response:
+        """
+        Handle endpoint URL requests.
+        
+        Endpoints:
+        - /{subpath}/api/get_urls
+        - /{subpath}/api/get_urls?relay=X
+        - /{subpath}/api/get_urls?button=X
+        """
+        try:
+            relay = request.query.get("relay")
+            button = request.query.get("button")
+            relay = int(relay) if relay is not None else None
+            button = int(button) if button is not None else None
+        except ValueError:
+            return web.Response(status=400, text="Invalid relay or button parameter")
+
+        try:
+            urls = get_endpoint_urls(self.hass, self.entry)
+            response_text = urls.as_text(relay=relay, button=button)
+        except ValueError as err:
+            return web.Response(status=400, text=str(err))
+        except Exception as err:
+            _LOGGER.error("Failed to get endpoint URLs: %s", err)
+            return web.Response(status=500, text=f"Error: {err}")
+
+        return web.Response(
+            status=200,
+            text=response_text or "No relays or buttons configured",
+            content_type="text/plain",
+        )
+
     async def handle_root(self, request: web.Request) -> web.Response:
         """Handle root endpoint."""
         return web.Response(
@@ -560,26 +1333,97 @@ async def setup_http_server(hass: HomeAssistant, entry: ConfigEntry):
     # If this entry already has a view, replace it to ensure route changes are
     # applied immediately when the config entry reloads.
     existing_view = hass.data[DOMAIN][HTTP_SERVER_KEY].get(entry.entry_id)
+    subpaths: SubpathTrie[RelayView2N] = hass.data[DOMAIN].setdefault(
+        SUBPATH_INDEX_KEY, SubpathTrie()
+    )
     if existing_view:
+        subpaths.remove(existing_view.subpath, existing_view)
+        existing_view.cancel_pulses()
+        if existing_view.profiler:
+            existing_view.profiler.stop()
+        if existing_view.monitor:
+            existing_view.monitor.stop()
+        if existing_view.webhooks:
+            await existing_view.webhooks.async_stop()
         if _unregister_view_from_router(hass, existing_view):
             _LOGGER.debug("Removed existing route for %s before re-register", entry.entry_id)
         else:
             _LOGGER.debug("No existing route found to remove for %s", entry.entry_id)
 
-    view = RelayView2N(hass, entry, subpath, username, password, relay_count, button_count)
+    auth_mode = entry.options.get(CONF_AUTH_MODE, DEFAULT_AUTH_MODE)
+    basic_auth_tls_only = entry.options.get(CONF_BASIC_AUTH_TLS_ONLY, DEFAULT_BASIC_AUTH_TLS_ONLY)
+
+    view = RelayView2N(
+        hass,
+        entry,
+        subpath,
+        username,
+        password,
+        relay_count,
+        button_count,
+        auth_mode=auth_mode,
+        basic_auth_tls_only=basic_auth_tls_only,
+        users=entry.options.get(CONF_USERS),
+        permissions=entry.options.get(CONF_PERMISSIONS),
+        pulse_duration=float(entry.options.get(CONF_PULSE_DURATION, DEFAULT_PULSE_DURATION)),
+        relay_targets=entry.options.get(CONF_RELAY_TARGETS),
+    )
+    if entry.options.get(CONF_PERFORMANCE_MONITOR, DEFAULT_PERFORMANCE_MONITOR):
+        threshold = float(
+            entry.options.get(CONF_SLOW_REQUEST_THRESHOLD, DEFAULT_SLOW_REQUEST_THRESHOLD)
+        )
+        # Sampling starts once Home Assistant has started (see async_setup_entry)
+        view.monitor = RequestMonitor(hass.loop, threshold)
+        _LOGGER.info(
+            "Performance monitoring enabled for '/%s' (slow request threshold %.0f ms)",
+            subpath,
+            threshold,
+        )
+    if entry.options.get(CONF_REQUEST_TRACING, DEFAULT_REQUEST_TRACING):
+        view.tracer = RequestTracer()
+        _LOGGER.info("Request tracing enabled for '/%s'", subpath)
+    audit: Optional[AuditLog] = hass.data[DOMAIN].get(AUDIT_KEY)
+    if audit is not None:
+        if entry.options.get(CONF_AUDIT_LOG, DEFAULT_AUDIT_LOG):
+            view.audit = audit
+            audit.retention[entry.entry_id] = float(
+                entry.options.get(CONF_AUDIT_RETENTION_DAYS, DEFAULT_AUDIT_RETENTION_DAYS)
+            )
+            _LOGGER.info("Audit log enabled for '/%s'", subpath)
+        else:
+            audit.retention.pop(entry.entry_id, None)
+    webhook_urls = entry.options.get(CONF_WEBHOOK_URLS, [])
+    if webhook_urls:
+        view.webhooks = WebhookForwarder(hass, entry.entry_id, subpath, webhook_urls)
+        _LOGGER.info("Forwarding events of '/%s' to %d webhooks", subpath, len(webhook_urls))
     hass.http.register_view(view)
+    view.subpath_node = subpaths.add(subpath, view)
 
     # Store view instance for cleanup
     hass.data[DOMAIN][HTTP_SERVER_KEY][entry.entry_id] = view
 
     _LOGGER.info(
-        "2N Relay Emulator registered on subpath '/%s' with %d relays and %d buttons",
+        "2N Relay Emulator registered on subpath '/%s' with %d relays and %d buttons (%s auth)",
         subpath,
         relay_count,
         button_count,
+        auth_mode,
     )
 
 
+async def async_update_options(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Apply users, permissions and relay targets to the running view without reload."""
+    view = hass.data.get(DOMAIN, {}).get(HTTP_SERVER_KEY, {}).get(entry.entry_id)
+    if view is None:
+        return
+    users = entry.options.get(CONF_USERS, {})
+    view.set_permissions(entry.options.get(CONF_PERMISSIONS, {}))
+    view.set_relay_targets(entry.options.get(CONF_RELAY_TARGETS, {}))
+    if view.auth.users != {**users, view.auth.username: view.auth.ha1}:
+        view.auth.set_users(users)
+        _LOGGER.info("Updated users of '/%s' (%d users)", view.subpath, len(view.auth.users))
+
+
 async def cleanup_http_server(hass: HomeAssistant, entry: ConfigEntry):
     """Clean up the HTTP server.
     
@@ -596,6 +1440,17 @@ async def cleanup_http_server(hass: HomeAssistant, entry: ConfigEntry):
             view = None
 
         if view:
+            subpaths = domain_data.get(SUBPATH_INDEX_KEY)
+            if subpaths is not None:
+                subpaths.remove(view.subpath, view)
+            view.subpath_node = None
+            view.cancel_pulses()
+            if view.profiler:
+                view.profiler.stop()
+            if view.monitor:
+                view.monitor.stop()
+            if view.webhooks:
+                await view.webhooks.async_stop()
             removed = _unregister_view_from_router(hass, view)
             if removed:
                 _LOGGER.info("2N Relay Emulator route '/%s' removed", view.subpath)
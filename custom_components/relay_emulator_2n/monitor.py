@@ -0,0 +1,309 @@
+"""Opt-in performance monitoring and request tracing for 2N Relay Emulator.
+
+All emulator handlers run on the Home Assistant event loop. The monitor
+samples the event loop lag continuously and times every request in phases
+(auth, lookup, service call, response). Requests slower than a threshold
+are kept with their phase breakdown, so a door latency spike can be traced
+to a busy event loop or to a slow phase of the request.
+
+The tracer keeps the phases of the most recent requests as timestamped
+spans, keyed by the Context of the service call the request made, which
+also appears on the resulting state change in the logbook.
+
+Config entry setups are always timed in phases (http, store, cleanup,
+platforms and the work deferred until Home Assistant has started).
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import deque
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Any
+
+from homeassistant.core import Context
+
+from .const import LOOP_LAG_INTERVAL, MONITOR_HISTORY_SIZE, TRACE_HISTORY_SIZE
+
+_LOGGER = logging.getLogger(__name__)
+
+PHASE_AUTH = "auth"
+PHASE_LOOKUP = "lookup"
+PHASE_SERVICE_CALL = "service_call"
+PHASE_ENTITY = "entity"
+PHASE_STATE_WRITE = "state_write"
+PHASE_RESPONSE = "response"
+
+SETUP_PHASE_HTTP = "http"
+SETUP_PHASE_STORE = "store"
+SETUP_PHASE_CLEANUP = "cleanup"
+SETUP_PHASE_PLATFORMS = "platforms"
+SETUP_PHASE_DEFERRED = "deferred"
+
+# Timer of the request handled by the current task, None if not monitored
+_current_timer: ContextVar[RequestTimer | None] = ContextVar(
+    "relay_emulator_2n_request_timer", default=None
+)
+
+
+def mark_phase(phase: str) -> None:
+    """Start the next phase of the monitored request, if any."""
+    timer = _current_timer.get()
+    if timer is not None:
+        timer.mark(phase)
+
+
+def request_context() -> Context:
+    """Return the Context for service calls made by the current request."""
+    timer = _current_timer.get()
+    if timer is None:
+        return Context()
+    return timer.context
+
+
+@contextmanager
+def track_request(
+    method: str,
+    endpoint: str,
+    *recorders: RequestMonitor | RequestTracer | None,
+) -> Iterator[RequestTimer]:
+    """Time the request handled inside the block and pass it to the recorders."""
+    timer = RequestTimer(method, endpoint)
+    token = _current_timer.set(timer)
+    try:
+        yield timer
+    finally:
+        _current_timer.reset(token)
+        end = time.perf_counter()
+        for recorder in recorders:
+            if recorder is not None:
+                recorder.record(timer, end)
+
+
+def _utcnow_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class RequestTimer:
+    """Phase timestamps of a single request."""
+
+    __slots__ = ("method", "endpoint", "context", "status", "started_at", "start", "marks")
+
+    def __init__(self, method: str, endpoint: str) -> None:
+        """Start timing a request in the auth phase."""
+        self.method = method
+        self.endpoint = endpoint
+        self.context = Context()
+        self.status: int | None = None
+        self.started_at = time.time()
+        self.start = time.perf_counter()
+        self.marks: list[tuple[str, float]] = [(PHASE_AUTH, self.start)]
+
+    def mark(self, phase: str) -> None:
+        """End the current phase and start the given one."""
+        self.marks.append((phase, time.perf_counter()))
+
+    def phases(self, end: float) -> dict[str, float]:
+        """Return the duration of every phase in milliseconds."""
+        durations: dict[str, float] = {}
+        for index, (phase, started) in enumerate(self.marks):
+            ended = self.marks[index + 1][1] if index + 1 < len(self.marks) else end
+            durations[phase] = durations.get(phase, 0.0) + (ended - started) * 1000
+        return durations
+
+    def spans(self, end: float) -> list[dict[str, Any]]:
+        """Return the phases in order with their offset from the request start."""
+        spans = []
+        for index, (phase, started) in enumerate(self.marks):
+            ended = self.marks[index + 1][1] if index + 1 < len(self.marks) else end
+            spans.append(
+                {
+                    "name": phase,
+                    "start_ms": round((started - self.start) * 1000, 3),
+                    "duration_ms": round((ended - started) * 1000, 3),
+                }
+            )
+        return spans
+
+
+class SetupTimer:
+    """Phase durations of the setup of one config entry.
+
+    The work deferred until Home Assistant has started is recorded as its
+    own phase once it ran.
+    """
+
+    def __init__(self) -> None:
+        """Start timing the setup."""
+        self.started_at = _utcnow_iso()
+        self._last = time.perf_counter()
+        self.phases: dict[str, float] = {}
+
+    def mark(self, phase: str) -> None:
+        """End the given phase, which started when the previous one ended."""
+        now = time.perf_counter()
+        self.phases[phase] = self.phases.get(phase, 0.0) + (now - self._last) * 1000
+        self._last = now
+
+    def restart(self) -> None:
+        """Start timing a phase that does not follow the previous one."""
+        self._last = time.perf_counter()
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the phase durations for diagnostics."""
+        return {
+            "started_at": self.started_at,
+            "phases": {phase: round(ms, 3) for phase, ms in self.phases.items()},
+        }
+
+
+class LoopLagMonitor:
+    """Measure how late the event loop runs a callback scheduled at a fixed interval."""
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        threshold_ms: float,
+        interval: float = LOOP_LAG_INTERVAL,
+    ) -> None:
+        """Initialize the monitor."""
+        self._loop = loop
+        self._interval = interval
+        self._threshold_ms = threshold_ms
+        self._handle: asyncio.TimerHandle | None = None
+        self._expected = 0.0
+        self.last_lag_ms = 0.0
+        self.max_lag_ms = 0.0
+        self.samples = 0
+        self.spikes: deque[dict[str, Any]] = deque(maxlen=MONITOR_HISTORY_SIZE)
+
+    def start(self) -> None:
+        """Start sampling."""
+        self._schedule(self._loop.time())
+
+    def stop(self) -> None:
+        """Stop sampling."""
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+
+    def _schedule(self, now: float) -> None:
+        self._expected = now + self._interval
+        self._handle = self._loop.call_at(self._expected, self._sample)
+
+    def _sample(self) -> None:
+        now = self._loop.time()
+        lag_ms = max(0.0, (now - self._expected) * 1000)
+        self.last_lag_ms = lag_ms
+        self.max_lag_ms = max(self.max_lag_ms, lag_ms)
+        self.samples += 1
+        if lag_ms >= self._threshold_ms:
+            self.spikes.append({"time": _utcnow_iso(), "lag_ms": round(lag_ms, 3)})
+            _LOGGER.debug("Event loop lag of %.1f ms", lag_ms)
+        self._schedule(now)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the lag statistics."""
+        return {
+            "interval_s": self._interval,
+            "samples": self.samples,
+            "last_lag_ms": round(self.last_lag_ms, 3),
+            "max_lag_ms": round(self.max_lag_ms, 3),
+            "spikes": list(self.spikes),
+        }
+
+
+class RequestMonitor:
+    """Event loop lag and slow request recorder of one emulator instance."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, threshold_ms: float) -> None:
+        """Initialize the monitor."""
+        self.threshold_ms = threshold_ms
+        self.loop_lag = LoopLagMonitor(loop, threshold_ms)
+        self.requests = 0
+        self.slow_requests: deque[dict[str, Any]] = deque(maxlen=MONITOR_HISTORY_SIZE)
+
+    def start(self) -> None:
+        """Start sampling the event loop lag."""
+        self.loop_lag.start()
+
+    def stop(self) -> None:
+        """Stop sampling the event loop lag."""
+        self.loop_lag.stop()
+
+    def record(self, timer: RequestTimer, end: float) -> None:
+        """Record the request if it exceeded the threshold."""
+        self.requests += 1
+        duration_ms = (end - timer.start) * 1000
+        if duration_ms < self.threshold_ms:
+            return
+
+        phases = timer.phases(end)
+        slowest = max(phases, key=phases.get)
+        self.slow_requests.append(
+            {
+                "time": _utcnow_iso(),
+                "context_id": timer.context.id,
+                "method": timer.method,
+                "endpoint": timer.endpoint,
+                "status": timer.status,
+                "duration_ms": round(duration_ms, 3),
+                "phase": slowest,
+                "phases": {phase: round(ms, 3) for phase, ms in phases.items()},
+                "loop_lag_ms": round(self.loop_lag.last_lag_ms, 3),
+            }
+        )
+        _LOGGER.warning(
+            "Slow request %s /%s took %.1f ms, mostly in %s (%.1f ms)",
+            timer.method,
+            timer.endpoint,
+            duration_ms,
+            slowest,
+            phases[slowest],
+        )
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the monitor state for diagnostics."""
+        return {
+            "threshold_ms": self.threshold_ms,
+            "requests": self.requests,
+            "loop_lag": self.loop_lag.as_dict(),
+            "slow_requests": list(self.slow_requests),
+        }
+
+
+class RequestTracer:
+    """Spans of the most recent requests of one emulator instance."""
+
+    def __init__(self, size: int = TRACE_HISTORY_SIZE) -> None:
+        """Initialize the tracer."""
+        self.traces: deque[dict[str, Any]] = deque(maxlen=size)
+
+    def record(self, timer: RequestTimer, end: float) -> None:
+        """Store the spans of a finished request."""
+        self.traces.append(
+            {
+                "context_id": timer.context.id,
+                "time": datetime.fromtimestamp(timer.started_at, timezone.utc).isoformat(),
+                "method": timer.method,
+                "endpoint": timer.endpoint,
+                "status": timer.status,
+                "duration_ms": round((end - timer.start) * 1000, 3),
+                "spans": timer.spans(end),
+            }
+        )
+
+    def get(self, context_id: str) -> dict[str, Any] | None:
+        """Return the trace of the request with the given context id."""
+        for trace in self.traces:
+            if trace["context_id"] == context_id:
+                return trace
+        return None
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the stored traces for diagnostics, most recent first."""
+        return {"size": self.traces.maxlen, "traces": list(reversed(self.traces))}
@@ -0,0 +1,102 @@
+"""On-demand profiling of emulator requests."""
+from __future__ import annotations
+
+import cProfile
+import logging
+import os
+import time
+from typing import TYPE_CHECKING
+
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN
+
+if TYPE_CHECKING:
+    from .http_server import RelayView2N
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class RequestProfiler:
+    """Profile the next requests handled by one or more views.
+
+    The profiler is enabled while at least one of the requests is being
+    handled. Other tasks running on the event loop while a request awaits
+    are included in the profile as well. If a view is unloaded before
+    enough requests were profiled, the requests profiled so far are written.
+    """
+
+    def __init__(self, hass: HomeAssistant, views: list[RelayView2N], requests: int) -> None:
+        """Initialize the profiler."""
+        self.hass = hass
+        self.requests = requests
+        # Nanoseconds keep profiles started within the same second apart
+        self.filename = hass.config.path(f"{DOMAIN}_profile_{time.time_ns()}.pstats")
+        self._views = views
+        self._profile = cProfile.Profile()
+        self._active = 0
+        self._started = 0
+        self._finished = False
+
+    def start(self) -> None:
+        """Attach the profiler to the views."""
+        for view in self._views:
+            view.profiler = self
+        _LOGGER.info(
+            "Profiling the next %d requests on %s",
+            self.requests,
+            ", ".join(f"'/{view.subpath}'" for view in self._views),
+        )
+
+    def start_request(self) -> bool:
+        """Start profiling a request; return False once enough requests were started."""
+        if self._started >= self.requests:
+            return False
+        self._started += 1
+        if self._active == 0:
+            self._profile.enable()
+        self._active += 1
+        return True
+
+    def end_request(self) -> None:
+        """Stop profiling a request and write the profile after the last one."""
+        self._active -= 1
+        if self._active or self._finished:
+            return
+        self._profile.disable()
+        if self._started >= self.requests:
+            self._finish()
+
+    def stop(self) -> None:
+        """Stop profiling early and write the requests profiled so far."""
+        if self._finished:
+            return
+        if self._active:
+            self._profile.disable()
+        if self._started:
+            _LOGGER.warning(
+                "Profiling stopped after %d of %d requests", self._started, self.requests
+            )
+        self._finish()
+
+    def _finish(self) -> None:
+        """Detach the profiler from the views and write the profile."""
+        self._finished = True
+        for view in self._views:
+            if view.profiler is self:
+                view.profiler = None
+        if not self._started:
+            _LOGGER.info("Profiling cancelled before any request was profiled")
+            return
+        self.hass.async_create_task(self._async_write())
+
+    async def _async_write(self) -> None:
+        """Write the profile in the executor."""
+        await self.hass.async_add_executor_job(self._dump)
+        _LOGGER.info("Profile of %d requests written to %s", self._started, self.filename)
+
+    def _dump(self) -> None:
+        """Write the profile to a temporary file and move it in place when complete."""
+        temporary = f"{self.filename}.tmp"
+        self._profile.dump_stats(temporary)
+        os.replace(temporary, self.filename)
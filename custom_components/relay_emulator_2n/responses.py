@@ -0,0 +1,158 @@
+"""Response formats of the 2N Relay Emulator endpoints.
+
+Text responses are the original key=value lines. JSON responses mirror the
+2N HTTP API envelope {"success": true, "result": ...}. Their bodies are
+assembled from byte fragments serialized once per view, so a request only
+joins fragments and substitutes numbers instead of running json.dumps.
+"""
+from __future__ import annotations
+
+import json
+from typing import Any
+
+from aiohttp import web
+
+from .const import (
+    API_ERROR_INSUFFICIENT_PRIVILEGES,
+    API_ERROR_INVALID_PARAMETER,
+    API_ERROR_MISSING_PARAMETER,
+    API_ERROR_PROCESSING,
+)
+
+FORMAT_TEXT = "text"
+FORMAT_JSON = "json"
+FORMAT_BITMASK = "bitmask"
+
+CONTENT_TYPE_JSON = "application/json"
+
+JSON_SUCCESS = b'{"success":true}'
+_RESULT_LIST = b'{"success":true,"result":{"%s":[%s]}}'
+_RELAY_CONTROL = {
+    "on": b'{"success":true,"result":{"relay":%d,"value":"on"}}',
+    "off": b'{"success":true,"result":{"relay":%d,"value":"off"}}',
+}
+_BUTTON_TRIGGER = b'{"success":true,"result":{"button":%d,"triggered":true}}'
+
+API_ERROR_DESCRIPTIONS = {
+    API_ERROR_INSUFFICIENT_PRIVILEGES: "insufficient user privileges",
+    API_ERROR_MISSING_PARAMETER: "missing mandatory parameter",
+    API_ERROR_INVALID_PARAMETER: "invalid parameter value",
+    API_ERROR_PROCESSING: "unspecified processing error",
+}
+
+
+def response_format(request: web.Request) -> str:
+    """Return the requested response format.
+
+    The format query parameter wins over the Accept header. Endpoints
+    without a bitmask variant answer bitmask requests in text.
+    """
+    requested = request.query.get("format")
+    if requested is not None:
+        requested = requested.lower()
+        return requested if requested in (FORMAT_JSON, FORMAT_BITMASK) else FORMAT_TEXT
+    if _prefers_json(request.headers.get("Accept", "")):
+        return FORMAT_JSON
+    return FORMAT_TEXT
+
+
+def _prefers_json(accept: str) -> bool:
+    """Return True if an Accept header prefers JSON over text.
+
+    JSON must have a higher quality than text/plain and the wildcards, so
+    clients sending "application/json, */*" keep the text default.
+    """
+    if CONTENT_TYPE_JSON not in accept:
+        return False
+    json_quality = text_quality = 0.0
+    for media_range in accept.split(","):
+        media_type, *params = media_range.split(";")
+        media_type = media_type.strip().lower()
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if media_type == CONTENT_TYPE_JSON:
+            json_quality = max(json_quality, quality)
+        elif media_type in ("text/plain", "text/*", "*/*"):
+            text_quality = max(text_quality, quality)
+    return json_quality > text_quality
+
+
+def json_body_response(body: bytes, status: int = 200) -> web.Response:
+    """Return a response with a pre-serialized JSON body."""
+    return web.Response(status=status, body=body, content_type=CONTENT_TYPE_JSON)
+
+
+def api_error(status: int, code: int, param: str | None = None) -> web.Response:
+    """Return a 2N HTTP API error response."""
+    error: dict[str, Any] = {"code": code}
+    if param is not None:
+        error["param"] = param
+    error["description"] = API_ERROR_DESCRIPTIONS[code]
+    return web.json_response({"success": False, "error": error}, status=status)
+
+
+def result_list(key: bytes, fragments: list[bytes]) -> bytes:
+    """Return a success body with a list of pre-serialized items as result."""
+    return _RESULT_LIST % (key, b",".join(fragments))
+
+
+class JsonTemplates:
+    """Pre-serialized JSON fragments of one emulator instance.
+
+    Relay fragments are indexed by relay number - 1 and hold one variant per
+    state, so building a status body is a list lookup per relay.
+    """
+
+    def __init__(self, relay_count: int, button_count: int, info: dict[str, Any]) -> None:
+        """Serialize the fragments of all relays and buttons."""
+        relays = range(1, relay_count + 1)
+        # (off, on, unknown)
+        self.relay_states = [
+            (
+                b'{"relay":%d,"state":"off"}' % relay,
+                b'{"relay":%d,"state":"on"}' % relay,
+                b'{"relay":%d,"state":"unknown"}' % relay,
+            )
+            for relay in relays
+        ]
+        # (inactive, active)
+        self.switches = [
+            (
+                b'{"switch":%d,"enabled":true,"active":false,"locked":false,"held":false}' % relay,
+                b'{"switch":%d,"enabled":true,"active":true,"locked":false,"held":false}' % relay,
+            )
+            for relay in relays
+        ]
+        self.relay_ports = [
+            (b'{"port":"relay%d","state":0}' % relay, b'{"port":"relay%d","state":1}' % relay)
+            for relay in relays
+        ]
+        self.input_ports = [
+            b'{"port":"input%d","state":0}' % button for button in range(1, button_count + 1)
+        ]
+        self.button_status = result_list(
+            b"buttons",
+            [
+                b'{"button":%d,"state":"available"}' % button
+                for button in range(1, button_count + 1)
+            ],
+        )
+        self.system_info = json.dumps(
+            {"success": True, "result": info}, separators=(",", ":")
+        ).encode()
+
+    @staticmethod
+    def relay_control(relay: int, value: str) -> bytes:
+        """Return the body of a successful relay command."""
+        return _RELAY_CONTROL[value] % relay
+
+    @staticmethod
+    def button_trigger(button: int) -> bytes:
+        """Return the body of a successful button trigger."""
+        return _BUTTON_TRIGGER % button
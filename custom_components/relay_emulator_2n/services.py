@@ -0,0 +1,119 @@
+"""Services for 2N Relay Emulator."""
+from __future__ import annotations
+
+import voluptuous as vol
+
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse, callback
+from homeassistant.exceptions import ServiceValidationError
+
+from .const import DOMAIN, CONF_SUBPATH, HTTP_SERVER_KEY, URLS_KEY
+from .export import iter_instances
+from .profiler import RequestProfiler
+
+SERVICE_GET_ENDPOINT_URL = "get_endpoint_url"
+SERVICE_EXPORT_PROVISIONING = "export_provisioning"
+SERVICE_PROFILE = "profile"
+
+ATTR_RELAY = "relay"
+ATTR_BUTTON = "button"
+ATTR_REQUESTS = "requests"
+
+DEFAULT_PROFILE_REQUESTS = 100
+
+GET_ENDPOINT_URL_SCHEMA = vol.Schema(
+    {
+        vol.Optional(CONF_SUBPATH): str,
+        vol.Optional(ATTR_RELAY): vol.All(vol.Coerce(int), vol.Range(min=1)),
+        vol.Optional(ATTR_BUTTON): vol.All(vol.Coerce(int), vol.Range(min=1)),
+    }
+)
+
+PROFILE_SCHEMA = vol.Schema(
+    {
+        vol.Optional(CONF_SUBPATH): str,
+        vol.Optional(ATTR_REQUESTS, default=DEFAULT_PROFILE_REQUESTS): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=10000)
+        ),
+    }
+)
+
+
+@callback
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the integration services."""
+
+    @callback
+    def async_get_endpoint_url(call: ServiceCall) -> ServiceResponse:
+        """Return endpoint URLs of all instances or a selected one."""
+        subpath = call.data.get(CONF_SUBPATH)
+        if subpath is not None:
+            subpath = subpath.strip("/")
+        relay = call.data.get(ATTR_RELAY)
+        button = call.data.get(ATTR_BUTTON)
+
+        instances = []
+        for urls in hass.data.get(DOMAIN, {}).get(URLS_KEY, {}).values():
+            if subpath is not None and urls.subpath != subpath:
+                continue
+            try:
+                instances.append(urls.as_dict(relay=relay, button=button))
+            except ValueError as err:
+                # Only an explicitly selected instance must have the number
+                if subpath is not None:
+                    raise ServiceValidationError(str(err)) from err
+
+        if subpath is not None and not instances:
+            raise ServiceValidationError(f"No instance configured on subpath '/{subpath}'")
+
+        return {"instances": instances}
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_GET_ENDPOINT_URL,
+        async_get_endpoint_url,
+        schema=GET_ENDPOINT_URL_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+
+    @callback
+    def async_export_provisioning(call: ServiceCall) -> ServiceResponse:
+        """Return subpath, realm, username and URLs of all instances."""
+        return {"instances": list(iter_instances(hass))}
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_EXPORT_PROVISIONING,
+        async_export_provisioning,
+        supports_response=SupportsResponse.ONLY,
+    )
+
+    @callback
+    def async_profile(call: ServiceCall) -> ServiceResponse:
+        """Profile the next requests of all instances or a selected one."""
+        subpath = call.data.get(CONF_SUBPATH)
+        if subpath is not None:
+            subpath = subpath.strip("/")
+
+        views = [
+            view
+            for view in hass.data.get(DOMAIN, {}).get(HTTP_SERVER_KEY, {}).values()
+            if subpath is None or view.subpath == subpath
+        ]
+        if not views:
+            if subpath is not None:
+                raise ServiceValidationError(f"No instance configured on subpath '/{subpath}'")
+            raise ServiceValidationError("No instance configured")
+        if any(view.profiler is not None for view in views):
+            raise ServiceValidationError("Profiling is already running")
+
+        profiler = RequestProfiler(hass, views, call.data[ATTR_REQUESTS])
+        profiler.start()
+        return {"filename": profiler.filename, "requests": profiler.requests}
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_PROFILE,
+        async_profile,
+        schema=PROFILE_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
@@ -0,0 +1,75 @@
+"""Persistent relay state storage for 2N Relay Emulator."""
+from __future__ import annotations
+
+import logging
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN, STORAGE_VERSION, STATE_SAVE_INTERVAL
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class RelayStateStore:
+    """Persist relay on/off states of one config entry.
+
+    Writes are coalesced: the first change after a flush schedules a single
+    delayed save, and further changes until then only update memory. Storage
+    I/O is therefore bounded to one write per STATE_SAVE_INTERVAL no matter
+    how often relays toggle. The data is serialized at write time, so the
+    latest state always ends up on disk.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        """Initialize the relay state store."""
+        self._store: Store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}")
+        self._states: dict[int, bool] = {}
+        self._save_pending = False
+
+    async def async_load(self) -> None:
+        """Load persisted relay states."""
+        data = await self._store.async_load() or {}
+        try:
+            self._states = {
+                int(relay_num): bool(is_on)
+                for relay_num, is_on in data.get("relays", {}).items()
+            }
+        except (AttributeError, TypeError, ValueError):
+            _LOGGER.warning("Ignoring malformed relay state storage: %s", data)
+            self._states = {}
+
+    def get(self, relay_num: int) -> bool | None:
+        """Return the persisted state of a relay, or None if unknown."""
+        return self._states.get(relay_num)
+
+    @callback
+    def async_set(self, relay_num: int, is_on: bool) -> None:
+        """Record a relay state and schedule a coalesced save."""
+        if self._states.get(relay_num) == is_on:
+            return
+        self._states[relay_num] = is_on
+
+        if not self._save_pending:
+            self._save_pending = True
+            self._store.async_delay_save(self._data_to_save, STATE_SAVE_INTERVAL)
+
+    async def async_flush(self) -> None:
+        """Write pending changes immediately."""
+        if self._save_pending:
+            await self._store.async_save(self._data_to_save())
+
+    async def async_remove(self) -> None:
+        """Remove the storage file."""
+        self._states = {}
+        self._save_pending = False
+        await self._store.async_remove()
+
+    @callback
+    def _data_to_save(self) -> dict[str, Any]:
+        """Return data to persist and clear the pending flag."""
+        self._save_pending = False
+        return {
+            "relays": {str(relay_num): is_on for relay_num, is_on in self._states.items()},
+        }
@@ -0,0 +1,127 @@
+"""Prefix trie of the subpaths of all emulator instances.
+
+Subpaths are split into their slash separated segments, so "door" is a
+prefix of "door/garage" but not of "doorbell". The config flow uses the trie
+to reject subpaths overlapping an existing one, and the views use it to
+dispatch a request to the instance with the longest matching subpath, no
+matter in which order the routes were registered.
+"""
+from __future__ import annotations
+
+from typing import Generic, TypeVar
+
+_T = TypeVar("_T")
+
+
+class SubpathNode(Generic[_T]):
+    """Node of one subpath segment."""
+
+    __slots__ = ("children", "subpath", "value")
+
+    def __init__(self) -> None:
+        """Initialize an empty node."""
+        self.children: dict[str, SubpathNode[_T]] = {}
+        # Set if a subpath ends at this node
+        self.subpath: str | None = None
+        self.value: _T | None = None
+
+    def longest_prefix(self, path: str) -> tuple[_T | None, str]:
+        """Return the value of the longest subpath below this node prefixing the path.
+
+        The path is relative to this node; the rest of the path below the
+        matching subpath is returned with the value.
+        """
+        node = self
+        found: _T | None = None
+        rest = path
+        segments = path.split("/")
+        for index, segment in enumerate(segments):
+            node = node.children.get(segment)
+            if node is None:
+                break
+            if node.subpath is not None:
+                found = node.value
+                rest = "/".join(segments[index + 1:])
+        return found, rest
+
+    def first_subpath(self) -> str | None:
+        """Return a subpath ending at this node or below it."""
+        if self.subpath is not None:
+            return self.subpath
+        for child in self.children.values():
+            subpath = child.first_subpath()
+            if subpath is not None:
+                return subpath
+        return None
+
+
+class SubpathTrie(Generic[_T]):
+    """Map subpaths to values with overlap detection and longest-prefix lookup."""
+
+    def __init__(self) -> None:
+        """Initialize an empty trie."""
+        self.root: SubpathNode[_T] = SubpathNode()
+
+    def add(self, subpath: str, value: _T) -> SubpathNode[_T]:
+        """Add or replace the value of a subpath and return its node."""
+        node = self.root
+        for segment in subpath.split("/"):
+            child = node.children.get(segment)
+            if child is None:
+                child = node.children[segment] = SubpathNode()
+            node = child
+        node.subpath = subpath
+        node.value = value
+        return node
+
+    def remove(self, subpath: str, value: _T | None = None) -> bool:
+        """Remove a subpath, only if it holds the given value when one is given.
+
+        Nodes left without a subpath or children are pruned.
+        """
+        path = [self.root]
+        for segment in subpath.split("/"):
+            node = path[-1].children.get(segment)
+            if node is None:
+                return False
+            path.append(node)
+
+        node = path[-1]
+        if node.subpath is None or (value is not None and node.value is not value):
+            return False
+        node.subpath = None
+        node.value = None
+
+        segments = subpath.split("/")
+        for index in range(len(segments), 0, -1):
+            node = path[index]
+            if node.subpath is not None or node.children:
+                break
+            del path[index - 1].children[segments[index - 1]]
+        return True
+
+    def get(self, subpath: str) -> _T | None:
+        """Return the value of a subpath."""
+        node = self.root
+        for segment in subpath.split("/"):
+            node = node.children.get(segment)
+            if node is None:
+                return None
+        return node.value
+
+    def conflict(self, subpath: str) -> str | None:
+        """Return an existing subpath equal to, containing or contained in the subpath."""
+        node = self.root
+        for segment in subpath.split("/"):
+            node = node.children.get(segment)
+            if node is None:
+                return None
+            if node.subpath is not None:
+                # Equal to or a prefix of the subpath
+                return node.subpath
+        # The subpath is a prefix of an existing one
+        return node.first_subpath()
+
+    def longest_prefix(self, path: str) -> tuple[_T | None, str]:
+        """Return the value of the longest subpath prefixing the path and the rest of the path."""
+        return self.root.longest_prefix(path)
@@ -2,16 +2,26 @@
 from __future__ import annotations
 
 import logging
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
 from homeassistant.components.switch import SwitchEntity
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import STATE_ON
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.entity import DeviceInfo
-from homeassistant.helpers.network import get_url
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers.restore_state import RestoreEntity
 
-from .const import DOMAIN, VERSION, CONF_RELAY_COUNT
+from .const import DOMAIN, CONF_RELAY_COUNT, HTTP_SERVER_KEY, STATE_STORE_KEY
+from .entity import build_device_info
+from .monitor import PHASE_ENTITY, PHASE_STATE_WRITE, mark_phase
+from .store import RelayStateStore
+from .urls import SIGNAL_URLS_UPDATED, get_endpoint_urls
+from .webhooks import WEBHOOK_EVENT_RELAY
+
+if TYPE_CHECKING:
+    from .http_server import RelayView2N
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -25,25 +35,35 @@ async def async_setup_entry(
     relay_count = int(entry.data.get(CONF_RELAY_COUNT, 0))
 
     if relay_count > 0:
-        entities = []
-        for relay_num in range(1, relay_count + 1):
-            entities.append(RelaySwitch(hass, entry, relay_num))
-
-        async_add_entities(entities)
+        device_info = build_device_info(entry)
+        async_add_entities(
+            [RelaySwitch(hass, entry, relay_num, device_info) for relay_num in range(1, relay_count + 1)]
+        )
 
 
-class RelaySwitch(SwitchEntity):
+class RelaySwitch(SwitchEntity, RestoreEntity):
     """Representation of a relay switch."""
 
     _attr_has_entity_name = True
     _attr_available = True
-
-    def __init__(self, hass: HomeAssistant, entry: ConfigEntry, relay_num: int) -> None:
+    # The URLs only change with the configuration; recording them would add
+    # them to every state row of a relay toggling many times a day
+    _unrecorded_attributes = frozenset({"relay_on_url", "relay_off_url", "relay_status_url"})
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entry: ConfigEntry,
+        relay_num: int,
+        device_info: DeviceInfo | None = None,
+    ) -> None:
         """Initialize the relay switch."""
         self.hass = hass
         self._entry = entry
         self._relay_num = relay_num
         self._attr_is_on = False
+        self._store: RelayStateStore | None = None
+        self._view: RelayView2N | None = None
         
         # Set unique ID
         self._attr_unique_id = f"{entry.entry_id}_relay_{relay_num}"
@@ -51,44 +71,17 @@ class RelaySwitch(SwitchEntity):
         # Set entity name
         self._attr_name = f"Relay {relay_num}"
         
-        # Device info
-        self._attr_device_info = DeviceInfo(
-            identifiers={(DOMAIN, entry.entry_id)},
-            name=f"IP Relay Emulator for 2N (/{entry.data['subpath']})",
-            manufacturer="Home Assistant",
-            model="IP Relay Emulator for 2N",
-            sw_version=VERSION,
-        )
+        # Device info, shared between all entities of the entry
+        self._attr_device_info = device_info or build_device_info(entry)
 
     @property
     def extra_state_attributes(self) -> dict[str, Any]:
         """Return entity-specific state attributes."""
         try:
-            # Get base URL
-            base_url = get_url(self.hass, allow_internal=False, allow_external=True) or get_url(
-                self.hass, allow_internal=True
-            )
-            
-            # If URL is None, Home Assistant might not be fully configured yet
-            if not base_url:
-                _LOGGER.debug(
-                    "Cannot generate relay URLs for relay %d: get_url() returned None. "
-                    "This typically means Home Assistant URL is not configured yet.",
-                    self._relay_num,
-                )
-                return {
-                    "relay_number": self._relay_num,
-                    "error": "Home Assistant URL not configured",
-                }
-            
-            subpath = self._entry.data.get("subpath", "2n-relay")
-            
-            return {
-                "relay_number": self._relay_num,
-                "relay_on_url": f"{base_url}/{subpath}/api/relay/ctrl?relay={self._relay_num}&value=on",
-                "relay_off_url": f"{base_url}/{subpath}/api/relay/ctrl?relay={self._relay_num}&value=off",
-                "relay_status_url": f"{base_url}/{subpath}/api/relay/status?relay={self._relay_num}",
-            }
+            urls = get_endpoint_urls(self.hass, self._entry)
+            if urls.deferred:
+                return {"relay_number": self._relay_num}
+            return urls.relay_attributes(self._relay_num)
         except Exception as err:
             _LOGGER.exception(
                 "Unexpected error generating relay URLs for relay %d",
@@ -99,15 +92,73 @@ class RelaySwitch(SwitchEntity):
                 "error": f"Error: {type(err).__name__}",
             }
 
+    async def async_added_to_hass(self) -> None:
+        """Restore the last known relay state."""
+        await super().async_added_to_hass()
+
+        # Rewrite the URL attributes when the Home Assistant URL changes
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass,
+                SIGNAL_URLS_UPDATED.format(self._entry.entry_id),
+                self.async_write_ha_state,
+            )
+        )
+
+        self._store = self.hass.data.get(DOMAIN, {}).get(STATE_STORE_KEY, {}).get(
+            self._entry.entry_id
+        )
+
+        # Prefer the coalesced store, fall back to HA's restore state cache
+        is_on = self._store.get(self._relay_num) if self._store else None
+        if is_on is None:
+            last_state = await self.async_get_last_state()
+            if last_state is not None:
+                is_on = last_state.state == STATE_ON
+
+        if is_on is not None:
+            self._attr_is_on = is_on
+            _LOGGER.debug("Relay %d restored to %s", self._relay_num, "on" if is_on else "off")
+
+        # Mirror the state in the emulator view for status requests
+        self._view = self.hass.data.get(DOMAIN, {}).get(HTTP_SERVER_KEY, {}).get(
+            self._entry.entry_id
+        )
+        if self._view is not None:
+            view = self._view
+            view.set_relay_state(self._relay_num, self._attr_is_on)
+            self.async_on_remove(lambda: view.clear_relay_state(self._relay_num))
+
+    def _async_state_changed(self) -> None:
+        """Propagate a switch of the relay.
+
+        The state is stored for restoration after restart, mirrored in the
+        view for status requests and reported to the webhooks of the instance.
+        """
+        if self._store:
+            self._store.async_set(self._relay_num, self._attr_is_on)
+        if self._view is not None:
+            self._view.set_relay_state(self._relay_num, self._attr_is_on)
+            if self._view.webhooks is not None:
+                self._view.webhooks.send(
+                    WEBHOOK_EVENT_RELAY, self._relay_num, "on" if self._attr_is_on else "off"
+                )
+
     async def async_turn_on(self, **kwargs: Any) -> None:
         """Turn the relay on."""
+        mark_phase(PHASE_ENTITY)
         self._attr_is_on = True
+        self._async_state_changed()
+        mark_phase(PHASE_STATE_WRITE)
         self.async_write_ha_state()
         _LOGGER.info("Relay %d turned on", self._relay_num)
 
     async def async_turn_off(self, **kwargs: Any) -> None:
         """Turn the relay off."""
+        mark_phase(PHASE_ENTITY)
         self._attr_is_on = False
+        self._async_state_changed()
+        mark_phase(PHASE_STATE_WRITE)
         self.async_write_ha_state()
         _LOGGER.info("Relay %d turned off", self._relay_num)
 
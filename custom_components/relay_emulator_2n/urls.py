@@ -0,0 +1,190 @@
+"""Endpoint URL generation for 2N Relay Emulator."""
+from __future__ import annotations
+
+import logging
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.network import get_url
+
+from .const import (
+    DOMAIN,
+    CONF_SUBPATH,
+    CONF_RELAY_COUNT,
+    CONF_BUTTON_COUNT,
+    DEFAULT_SUBPATH,
+    URLS_KEY,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+SIGNAL_URLS_UPDATED = f"{DOMAIN}_urls_updated_{{}}"
+
+
+class EndpointUrls:
+    """Endpoint URLs of one config entry.
+
+    The Home Assistant base URL is resolved once and the attribute dicts are
+    built once per relay/button. They are shared by the entity attributes,
+    the get_urls endpoint and the get_endpoint_url service. Everything is
+    cached until invalidate() is called, which happens when the core
+    configuration changes.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry) -> None:
+        """Initialize the URL cache."""
+        self.hass = hass
+        self.entry_id = entry.entry_id
+        self.subpath = entry.data.get(CONF_SUBPATH, DEFAULT_SUBPATH)
+        self.relay_count = int(entry.data.get(CONF_RELAY_COUNT, 0))
+        self.button_count = int(entry.data.get(CONF_BUTTON_COUNT, 0))
+        self._base_url: str | None = None
+        self._relay_attrs: dict[int, dict[str, Any]] = {}
+        self._button_attrs: dict[int, dict[str, Any]] = {}
+        self._text_blocks: dict[tuple[str, int], str] = {}
+        # While Home Assistant is starting, entities leave the URL attributes
+        # out; they are added once it has started
+        self.deferred = False
+
+    @property
+    def base_url(self) -> str | None:
+        """Return the base URL of Home Assistant, resolving it on first use.
+
+        A missing URL is not cached so it is picked up once configured.
+        """
+        if self._base_url is None:
+            self._base_url = get_url(
+                self.hass, allow_internal=False, allow_external=True
+            ) or get_url(self.hass, allow_internal=True)
+        return self._base_url
+
+    def invalidate(self) -> None:
+        """Drop the cached base URL and attribute dicts."""
+        self._base_url = None
+        self._relay_attrs.clear()
+        self._button_attrs.clear()
+        self._text_blocks.clear()
+
+    def relay_attributes(self, relay_num: int) -> dict[str, Any]:
+        """Return the URL attributes of a relay."""
+        attrs = self._relay_attrs.get(relay_num)
+        if attrs is not None:
+            return attrs
+
+        base_url = self.base_url
+        if not base_url:
+            _LOGGER.debug(
+                "Cannot generate relay URLs for relay %d: get_url() returned None. "
+                "This typically means Home Assistant URL is not configured yet.",
+                relay_num,
+            )
+            return {
+                "relay_number": relay_num,
+                "error": "Home Assistant URL not configured",
+            }
+
+        prefix = f"{base_url}/{self.subpath}/api/relay"
+        attrs = self._relay_attrs[relay_num] = {
+            "relay_number": relay_num,
+            "relay_on_url": f"{prefix}/ctrl?relay={relay_num}&value=on",
+            "relay_off_url": f"{prefix}/ctrl?relay={relay_num}&value=off",
+            "relay_status_url": f"{prefix}/status?relay={relay_num}",
+        }
+        return attrs
+
+    def button_attributes(self, button_num: int) -> dict[str, Any]:
+        """Return the URL attributes of a button."""
+        attrs = self._button_attrs.get(button_num)
+        if attrs is not None:
+            return attrs
+
+        base_url = self.base_url
+        if not base_url:
+            _LOGGER.debug(
+                "Cannot generate button URLs for button %d: get_url() returned None. "
+                "This typically means Home Assistant URL is not configured yet.",
+                button_num,
+            )
+            return {
+                "button_number": button_num,
+                "error": "Home Assistant URL not configured",
+            }
+
+        prefix = f"{base_url}/{self.subpath}/api/button"
+        attrs = self._button_attrs[button_num] = {
+            "button_number": button_num,
+            "button_trigger_url": f"{prefix}/trigger?button={button_num}",
+            "button_status_url": f"{prefix}/status?button={button_num}",
+        }
+        return attrs
+
+    def _select(
+        self, relay: int | None, button: int | None
+    ) -> tuple[range | list[int], range | list[int]]:
+        """Return the relay and button numbers matching the filters."""
+        if relay is None and button is None:
+            return range(1, self.relay_count + 1), range(1, self.button_count + 1)
+
+        if relay is not None and not 1 <= relay <= self.relay_count:
+            raise ValueError(f"Invalid relay number. Must be between 1 and {self.relay_count}")
+        if button is not None and not 1 <= button <= self.button_count:
+            raise ValueError(f"Invalid button number. Must be between 1 and {self.button_count}")
+
+        return (
+            [relay] if relay is not None else [],
+            [button] if button is not None else [],
+        )
+
+    def as_dict(self, relay: int | None = None, button: int | None = None) -> dict[str, Any]:
+        """Return the URLs of all relays and buttons, or only the selected ones.
+
+        Raises ValueError if a selected number is out of range.
+        """
+        relays, buttons = self._select(relay, button)
+        return {
+            "entry_id": self.entry_id,
+            "subpath": self.subpath,
+            "relays": [self.relay_attributes(relay_num) for relay_num in relays],
+            "buttons": [self.button_attributes(button_num) for button_num in buttons],
+        }
+
+    def as_text(self, relay: int | None = None, button: int | None = None) -> str:
+        """Return the selected URLs as key=value lines.
+
+        Raises ValueError if a selected number is out of range.
+        """
+        relays, buttons = self._select(relay, button)
+        blocks = [self._text_block("relay", relay_num) for relay_num in relays]
+        blocks.extend(self._text_block("button", button_num) for button_num in buttons)
+        return "\n".join(block for block in blocks if block)
+
+    def _text_block(self, kind: str, number: int) -> str:
+        """Return the cached key=value lines of one relay or button."""
+        block = self._text_blocks.get((kind, number))
+        if block is not None:
+            return block
+
+        if kind == "relay":
+            attrs = self.relay_attributes(number)
+        else:
+            attrs = self.button_attributes(number)
+
+        block = "\n".join(
+            f"{kind}{number}_{key.removeprefix(kind + '_')}={value}"
+            for key, value in attrs.items()
+            if key != f"{kind}_number"
+        )
+        # Errors are not cached so a URL configured later is picked up
+        if "error" not in attrs:
+            self._text_blocks[(kind, number)] = block
+        return block
+
+
+def get_endpoint_urls(hass: HomeAssistant, entry: ConfigEntry) -> EndpointUrls:
+    """Return the shared URL cache of a config entry, creating it if needed."""
+    url_maps = hass.data.setdefault(DOMAIN, {}).setdefault(URLS_KEY, {})
+    urls = url_maps.get(entry.entry_id)
+    if urls is None:
+        urls = url_maps[entry.entry_id] = EndpointUrls(hass, entry)
+    return urls
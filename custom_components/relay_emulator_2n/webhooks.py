@@ -0,0 +1,205 @@
+"""Outbound webhooks of relay and button events for 2N Relay Emulator.
+
+Every relay switch and button press of an instance is posted as JSON to the
+webhook URLs of the instance:
+
+    {"entry_id": "...", "subpath": "door", "events": [
+        {"time": 1760000000.1, "event": "relay", "number": 1, "state": "on"}
+    ]}
+
+Events are collected for WEBHOOK_BATCH_DELAY seconds and sent in batches
+through the aiohttp session Home Assistant shares between integrations, so
+bursts cost one request and connections are reused. Each URL has its own
+bounded queue: while a URL is unreachable, failed batches are retried with
+exponential backoff and the oldest events are dropped once the queue is
+full. Batches rejected with a client error are not retried. The queued
+events are sent one last time when the entry is unloaded or Home Assistant
+stops.
+
+Webhook URLs often carry tokens, so logs only name their scheme and host.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import deque
+from collections.abc import Callable
+from typing import Any
+from urllib.parse import urlsplit
+
+from aiohttp import ClientError, ClientTimeout
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.event import async_call_later
+
+from .const import (
+    WEBHOOK_BATCH_DELAY,
+    WEBHOOK_BATCH_SIZE,
+    WEBHOOK_MAX_RETRY_DELAY,
+    WEBHOOK_QUEUE_SIZE,
+    WEBHOOK_RETRY_DELAY,
+    WEBHOOK_TIMEOUT,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+WEBHOOK_EVENT_RELAY = "relay"
+WEBHOOK_EVENT_BUTTON = "button"
+
+# Client errors worth retrying: timeout and rate limiting
+_RETRY_STATUSES = (408, 429)
+
+
+def redact_url(url: str) -> str:
+    """Return the scheme and host of a URL, leaving out credentials, path and query."""
+    parts = urlsplit(url)
+    host = parts.hostname or ""
+    if parts.port is not None:
+        host = f"{host}:{parts.port}"
+    return f"{parts.scheme}://{host}"
+
+
+class WebhookSender:
+    """Queue and deliver the events of one instance to one URL."""
+
+    def __init__(self, hass: HomeAssistant, url: str, source: dict[str, str]) -> None:
+        """Initialize the sender."""
+        self.hass = hass
+        self.url = url
+        # Logged instead of the URL
+        self.name = redact_url(url)
+        self._source = source
+        self._queue: deque[dict[str, Any]] = deque()
+        self._cancel_send: Callable[[], None] | None = None
+        self._task: asyncio.Task | None = None
+        # Consecutive failed attempts of the batch at the head of the queue
+        self._failures = 0
+        self.sent = 0
+        self.rejected = 0
+        self.dropped = 0
+
+    @property
+    def queued(self) -> int:
+        """Return the number of events waiting to be sent."""
+        return len(self._queue)
+
+    @callback
+    def send(self, event: dict[str, Any]) -> None:
+        """Queue an event, dropping the oldest one if the queue is full."""
+        if len(self._queue) >= WEBHOOK_QUEUE_SIZE:
+            self._queue.popleft()
+            self.dropped += 1
+        self._queue.append(event)
+        if self._task is None and self._cancel_send is None:
+            self._schedule(WEBHOOK_BATCH_DELAY)
+
+    def _schedule(self, delay: float) -> None:
+        @callback
+        def _async_send_later(_now: Any) -> None:
+            self._cancel_send = None
+            self._task = self.hass.async_create_task(self._async_send_batch())
+
+        self._cancel_send = async_call_later(self.hass, delay, _async_send_later)
+
+    async def _async_send_batch(self) -> None:
+        """Send the batch at the head of the queue and schedule the next one."""
+        batch = [self._queue.popleft() for _ in range(min(len(self._queue), WEBHOOK_BATCH_SIZE))]
+        try:
+            delivered = await self._async_post(batch)
+        finally:
+            self._task = None
+
+        if delivered:
+            self._failures = 0
+            if self._queue:
+                self._schedule(0)
+            return
+
+        # Put the batch back in front of the events queued meanwhile; if the
+        # queue overflows, the oldest events are dropped
+        self._queue.extendleft(reversed(batch))
+        while len(self._queue) > WEBHOOK_QUEUE_SIZE:
+            self._queue.popleft()
+            self.dropped += 1
+        self._failures += 1
+        delay = min(WEBHOOK_RETRY_DELAY * 2 ** (self._failures - 1), WEBHOOK_MAX_RETRY_DELAY)
+        self._schedule(delay)
+
+    async def _async_post(self, batch: list[dict[str, Any]]) -> bool:
+        """Post a batch; return False if it should be retried."""
+        session = async_get_clientsession(self.hass)
+        try:
+            async with session.post(
+                self.url,
+                json={**self._source, "events": batch},
+                timeout=ClientTimeout(total=WEBHOOK_TIMEOUT),
+            ) as response:
+                status = response.status
+        except (ClientError, asyncio.TimeoutError) as err:
+            _LOGGER.warning(
+                "Webhook %s unreachable, %d events queued: %s",
+                self.name,
+                len(batch) + len(self._queue),
+                str(err) or type(err).__name__,
+            )
+            return False
+
+        if status < 300:
+            self.sent += len(batch)
+            return True
+        if 400 <= status < 500 and status not in _RETRY_STATUSES:
+            _LOGGER.error(
+                "Webhook %s rejected %d events with status %d", self.name, len(batch), status
+            )
+            self.rejected += len(batch)
+            return True
+        _LOGGER.warning("Webhook %s answered with status %d, retrying", self.name, status)
+        return False
+
+    async def async_stop(self) -> None:
+        """Stop retrying and make one last attempt to send the queued events."""
+        if self._task is not None:
+            await self._task
+        if self._cancel_send is not None:
+            self._cancel_send()
+            self._cancel_send = None
+        while self._queue:
+            batch = [self._queue.popleft() for _ in range(min(len(self._queue), WEBHOOK_BATCH_SIZE))]
+            if not await self._async_post(batch):
+                self.dropped += len(batch) + len(self._queue)
+                self._queue.clear()
+
+
+class WebhookForwarder:
+    """Forward the relay and button events of one instance to its webhook URLs."""
+
+    def __init__(self, hass: HomeAssistant, entry_id: str, subpath: str, urls: list[str]) -> None:
+        """Initialize a sender per URL."""
+        source = {"entry_id": entry_id, "subpath": subpath}
+        self.senders = [WebhookSender(hass, url, source) for url in urls]
+
+    @callback
+    def send(self, event: str, number: int, state: str) -> None:
+        """Queue an event for every URL."""
+        payload = {"time": time.time(), "event": event, "number": number, "state": state}
+        for sender in self.senders:
+            sender.send(payload)
+
+    async def async_stop(self) -> None:
+        """Stop all senders."""
+        await asyncio.gather(*(sender.async_stop() for sender in self.senders))
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return delivery statistics for diagnostics.
+
+        The URLs are left out, as they often carry tokens.
+        """
+        return {
+            "enabled": True,
+            "urls": len(self.senders),
+            "queued": sum(sender.queued for sender in self.senders),
+            "sent": sum(sender.sent for sender in self.senders),
+            "rejected": sum(sender.rejected for sender in self.senders),
+            "dropped": sum(sender.dropped for sender in self.senders),
+        }
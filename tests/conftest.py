@@ -1,5 +1,7 @@
 import sys
 import types
+import uuid
+from datetime import datetime, timezone
 from enum import Enum
 
 # Minimal Home Assistant shim to allow importing the integration without HA installed
@@ -10,15 +12,28 @@ homeassistant = types.ModuleType("homeassistant")
 core = types.ModuleType("homeassistant.core")
 const = types.ModuleType("homeassistant.const")
 config_entries = types.ModuleType("homeassistant.config_entries")
+exceptions = types.ModuleType("homeassistant.exceptions")
 components = types.ModuleType("homeassistant.components")
 components_switch = types.ModuleType("homeassistant.components.switch")
 components_button = types.ModuleType("homeassistant.components.button")
 components_http = types.ModuleType("homeassistant.components.http")
+components_diagnostics = types.ModuleType("homeassistant.components.diagnostics")
 helpers = types.ModuleType("homeassistant.helpers")
 entity_registry = types.ModuleType("homeassistant.helpers.entity_registry")
 entity_platform = types.ModuleType("homeassistant.helpers.entity_platform")
 network = types.ModuleType("homeassistant.helpers.network")
 entity = types.ModuleType("homeassistant.helpers.entity")
+restore_state = types.ModuleType("homeassistant.helpers.restore_state")
+dispatcher = types.ModuleType("homeassistant.helpers.dispatcher")
+config_validation = types.ModuleType("homeassistant.helpers.config_validation")
+storage = types.ModuleType("homeassistant.helpers.storage")
+event = types.ModuleType("homeassistant.helpers.event")
+start = types.ModuleType("homeassistant.helpers.start")
+aiohttp_client = types.ModuleType("homeassistant.helpers.aiohttp_client")
+selector = types.ModuleType("homeassistant.helpers.selector")
+data_entry_flow = types.ModuleType("homeassistant.data_entry_flow")
+util = types.ModuleType("homeassistant.util")
+util_dt = types.ModuleType("homeassistant.util.dt")
 
 # Define Platform enum
 class Platform(str, Enum):
@@ -29,19 +44,232 @@ class Platform(str, Enum):
 class HomeAssistant:
     pass
 
+class Event:
+    pass
+
+class Context:
+    """Context of an event, state change or service call."""
+    def __init__(self, user_id=None, parent_id=None, id=None):
+        self.user_id = user_id
+        self.parent_id = parent_id
+        self.id = id or uuid.uuid4().hex
+
+class ServiceCall:
+    """Service call data holder."""
+    def __init__(self, domain, service, data=None, context=None):
+        self.domain = domain
+        self.service = service
+        self.data = data or {}
+        self.context = context or Context()
+
+class SupportsResponse(str, Enum):
+    NONE = "none"
+    OPTIONAL = "optional"
+    ONLY = "only"
+
+class HomeAssistantError(Exception):
+    pass
+
+class ServiceValidationError(HomeAssistantError):
+    pass
+
 class ConfigEntry:
     pass
 
+class FlowHandler:
+    """Base class of config and options flows, returning result dicts."""
+    hass = None
+
+    def async_show_form(
+        self, step_id, data_schema=None, errors=None, description_placeholders=None
+    ):
+        return {
+            "type": "form",
+            "step_id": step_id,
+            "data_schema": data_schema,
+            "errors": errors or {},
+            "description_placeholders": description_placeholders,
+        }
+
+    def async_show_menu(self, step_id, menu_options):
+        return {"type": "menu", "step_id": step_id, "menu_options": menu_options}
+
+    def async_create_entry(self, title, data, options=None):
+        result = {"type": "create_entry", "title": title, "data": data}
+        if options is not None:
+            result["options"] = options
+        return result
+
+class ConfigFlow(FlowHandler):
+    """Base class for config flows."""
+
+    def __init_subclass__(cls, domain=None, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.domain = domain
+
+    def _async_current_entries(self):
+        return self.hass.config_entries.async_entries(self.domain)
+
+class OptionsFlow(FlowHandler):
+    """Base class for options flows; tests set config_entry."""
+    config_entry = None
+
+class SelectorConfig(dict):
+    """Selector configuration, kept as a dict of its options."""
+    def __init__(self, **kwargs):
+        super().__init__(kwargs)
+
+class Selector:
+    """Selector accepting any value in a voluptuous schema."""
+    def __init__(self, config=None):
+        self.config = config
+
+    def __call__(self, value):
+        return value
+
+class NumberSelectorMode(str, Enum):
+    BOX = "box"
+    SLIDER = "slider"
+
+class SelectSelectorMode(str, Enum):
+    DROPDOWN = "dropdown"
+    LIST = "list"
+
+class TextSelectorType(str, Enum):
+    TEXT = "text"
+    URL = "url"
+
 class HomeAssistantView:
     pass
 
-class SwitchEntity:
+class Entity:
+    """Base class for entities."""
+    hass = None
+    entity_id = None
+    extra_state_attributes = None
+    _context = None
+
+    @property
+    def state(self):
+        return None
+
+    async def async_added_to_hass(self):
+        pass
+
+    def async_on_remove(self, func):
+        self.__dict__.setdefault("_on_remove", []).append(func)
+
+    def async_set_context(self, context):
+        self._context = context
+
+    def async_write_ha_state(self):
+        self.hass.states.async_set(
+            self.entity_id, self.state, self.extra_state_attributes, context=self._context
+        )
+
+class SwitchEntity(Entity):
     """Base class for switch entities."""
-    pass
 
-class ButtonEntity:
+    @property
+    def is_on(self):
+        return getattr(self, "_attr_is_on", None)
+
+    @property
+    def state(self):
+        if self.is_on is None:
+            return None
+        return "on" if self.is_on else "off"
+
+class ButtonEntity(Entity):
     """Base class for button entities."""
-    pass
+    __last_pressed = None
+
+    @property
+    def state(self):
+        return self.__last_pressed
+
+    async def _async_press_action(self):
+        # Like HA: record the press, write state, then run the press action
+        self.__last_pressed = datetime.now(timezone.utc).isoformat()
+        self.async_write_ha_state()
+        await self.async_press()
+
+    async def async_press(self):
+        raise NotImplementedError
+
+class RestoreEntity(Entity):
+    """Base class for entities restoring their last state."""
+
+    async def async_get_last_state(self):
+        return None
+
+class Store:
+    """In-memory stand-in for the HA storage helper."""
+    def __init__(self, hass, version, key):
+        self.version = version
+        self.key = key
+        self.data = None
+        self.delayed_saves = []
+
+    async def async_load(self):
+        return self.data
+
+    async def async_save(self, data):
+        self.data = data
+
+    def async_delay_save(self, data_func, delay=0):
+        self.delayed_saves.append((data_func, delay))
+
+    async def async_remove(self):
+        self.data = None
+
+def callback(func):
+    """Mark function as safe to run in the event loop."""
+    return func
+
+def async_call_later(hass, delay, action):
+    """Call action with the current time after delay seconds."""
+    handle = hass.loop.call_later(delay, lambda: action(datetime.now(timezone.utc)))
+    return handle.cancel
+
+def async_get_clientsession(hass, verify_ssl=True):
+    """Return the aiohttp session shared by all integrations, created on first use."""
+    session = getattr(hass, "client_session", None)
+    if session is None:
+        import aiohttp
+
+        session = hass.client_session = aiohttp.ClientSession()
+    return session
+
+def async_at_started(hass, at_start_cb):
+    """Call at_start_cb once Home Assistant has started, right away if it is running."""
+    if getattr(hass, "is_running", True):
+        at_start_cb(hass)
+        return lambda: None
+    hass.start_callbacks.append(at_start_cb)
+    return lambda: at_start_cb in hass.start_callbacks and hass.start_callbacks.remove(at_start_cb)
+
+def async_dispatcher_connect(hass, signal, target):
+    """Connect a callable to a signal; return the function disconnecting it."""
+    targets = hass.data.setdefault("dispatcher", {}).setdefault(signal, [])
+    targets.append(target)
+    return lambda: target in targets and targets.remove(target)
+
+def async_dispatcher_send(hass, signal, *args):
+    """Call the targets connected to a signal."""
+    for target in list(hass.data.get("dispatcher", {}).get(signal, ())):
+        target(*args)
+
+def parse_datetime(dt_str):
+    """Parse an ISO 8601 time; return None if invalid."""
+    try:
+        return datetime.fromisoformat(dt_str)
+    except ValueError:
+        return None
+
+def async_redact_data(data, to_redact):
+    """Redact sensitive keys of a dict."""
+    return {key: "**REDACTED**" if key in to_redact else value for key, value in data.items()}
 
 class DeviceInfo:
     """Device info class."""
@@ -51,13 +279,48 @@ class DeviceInfo:
 
 # Attach attributes to modules
 core.HomeAssistant = HomeAssistant
+core.callback = callback
+core.Event = Event
+core.Context = Context
+core.ServiceCall = ServiceCall
+core.ServiceResponse = dict
+core.SupportsResponse = SupportsResponse
+exceptions.HomeAssistantError = HomeAssistantError
+exceptions.ServiceValidationError = ServiceValidationError
+config_validation.config_entry_only_config_schema = lambda domain: None
 const.Platform = Platform
+const.STATE_ON = "on"
+const.EVENT_CORE_CONFIG_UPDATE = "core_config_updated"
+const.EVENT_HOMEASSISTANT_STOP = "homeassistant_stop"
 config_entries.ConfigEntry = ConfigEntry
+config_entries.ConfigFlow = ConfigFlow
+config_entries.OptionsFlow = OptionsFlow
+data_entry_flow.FlowResult = dict
+util.dt = util_dt
+util_dt.UTC = timezone.utc
+util_dt.parse_datetime = parse_datetime
 components_http.HomeAssistantView = HomeAssistantView
+components_diagnostics.async_redact_data = async_redact_data
 components_switch.SwitchEntity = SwitchEntity
 components_button.ButtonEntity = ButtonEntity
 entity.DeviceInfo = DeviceInfo
-entity_registry.async_get = lambda hass: None
+restore_state.RestoreEntity = RestoreEntity
+dispatcher.async_dispatcher_connect = async_dispatcher_connect
+dispatcher.async_dispatcher_send = async_dispatcher_send
+storage.Store = Store
+event.async_call_later = async_call_later
+start.async_at_started = async_at_started
+aiohttp_client.async_get_clientsession = async_get_clientsession
+for name in ("Number", "Select", "Entity", "Text"):
+    setattr(selector, f"{name}Selector", type(f"{name}Selector", (Selector,), {}))
+    setattr(selector, f"{name}SelectorConfig", type(f"{name}SelectorConfig", (SelectorConfig,), {}))
+selector.NumberSelectorMode = NumberSelectorMode
+selector.SelectSelectorMode = SelectSelectorMode
+selector.TextSelectorType = TextSelectorType
+entity_registry.async_get = lambda hass: getattr(hass, "entity_registry", None)
+entity_registry.async_entries_for_config_entry = (
+    lambda registry, config_entry_id: registry.entries_for_config_entry(config_entry_id)
+)
 entity_platform.AddEntitiesCallback = None
 
 # Mock get_url function for network helpers
@@ -72,12 +335,50 @@ sys.modules["homeassistant"] = homeassistant
 sys.modules["homeassistant.core"] = core
 sys.modules["homeassistant.const"] = const
 sys.modules["homeassistant.config_entries"] = config_entries
+sys.modules["homeassistant.exceptions"] = exceptions
 sys.modules["homeassistant.components"] = components
 sys.modules["homeassistant.components.switch"] = components_switch
 sys.modules["homeassistant.components.button"] = components_button
 sys.modules["homeassistant.components.http"] = components_http
+sys.modules["homeassistant.components.diagnostics"] = components_diagnostics
 sys.modules["homeassistant.helpers"] = helpers
 sys.modules["homeassistant.helpers.entity"] = entity
 sys.modules["homeassistant.helpers.entity_registry"] = entity_registry
 sys.modules["homeassistant.helpers.entity_platform"] = entity_platform
 sys.modules["homeassistant.helpers.network"] = network
+sys.modules["homeassistant.helpers.restore_state"] = restore_state
+sys.modules["homeassistant.helpers.dispatcher"] = dispatcher
+sys.modules["homeassistant.helpers.config_validation"] = config_validation
+sys.modules["homeassistant.helpers.storage"] = storage
+sys.modules["homeassistant.helpers.event"] = event
+sys.modules["homeassistant.helpers.start"] = start
+sys.modules["homeassistant.helpers.aiohttp_client"] = aiohttp_client
+sys.modules["homeassistant.helpers.selector"] = selector
+sys.modules["homeassistant.data_entry_flow"] = data_entry_flow
+sys.modules["homeassistant.util"] = util
+sys.modules["homeassistant.util.dt"] = util_dt
+
+
+import pytest_asyncio  # noqa: E402
+from aiohttp.test_utils import TestClient, TestServer  # noqa: E402
+
+
+@pytest_asyncio.fixture
+async def hass(tmp_path):
+    """Return a Home Assistant stand-in with its config directory in tmp_path."""
+    from tests.ha_fake import FakeHass
+
+    hass = FakeHass(str(tmp_path))
+    yield hass
+    session = getattr(hass, "client_session", None)
+    if session is not None:
+        await session.close()
+
+
+@pytest_asyncio.fixture
+async def client(hass):
+    """Return a client of the HTTP server of the hass fixture."""
+    client = TestClient(TestServer(hass.http.app))
+    await client.start_server()
+    yield client
+    await client.close()
@@ -0,0 +1,563 @@
+"""Lightweight stand-in for the parts of Home Assistant core the integration uses.
+
+Unlike the empty classes in conftest.py, these pieces behave like the real
+ones closely enough to run the whole integration end to end:
+
+- FakeServices: service registry with schemas, blocking and non-blocking
+  calls, contexts and entity services for the switch/button platforms
+- FakeStates: state machine firing state_changed events
+- FakeEntityRegistry: entity registry assigning entity ids and firing
+  entity_registry_updated events
+- FakeHTTP: register_view on a real aiohttp router, served with aiohttp's
+  TestServer
+- FakeConfigEntries: entry setup/unload/reload including platform forwarding
+
+It also provides the helpers the tests share: make_entry for a config entry
+with the default credentials, BASIC_AUTH/basic_auth headers and digest_get,
+which performs the digest handshake like a 2N device.
+
+Usage:
+    hass = FakeHass()
+    entry = await hass.config_entries.async_add(FakeConfigEntry(data, options))
+    server = TestServer(hass.http.app)
+
+It needs the module shim from conftest.py, so import it from tests only
+after conftest has been loaded (pytest does this automatically).
+"""
+from __future__ import annotations
+
+import asyncio
+import base64
+import hashlib
+import importlib
+import logging
+import re
+import uuid
+from collections import defaultdict
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any
+
+from aiohttp import web
+
+from homeassistant.core import Context, ServiceCall
+
+from custom_components.relay_emulator_2n.const import (
+    CONF_BUTTON_COUNT,
+    CONF_PASSWORD,
+    CONF_RELAY_COUNT,
+    CONF_SUBPATH,
+    CONF_USERNAME,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+INTEGRATION = "custom_components.relay_emulator_2n"
+INTEGRATION_DOMAIN = "relay_emulator_2n"
+EVENT_STATE_CHANGED = "state_changed"
+EVENT_ENTITY_REGISTRY_UPDATED = "entity_registry_updated"
+
+
+def slugify(text: str) -> str:
+    """Return an entity object id for a name."""
+    return re.sub(r"[^a-z0-9]+", "_", text.lower()).strip("_")
+
+
+@dataclass
+class State:
+    """State of an entity."""
+
+    entity_id: str
+    state: str | None
+    attributes: dict[str, Any]
+    context: Context
+    last_changed: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+
+
+@dataclass
+class Event:
+    """Event fired on the bus."""
+
+    event_type: str
+    data: dict[str, Any]
+    context: Context | None = None
+
+
+class FakeBus:
+    """Event bus calling listeners synchronously."""
+
+    def __init__(self) -> None:
+        self._listeners: dict[str, list[Callable]] = defaultdict(list)
+        self.fired: list[Event] = []
+
+    def async_listen(self, event_type: str, listener: Callable) -> Callable[[], None]:
+        """Listen for an event type and return a function removing the listener."""
+        self._listeners[event_type].append(listener)
+        return lambda: self._listeners[event_type].remove(listener)
+
+    def async_listen_once(self, event_type: str, listener: Callable) -> Callable[[], None]:
+        """Listen for the next event of a type only."""
+
+        def once(event: Event) -> Any:
+            remove()
+            return listener(event)
+
+        remove = self.async_listen(event_type, once)
+        return remove
+
+    def async_fire(self, event_type: str, data: dict | None = None, context: Context | None = None) -> None:
+        """Fire an event."""
+        event = Event(event_type, data or {}, context)
+        self.fired.append(event)
+        for listener in list(self._listeners[event_type]):
+            result = listener(event)
+            if asyncio.iscoroutine(result):
+                asyncio.get_running_loop().create_task(result)
+
+
+class FakeStates:
+    """State machine."""
+
+    def __init__(self, bus: FakeBus) -> None:
+        self._bus = bus
+        self._states: dict[str, State] = {}
+
+    def get(self, entity_id: str) -> State | None:
+        """Return the state of an entity."""
+        return self._states.get(entity_id)
+
+    def async_all(self) -> list[State]:
+        """Return all states."""
+        return list(self._states.values())
+
+    def async_set(
+        self,
+        entity_id: str,
+        new_state: str | None,
+        attributes: dict[str, Any] | None = None,
+        context: Context | None = None,
+    ) -> None:
+        """Set the state of an entity and fire state_changed."""
+        context = context or Context()
+        old_state = self._states.get(entity_id)
+        state = State(entity_id, new_state, dict(attributes or {}), context)
+        self._states[entity_id] = state
+        self._bus.async_fire(
+            EVENT_STATE_CHANGED,
+            {"entity_id": entity_id, "old_state": old_state, "new_state": state},
+            context,
+        )
+
+    def async_remove(self, entity_id: str) -> None:
+        """Remove the state of an entity."""
+        self._states.pop(entity_id, None)
+
+
+class FakeServices:
+    """Service registry."""
+
+    def __init__(self, hass: FakeHass) -> None:
+        self._hass = hass
+        self._services: dict[tuple[str, str], tuple[Callable, Any]] = {}
+        self.calls: list[ServiceCall] = []
+
+    def async_register(
+        self,
+        domain: str,
+        service: str,
+        handler: Callable,
+        schema: Any = None,
+        supports_response: Any = None,
+    ) -> None:
+        """Register a service handler."""
+        self._services[(domain, service)] = (handler, schema)
+
+    def has_service(self, domain: str, service: str) -> bool:
+        """Return True if the service exists."""
+        return (domain, service) in self._services
+
+    async def async_call(
+        self,
+        domain: str,
+        service: str,
+        service_data: dict | None = None,
+        blocking: bool = False,
+        context: Context | None = None,
+        return_response: bool = False,
+    ) -> Any:
+        """Call a service, waiting for it to finish if blocking."""
+        try:
+            handler, schema = self._services[(domain, service)]
+        except KeyError:
+            raise ValueError(f"Service {domain}.{service} not found") from None
+
+        data = schema(service_data or {}) if schema else dict(service_data or {})
+        call = ServiceCall(domain, service, data, context or Context())
+        self.calls.append(call)
+
+        task = self._hass.loop.create_task(self._run(handler, call))
+        if not blocking:
+            return None
+        response = await task
+        return response if return_response else None
+
+    @staticmethod
+    async def _run(handler: Callable, call: ServiceCall) -> Any:
+        result = handler(call)
+        if asyncio.iscoroutine(result):
+            result = await result
+        return result
+
+
+@dataclass
+class RegistryEntry:
+    """Entity registry entry."""
+
+    entity_id: str
+    unique_id: str
+    platform: str
+    domain: str
+    config_entry_id: str | None
+
+
+class FakeEntityRegistry:
+    """Entity registry."""
+
+    def __init__(self, bus: FakeBus) -> None:
+        self._bus = bus
+        self.entities: dict[str, RegistryEntry] = {}
+        self._index: dict[tuple[str, str, str], str] = {}
+
+    def async_get_entity_id(self, domain: str, platform: str, unique_id: str) -> str | None:
+        """Return the entity id of a unique id."""
+        return self._index.get((domain, platform, unique_id))
+
+    def async_get_or_create(
+        self,
+        domain: str,
+        platform: str,
+        unique_id: str,
+        config_entry_id: str | None = None,
+        suggested_object_id: str | None = None,
+    ) -> RegistryEntry:
+        """Return the registry entry of a unique id, creating it if needed."""
+        entity_id = self.async_get_entity_id(domain, platform, unique_id)
+        if entity_id:
+            return self.entities[entity_id]
+
+        object_id = suggested_object_id or unique_id
+        entity_id = f"{domain}.{object_id}"
+        suffix = 2
+        while entity_id in self.entities:
+            entity_id = f"{domain}.{object_id}_{suffix}"
+            suffix += 1
+
+        entry = RegistryEntry(entity_id, unique_id, platform, domain, config_entry_id)
+        self.entities[entity_id] = entry
+        self._index[(domain, platform, unique_id)] = entity_id
+        self._bus.async_fire(EVENT_ENTITY_REGISTRY_UPDATED, {"action": "create", "entity_id": entity_id})
+        return entry
+
+    def async_remove(self, entity_id: str) -> None:
+        """Remove an entity from the registry."""
+        entry = self.entities.pop(entity_id, None)
+        if entry:
+            del self._index[(entry.domain, entry.platform, entry.unique_id)]
+            self._bus.async_fire(EVENT_ENTITY_REGISTRY_UPDATED, {"action": "remove", "entity_id": entity_id})
+
+    def entries_for_config_entry(self, config_entry_id: str) -> list[RegistryEntry]:
+        """Return the registry entries of a config entry."""
+        return [entry for entry in self.entities.values() if entry.config_entry_id == config_entry_id]
+
+
+class FakeHTTP:
+    """HTTP component registering views on a real aiohttp router."""
+
+    def __init__(self, hass: FakeHass) -> None:
+        self._hass = hass
+        self.app = web.Application()
+        # HA allows registering views after the server started
+        self.app.router.freeze = lambda: None
+        self.admin_user = SimpleNamespace(id="admin", is_admin=True)
+
+    def register_view(self, view: Any) -> None:
+        """Register a HomeAssistantView like HA does (view.name is not used as route name)."""
+        for method in ("get", "post", "put", "delete"):
+            handler = getattr(view, method, None)
+            if handler:
+                self.app.router.add_route(method.upper(), view.url, self._wrap(view, handler))
+
+    def _wrap(self, view: Any, handler: Callable) -> Callable:
+        async def handle(request: web.Request) -> web.StreamResponse:
+            if getattr(view, "requires_auth", True):
+                request["hass_user"] = self.admin_user
+            return await handler(request, **request.match_info)
+
+        return handle
+
+
+class FakeConfigEntry:
+    """Config entry."""
+
+    def __init__(self, data: dict[str, Any], options: dict[str, Any] | None = None, entry_id: str | None = None) -> None:
+        self.entry_id = entry_id or uuid.uuid4().hex
+        self.data = dict(data)
+        self.options = dict(options or {})
+        self.title = f"IP Relay Emulator for 2N (/{data.get('subpath')})"
+        self._on_unload: list[Callable] = []
+        self.update_listeners: list[Callable] = []
+        self.loaded = False
+
+    def async_on_unload(self, func: Callable) -> None:
+        """Call func when the entry is unloaded."""
+        self._on_unload.append(func)
+
+    def add_update_listener(self, listener: Callable) -> Callable[[], None]:
+        """Call listener(hass, entry) when data or options change."""
+        self.update_listeners.append(listener)
+        return lambda: self.update_listeners.remove(listener)
+
+
+class FakeEntityPlatform:
+    """Entities added by one platform for one config entry."""
+
+    def __init__(self, hass: FakeHass, domain: str, entry: FakeConfigEntry) -> None:
+        self.hass = hass
+        self.domain = domain
+        self.entry = entry
+        self.entities: dict[str, Any] = {}
+        self._pending: list[Any] = []
+
+    def async_add_entities(self, entities: list[Any], update_before_add: bool = False) -> None:
+        """Queue entities to be added, like HA's AddEntitiesCallback."""
+        self._pending.extend(entities)
+
+    async def async_add_pending(self) -> None:
+        """Register queued entities and write their initial state."""
+        pending, self._pending = self._pending, []
+        for entity in pending:
+            # Entities have has_entity_name set, so HA prefixes the device name
+            device_name = getattr(entity._attr_device_info, "name", "")
+            registry_entry = self.hass.entity_registry.async_get_or_create(
+                self.domain,
+                INTEGRATION_DOMAIN,
+                entity._attr_unique_id,
+                config_entry_id=self.entry.entry_id,
+                suggested_object_id=slugify(f"{device_name} {entity._attr_name}"),
+            )
+            entity.hass = self.hass
+            entity.entity_id = registry_entry.entity_id
+            self.entities[entity.entity_id] = entity
+            self.hass.entities[entity.entity_id] = entity
+            await entity.async_added_to_hass()
+            entity.async_write_ha_state()
+
+    async def async_remove_all(self) -> None:
+        """Remove all entities of the platform."""
+        for entity_id, entity in self.entities.items():
+            for func in entity.__dict__.get("_on_remove", []):
+                func()
+            self.hass.states.async_remove(entity_id)
+            self.hass.entities.pop(entity_id, None)
+        self.entities.clear()
+
+
+class FakeConfigEntries:
+    """Config entry manager forwarding setups to the integration platforms."""
+
+    def __init__(self, hass: FakeHass) -> None:
+        self._hass = hass
+        self.entries: dict[str, FakeConfigEntry] = {}
+        self._platforms: dict[tuple[str, str], FakeEntityPlatform] = {}
+        self._integration_set_up = False
+
+    def async_entries(self, domain: str | None = None) -> list[FakeConfigEntry]:
+        """Return all config entries."""
+        return list(self.entries.values())
+
+    def async_get_entry(self, entry_id: str) -> FakeConfigEntry | None:
+        """Return a config entry."""
+        return self.entries.get(entry_id)
+
+    async def async_add(self, entry: FakeConfigEntry) -> FakeConfigEntry:
+        """Add and set up a config entry."""
+        self.entries[entry.entry_id] = entry
+        await self.async_setup(entry.entry_id)
+        return entry
+
+    async def async_setup(self, entry_id: str) -> bool:
+        """Set up a config entry, setting up the integration first if needed."""
+        integration = importlib.import_module(INTEGRATION)
+        if not self._integration_set_up:
+            await integration.async_setup(self._hass, {})
+            self._integration_set_up = True
+
+        entry = self.entries[entry_id]
+        entry.loaded = await integration.async_setup_entry(self._hass, entry)
+        return entry.loaded
+
+    async def async_unload(self, entry_id: str) -> bool:
+        """Unload a config entry."""
+        integration = importlib.import_module(INTEGRATION)
+        entry = self.entries[entry_id]
+        unload_ok = await integration.async_unload_entry(self._hass, entry)
+        for func in entry._on_unload:
+            func()
+        entry._on_unload.clear()
+        entry.loaded = False
+        return unload_ok
+
+    async def async_reload(self, entry_id: str) -> bool:
+        """Reload a config entry."""
+        await self.async_unload(entry_id)
+        return await self.async_setup(entry_id)
+
+    def async_update_entry(self, entry: FakeConfigEntry, data: dict | None = None, options: dict | None = None) -> bool:
+        """Update data and options of a config entry and schedule its update listeners."""
+        changed = False
+        if data is not None and data != entry.data:
+            entry.data = dict(data)
+            changed = True
+        if options is not None and options != entry.options:
+            entry.options = dict(options)
+            changed = True
+        if changed:
+            for listener in list(entry.update_listeners):
+                self._hass.async_create_task(listener(self._hass, entry))
+        return changed
+
+    async def async_forward_entry_setups(self, entry: FakeConfigEntry, platforms: list[Any]) -> None:
+        """Set up the integration platforms for a config entry."""
+        for platform in platforms:
+            domain = str(getattr(platform, "value", platform))
+            module = importlib.import_module(f"{INTEGRATION}.{domain}")
+            entity_platform = FakeEntityPlatform(self._hass, domain, entry)
+            self._platforms[(entry.entry_id, domain)] = entity_platform
+            self._hass.ensure_entity_services(domain)
+            await module.async_setup_entry(self._hass, entry, entity_platform.async_add_entities)
+            await entity_platform.async_add_pending()
+
+    async def async_unload_platforms(self, entry: FakeConfigEntry, platforms: list[Any]) -> bool:
+        """Unload the integration platforms for a config entry."""
+        for platform in platforms:
+            domain = str(getattr(platform, "value", platform))
+            entity_platform = self._platforms.pop((entry.entry_id, domain), None)
+            if entity_platform:
+                await entity_platform.async_remove_all()
+        return True
+
+
+class FakeConfig:
+    """Core configuration."""
+
+    def __init__(self, config_dir: str) -> None:
+        self.config_dir = config_dir
+
+    def path(self, *parts: str) -> str:
+        """Return a path inside the config directory."""
+        return str(Path(self.config_dir, *parts))
+
+
+class FakeHass:
+    """Home Assistant stand-in wiring all fake components together."""
+
+    def __init__(self, config_dir: str = ".", running: bool = True) -> None:
+        self.loop = asyncio.get_running_loop()
+        self.data: dict[str, Any] = {}
+        self.bus = FakeBus()
+        self.states = FakeStates(self.bus)
+        self.services = FakeServices(self)
+        self.entity_registry = FakeEntityRegistry(self.bus)
+        self.http = FakeHTTP(self)
+        self.config = FakeConfig(config_dir)
+        self.config_entries = FakeConfigEntries(self)
+        self.entities: dict[str, Any] = {}
+        # False while Home Assistant is starting; async_start() runs the
+        # callbacks registered with async_at_started
+        self.is_running = running
+        self.start_callbacks: list[Callable[[Any], Any]] = []
+
+    def async_start(self) -> None:
+        """Finish starting and run the callbacks waiting for the start."""
+        self.is_running = True
+        callbacks, self.start_callbacks = self.start_callbacks, []
+        for at_start_cb in callbacks:
+            at_start_cb(self)
+
+    def async_create_task(self, coro: Any, name: str | None = None) -> asyncio.Task:
+        """Schedule a coroutine."""
+        return self.loop.create_task(coro)
+
+    async def async_add_executor_job(self, func: Callable, *args: Any) -> Any:
+        """Run a function in the default executor."""
+        return await self.loop.run_in_executor(None, func, *args)
+
+    def ensure_entity_services(self, domain: str) -> None:
+        """Register the entity services HA provides for a platform domain."""
+        if domain == "switch" and not self.services.has_service("switch", "turn_on"):
+            for service, method in (
+                ("turn_on", "async_turn_on"),
+                ("turn_off", "async_turn_off"),
+                ("toggle", "async_toggle"),
+            ):
+                self.services.async_register("switch", service, self._entity_service(method))
+        elif domain == "button" and not self.services.has_service("button", "press"):
+            self.services.async_register("button", "press", self._entity_service("_async_press_action"))
+
+    def _entity_service(self, method: str) -> Callable:
+        async def handle(call: ServiceCall) -> None:
+            entity_ids = call.data.get("entity_id", [])
+            if isinstance(entity_ids, str):
+                entity_ids = [entity_ids]
+            for entity_id in entity_ids:
+                entity = self.entities.get(entity_id)
+                if entity is None:
+                    _LOGGER.warning("Unable to find referenced entity %s", entity_id)
+                    continue
+                entity.async_set_context(call.context)
+                await getattr(entity, method)()
+
+        return handle
+
+
+def make_entry(subpath="2n-relay", relay_count=2, button_count=1, **options) -> FakeConfigEntry:
+    """Return a config entry of user admin with password 2n and the given options."""
+    return FakeConfigEntry(
+        {
+            CONF_SUBPATH: subpath,
+            CONF_USERNAME: "admin",
+            CONF_RELAY_COUNT: relay_count,
+            CONF_BUTTON_COUNT: button_count,
+        },
+        {CONF_PASSWORD: "2n", **options},
+    )
+
+
+def basic_auth(username: str, password: str) -> dict[str, str]:
+    """Return a Basic Authorization header."""
+    credentials = base64.b64encode(f"{username}:{password}".encode()).decode()
+    return {"Authorization": f"Basic {credentials}"}
+
+
+BASIC_AUTH = basic_auth("admin", "2n")
+
+CHALLENGE_FIELD = re.compile(r'(\w+)="([^"]*)"')
+
+
+async def digest_get(client: Any, uri: str, password: str = "2n", username: str = "admin") -> Any:
+    """Perform the digest handshake like a 2N device and return the final response."""
+    response = await client.get(uri)
+    if response.status != 401:
+        return response
+    fields = dict(CHALLENGE_FIELD.findall(response.headers["WWW-Authenticate"]))
+    ha1 = hashlib.md5(f"{username}:{fields['realm']}:{password}".encode()).hexdigest()
+    ha2 = hashlib.md5(f"GET:{uri}".encode()).hexdigest()
+    digest = hashlib.md5(f"{ha1}:{fields['nonce']}:00000001:cn:auth:{ha2}".encode()).hexdigest()
+    header = (
+        f'Digest username="{username}", realm="{fields["realm"]}", nonce="{fields["nonce"]}", '
+        f'uri="{uri}", response="{digest}", qop="auth", nc=00000001, cnonce="cn"'
+    )
+    return await client.get(uri, headers={"Authorization": header})
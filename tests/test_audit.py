@@ -0,0 +1,194 @@
+"""Tests for the audit log of access events."""
+import os
+import sqlite3
+
+import pytest
+
+from custom_components.relay_emulator_2n import audit as audit_module
+from custom_components.relay_emulator_2n.audit import AuditLog, _timestamp
+from custom_components.relay_emulator_2n.const import (
+    AUDIT_DATABASE,
+    AUDIT_KEY,
+    AUTH_MODE_BOTH,
+    CONF_AUDIT_LOG,
+    CONF_AUDIT_RETENTION_DAYS,
+    CONF_AUTH_MODE,
+    CONF_BASIC_AUTH_TLS_ONLY,
+    DOMAIN,
+)
+from custom_components.relay_emulator_2n.diagnostics import async_get_config_entry_diagnostics
+from tests.ha_fake import basic_auth, make_entry
+
+
+def make_audited_entry(subpath, **options):
+    return make_entry(
+        subpath, **{CONF_AUTH_MODE: AUTH_MODE_BOTH, CONF_BASIC_AUTH_TLS_ONLY: False, **options}
+    )
+
+
+def record(audit, entry_id="entry", number=1, event="relay"):
+    audit.record(entry_id, "door", event, "admin", number, "on", 200, "127.0.0.1")
+
+
+@pytest.mark.asyncio
+async def test_events_are_queued_and_written_in_one_batch(hass, tmp_path):
+    audit = AuditLog(hass, str(tmp_path / "audit.db"))
+    for number in range(1, 4):
+        record(audit, number=number)
+
+    # Recording never touches the database
+    assert audit.queued == 3
+    assert not (tmp_path / "audit.db").exists()
+
+    await audit.async_flush()
+    assert audit.queued == 0
+    assert audit.written == 3
+
+    events, next_cursor = await audit.async_query()
+    assert [event["number"] for event in events] == [1, 2, 3]
+    assert events[0]["user"] == "admin"
+    assert next_cursor is None
+    await audit.async_close()
+
+
+@pytest.mark.asyncio
+async def test_query_pages_through_a_time_range(hass, tmp_path, monkeypatch):
+    audit = AuditLog(hass, str(tmp_path / "audit.db"))
+    for second in range(10):
+        monkeypatch.setattr(audit_module.time, "time", lambda second=second: 1000.0 + second)
+        record(audit, number=second)
+
+    numbers = []
+    after = 0
+    while True:
+        events, after = await audit.async_query(start=1002, end=1008, after=after, limit=4)
+        numbers.extend(event["number"] for event in events)
+        if after is None:
+            break
+    assert numbers == [2, 3, 4, 5, 6, 7]
+
+    events, _ = await audit.async_query(entry_id="other")
+    assert events == []
+    await audit.async_close()
+
+
+@pytest.mark.asyncio
+async def test_old_events_are_pruned_per_instance(hass, tmp_path, monkeypatch):
+    audit = AuditLog(hass, str(tmp_path / "audit.db"))
+    audit.retention = {"short": 1, "long": 30}
+    monkeypatch.setattr(audit_module.time, "time", lambda: 10 * 86400.0)
+    record(audit, "short")
+    record(audit, "long")
+    await audit.async_flush()
+
+    # Five days later the next write prunes the events older than the retention
+    monkeypatch.setattr(audit_module.time, "time", lambda: 15 * 86400.0)
+    record(audit, "short")
+    await audit.async_flush()
+
+    events, _ = await audit.async_query()
+    assert [(event["entry_id"], event["time"]) for event in events] == [
+        ("long", 10 * 86400.0),
+        ("short", 15 * 86400.0),
+    ]
+    await audit.async_close()
+
+
+@pytest.mark.asyncio
+async def test_full_queue_drops_the_oldest_events(hass, tmp_path, monkeypatch):
+    monkeypatch.setattr(audit_module, "AUDIT_QUEUE_SIZE", 3)
+    monkeypatch.setattr(audit_module, "AUDIT_BATCH_SIZE", 100)
+    audit = AuditLog(hass, str(tmp_path / "audit.db"))
+    for number in range(1, 6):
+        record(audit, number=number)
+
+    assert audit.queued == 3
+    assert audit.dropped == 2
+    events, _ = await audit.async_query()
+    assert [event["number"] for event in events] == [3, 4, 5]
+    await audit.async_close()
+
+
+@pytest.mark.asyncio
+async def test_commands_and_auth_failures_are_audited(hass, client):
+    entry = make_audited_entry("door", **{CONF_AUDIT_LOG: True, CONF_AUDIT_RETENTION_DAYS: 7})
+    await hass.config_entries.async_add(entry)
+    # Instances without the audit log record nothing
+    await hass.config_entries.async_add(make_audited_entry("gate"))
+    audit = hass.data[DOMAIN][AUDIT_KEY]
+    admin = basic_auth("admin", "2n")
+
+    response = await client.get("/door/api/relay/ctrl?relay=1&value=on", headers=admin)
+    assert response.status == 200
+    response = await client.get("/door/api/button/trigger?button=2", headers=admin)
+    assert response.status == 400
+    response = await client.get(
+        "/door/api/relay/ctrl?relay=1&value=off", headers=basic_auth("mallory", "x")
+    )
+    assert response.status == 401
+    # The unauthenticated first step of a digest login is not a failure
+    response = await client.get("/door/api/relay/ctrl?relay=1&value=off")
+    assert response.status == 401
+    response = await client.get("/gate/api/relay/ctrl?relay=1&value=on", headers=admin)
+    assert response.status == 200
+
+    assert audit.queued == 3
+    response = await client.get("/api/relay_emulator_2n/audit", params={"limit": "2"})
+    assert response.status == 200
+    page = await response.json()
+    assert [
+        (event["event"], event["user"], event["number"], event["action"], event["status"])
+        for event in page["events"]
+    ] == [("relay", "admin", 1, "on", 200), ("button", "admin", 2, "trigger", 400)]
+    assert {event["entry_id"] for event in page["events"]} == {entry.entry_id}
+
+    response = await client.get("/api/relay_emulator_2n/audit", params={"after": str(page["next"])})
+    page = await response.json()
+    assert [
+        (event["event"], event["user"], event["action"], event["status"])
+        for event in page["events"]
+    ] == [("auth_failure", "mallory", "invalid_basic_credentials", 401)]
+    assert page["next"] is None
+
+    diagnostics = await async_get_config_entry_diagnostics(hass, entry)
+    assert diagnostics["audit"]["enabled"] is True
+    assert diagnostics["audit"]["retention_days"] == 7
+    assert os.path.exists(hass.config.path(AUDIT_DATABASE))
+    await hass.config_entries.async_unload(entry.entry_id)
+
+
+@pytest.mark.asyncio
+async def test_audit_query_rejects_invalid_parameters(hass, client):
+    await hass.config_entries.async_add(make_audited_entry("door"))
+
+    response = await client.get("/api/relay_emulator_2n/audit", params={"limit": "0"})
+    assert response.status == 400
+    response = await client.get("/api/relay_emulator_2n/audit", params={"start": "yesterday"})
+    assert response.status == 400
+    response = await client.get(
+        "/api/relay_emulator_2n/audit", params={"start": "2026-01-01T00:00:00Z"}
+    )
+    assert response.status == 200
+    assert await response.json() == {"events": [], "next": None}
+
+
+def test_iso_times_without_offset_are_utc():
+    assert _timestamp("1000.5") == 1000.5
+    assert _timestamp("1970-01-01T00:16:40") == 1000.0
+    assert _timestamp("1970-01-01T00:16:40Z") == 1000.0
+    assert _timestamp("1970-01-01T01:16:40+01:00") == 1000.0
+    with pytest.raises(ValueError):
+        _timestamp("yesterday")
+
+
+@pytest.mark.asyncio
+async def test_audit_query_reports_database_errors(hass, client, monkeypatch):
+    await hass.config_entries.async_add(make_audited_entry("door"))
+    audit = hass.data[DOMAIN][AUDIT_KEY]
+
+    async def _locked(*args):
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(audit, "async_query", _locked)
+    response = await client.get("/api/relay_emulator_2n/audit")
+    assert response.status == 503
@@ -1,6 +1,14 @@
+import base64
 import hashlib
 import time
-from custom_components.relay_emulator_2n.http_server import DigestAuth, NONCE_EXPIRY_SECONDS
+from types import SimpleNamespace
+from custom_components.relay_emulator_2n.http_server import (
+    DigestAuth,
+    NONCE_EXPIRY_SECONDS,
+    RelayView2N,
+    compile_permissions,
+    compute_ha1,
+)
 
 
 def extract_nonce_from_challenge(challenge: str) -> str:
@@ -81,3 +89,94 @@ def test_nonce_expiry():
     # expired nonce should be rejected
     assert da.verify_response(auth_header, "GET", uri) is False
     assert nonce not in da.nonce_cache
+
+
+def basic_header(credentials: str) -> str:
+    return "Basic " + base64.b64encode(credentials.encode()).decode()
+
+
+def test_basic_verify():
+    da = DigestAuth("admin", "2n")
+
+    assert da.verify_basic(basic_header("admin:2n")) is True
+    assert da.verify_basic(basic_header("admin:wrong")) is False
+    assert da.verify_basic(basic_header("other:2n")) is False
+    # password may contain colons
+    assert DigestAuth("admin", "a:b").verify_basic(basic_header("admin:a:b")) is True
+
+
+def test_basic_verify_malformed():
+    da = DigestAuth("admin", "2n")
+
+    assert da.verify_basic("Basic not-base64!") is False
+    assert da.verify_basic(basic_header("admin")) is False
+    assert da.verify_basic("Digest username=\"admin\"") is False
+
+
+def digest_header(da: DigestAuth, username: str, password: str, uri: str) -> str:
+    nonce = extract_nonce_from_challenge(da.create_challenge())
+    ha1 = hashlib.md5(f"{username}:2N:{password}".encode()).hexdigest()
+    ha2 = hashlib.md5(f"GET:{uri}".encode()).hexdigest()
+    response = hashlib.md5(f"{ha1}:{nonce}:00000001:cn:auth:{ha2}".encode()).hexdigest()
+    return (
+        f'Digest username="{username}", realm="2N", nonce="{nonce}", '
+        f'uri="{uri}", response="{response}", qop="auth", nc="00000001", cnonce="cn"'
+    )
+
+
+def test_additional_users():
+    uri = "/2n-relay/api/relay/status"
+    da = DigestAuth("admin", "2n", users={"lobby": compute_ha1("lobby", "secret")})
+
+    assert da.verify_response(digest_header(da, "lobby", "secret", uri), "GET", uri) is True
+    assert da.verify_response(digest_header(da, "admin", "2n", uri), "GET", uri) is True
+    assert da.verify_response(digest_header(da, "lobby", "2n", uri), "GET", uri) is False
+    assert da.verify_response(digest_header(da, "garage", "secret", uri), "GET", uri) is False
+    assert da.verify_basic(basic_header("lobby:secret")) is True
+    assert da.verify_basic(basic_header("garage:2n")) is False
+
+
+def test_set_users_keeps_configured_user():
+    da = DigestAuth("admin", "2n")
+
+    da.set_users({"admin": compute_ha1("admin", "other"), "lobby": compute_ha1("lobby", "secret")})
+
+    assert da.verify_basic(basic_header("admin:2n")) is True
+    assert da.verify_basic(basic_header("admin:other")) is False
+
+    da.set_users({})
+    assert da.verify_basic(basic_header("lobby:secret")) is False
+
+
+def test_authenticate_returns_username():
+    uri = "/2n-relay/api/relay/status"
+    da = DigestAuth("admin", "2n", users={"lobby": compute_ha1("lobby", "secret")})
+
+    assert da.authenticate_digest(digest_header(da, "lobby", "secret", uri), "GET", uri) == "lobby"
+    assert da.authenticate_digest(digest_header(da, "lobby", "2n", uri), "GET", uri) is None
+    assert da.authenticate_basic(basic_header("admin:2n")) == "admin"
+    assert da.authenticate_basic(basic_header("lobby:wrong")) is None
+
+
+def test_compile_permissions():
+    relay_acl, button_acl = compile_permissions(
+        {"lobby": {"relays": [1], "buttons": []}, "garage": {"relays": [3, 4]}}
+    )
+
+    assert relay_acl == {"lobby": 0b1, "garage": 0b1100}
+    assert button_acl == {"lobby": 0}
+
+
+def test_configured_user_is_never_restricted():
+    view = RelayView2N(
+        None,
+        SimpleNamespace(entry_id="abcd1234"),
+        "2n-relay",
+        "admin",
+        "2n",
+        4,
+        0,
+        permissions={"admin": {"relays": []}, "lobby": {"relays": [1]}},
+    )
+
+    assert view.relay_acl == {"lobby": 1}
@@ -0,0 +1,251 @@
+"""Tests for the config and options flows."""
+import pytest
+
+from custom_components.relay_emulator_2n.config_flow import (
+    ConfigFlow,
+    OptionsFlowHandler,
+    subpath_error,
+    validate_webhook_urls,
+)
+from custom_components.relay_emulator_2n.const import (
+    AUDIT_KEY,
+    CONF_AUDIT_LOG,
+    CONF_AUDIT_RETENTION_DAYS,
+    CONF_AUTH_MODE,
+    CONF_BASIC_AUTH_TLS_ONLY,
+    CONF_BUTTON_COUNT,
+    CONF_NEW_BUTTONS,
+    CONF_NEW_PASSWORD,
+    CONF_NEW_RELAYS,
+    CONF_NEW_USERNAME,
+    CONF_PASSWORD,
+    CONF_PERFORMANCE_MONITOR,
+    CONF_PERMISSION_RELAYS,
+    CONF_PERMISSIONS,
+    CONF_PULSE_DURATION,
+    CONF_RELAY_COUNT,
+    CONF_RELAY_TARGETS,
+    CONF_REMOVE_USERS,
+    CONF_REQUEST_TRACING,
+    CONF_SLOW_REQUEST_THRESHOLD,
+    CONF_SUBPATH,
+    CONF_TARGET_ENTITIES,
+    CONF_TARGET_OFF_SERVICE,
+    CONF_TARGET_ON_SERVICE,
+    CONF_TARGET_RELAY,
+    CONF_USERNAME,
+    CONF_USERS,
+    CONF_WEBHOOK_URLS,
+    DOMAIN,
+)
+from custom_components.relay_emulator_2n.http_server import compute_ha1
+from tests.ha_fake import make_entry
+
+
+def options_flow(hass, entry):
+    flow = OptionsFlowHandler()
+    flow.hass = hass
+    flow.config_entry = entry
+    return flow
+
+
+def settings_input(**changes):
+    return {
+        CONF_SUBPATH: "door",
+        CONF_USERNAME: "admin",
+        CONF_PASSWORD: "2n",
+        CONF_AUTH_MODE: "digest",
+        CONF_BASIC_AUTH_TLS_ONLY: True,
+        CONF_RELAY_COUNT: 2.0,
+        CONF_BUTTON_COUNT: 1.0,
+        CONF_PULSE_DURATION: 1.0,
+        CONF_PERFORMANCE_MONITOR: False,
+        CONF_SLOW_REQUEST_THRESHOLD: 200.0,
+        CONF_REQUEST_TRACING: False,
+        CONF_AUDIT_LOG: False,
+        CONF_AUDIT_RETENTION_DAYS: 30.0,
+        CONF_WEBHOOK_URLS: [],
+        **changes,
+    }
+
+
+def test_subpath_error_rejects_equal_and_nested_subpaths():
+    entries = [make_entry("door"), make_entry("site/gate")]
+
+    assert subpath_error(entries, "door") == "subpath_in_use"
+    assert subpath_error(entries, "door/garage") == "subpath_overlaps"
+    assert subpath_error(entries, "site") == "subpath_overlaps"
+    assert subpath_error(entries, "doorbell") is None
+    # An entry does not conflict with its own subpath
+    assert subpath_error(entries, "door/garage", entries[0].entry_id) is None
+
+
+def test_validate_webhook_urls():
+    assert validate_webhook_urls([" https://example.com/hook ", "", "http://10.0.0.2:8080/"]) == [
+        "https://example.com/hook",
+        "http://10.0.0.2:8080/",
+    ]
+    for url in ("ftp://example.com/hook", "https://", "example.com/hook"):
+        with pytest.raises(ValueError):
+            validate_webhook_urls([url])
+
+
+@pytest.mark.asyncio
+async def test_user_step_rejects_overlapping_subpaths(hass):
+    await hass.config_entries.async_add(make_entry("door"))
+    flow = ConfigFlow()
+    flow.hass = hass
+    user_input = {
+        CONF_USERNAME: "admin",
+        CONF_PASSWORD: "2n",
+        CONF_AUTH_MODE: "digest",
+        CONF_BASIC_AUTH_TLS_ONLY: True,
+        CONF_RELAY_COUNT: 1.0,
+        CONF_BUTTON_COUNT: 0.0,
+    }
+
+    result = await flow.async_step_user({**user_input, CONF_SUBPATH: "/door/garage/"})
+    assert result["errors"] == {"subpath": "subpath_overlaps"}
+
+    result = await flow.async_step_user({**user_input, CONF_SUBPATH: "/garage/"})
+    assert result["type"] == "create_entry"
+    assert result["data"][CONF_SUBPATH] == "garage"
+    assert result["data"][CONF_RELAY_COUNT] == 1
+
+
+@pytest.mark.asyncio
+async def test_options_menu(hass):
+    result = await options_flow(hass, make_entry()).async_step_init()
+
+    assert result["type"] == "menu"
+    assert result["menu_options"] == ["settings", "users", "targets"]
+
+
+@pytest.mark.asyncio
+async def test_settings_step_reports_subpath_and_webhook_errors(hass):
+    await hass.config_entries.async_add(make_entry("door"))
+    entry = await hass.config_entries.async_add(make_entry("gate"))
+    flow = options_flow(hass, entry)
+
+    result = await flow.async_step_settings(
+        settings_input(**{CONF_SUBPATH: "door", CONF_WEBHOOK_URLS: ["hooks.example.com"]})
+    )
+    assert result["type"] == "form"
+    assert result["errors"] == {
+        CONF_SUBPATH: "subpath_in_use",
+        CONF_WEBHOOK_URLS: "invalid_webhook_url",
+    }
+
+    result = await flow.async_step_settings(settings_input(**{CONF_SUBPATH: "door/gate"}))
+    assert result["errors"] == {CONF_SUBPATH: "subpath_overlaps"}
+
+    result = await flow.async_step_settings(settings_input(**{CONF_SUBPATH: "door gate"}))
+    assert result["errors"] == {CONF_SUBPATH: "invalid_subpath"}
+
+    result = await flow.async_step_settings(
+        settings_input(**{CONF_SUBPATH: "gate", CONF_WEBHOOK_URLS: [" https://example.com/hook "]})
+    )
+    assert result["type"] == "create_entry"
+    assert result["data"][CONF_WEBHOOK_URLS] == ["https://example.com/hook"]
+    assert entry.options[CONF_WEBHOOK_URLS] == ["https://example.com/hook"]
+    await hass.config_entries.async_unload(entry.entry_id)
+
+
+@pytest.mark.asyncio
+async def test_switching_the_audit_log_off_deletes_the_events(hass):
+    entry = await hass.config_entries.async_add(
+        make_entry("door", **{CONF_AUDIT_LOG: True, CONF_AUDIT_RETENTION_DAYS: 30})
+    )
+    audit = hass.data[DOMAIN][AUDIT_KEY]
+    audit.record(entry.entry_id, "door", "relay", "admin", 1, "on", 200, "127.0.0.1")
+    audit.record("other", "gate", "relay", "admin", 1, "on", 200, "127.0.0.1")
+
+    result = await options_flow(hass, entry).async_step_settings(settings_input())
+
+    assert result["type"] == "create_entry"
+    events, _ = await audit.async_query()
+    assert [event["entry_id"] for event in events] == ["other"]
+    await hass.config_entries.async_unload(entry.entry_id)
+    await audit.async_close()
+
+
+@pytest.mark.asyncio
+async def test_users_step_adds_and_removes_users(hass):
+    entry = make_entry(**{CONF_USERS: {"old": "hash"}, CONF_PERMISSIONS: {"old": {}}})
+    flow = options_flow(hass, entry)
+
+    result = await flow.async_step_users(
+        {
+            CONF_NEW_USERNAME: " guest ",
+            CONF_NEW_PASSWORD: "secret",
+            CONF_NEW_RELAYS: ["2"],
+            CONF_NEW_BUTTONS: ["1"],
+            CONF_REMOVE_USERS: ["old"],
+        }
+    )
+
+    assert result["type"] == "create_entry"
+    assert result["data"][CONF_PASSWORD] == "2n"
+    assert result["data"][CONF_USERS] == {"guest": compute_ha1("guest", "secret")}
+    # Only the restricted relays are stored; every button is allowed
+    assert result["data"][CONF_PERMISSIONS] == {"guest": {CONF_PERMISSION_RELAYS: [2]}}
+
+
+@pytest.mark.asyncio
+async def test_users_step_errors(hass):
+    flow = options_flow(hass, make_entry(**{CONF_USERS: {"guest": "hash"}}))
+
+    for username, password, errors in (
+        ("admin", "secret", {CONF_NEW_USERNAME: "username_in_use"}),
+        ("guest", "secret", {CONF_NEW_USERNAME: "username_in_use"}),
+        ("a:b", "secret", {CONF_NEW_USERNAME: "invalid_username"}),
+        ("other", "", {CONF_NEW_PASSWORD: "password_required"}),
+    ):
+        result = await flow.async_step_users(
+            {CONF_NEW_USERNAME: username, CONF_NEW_PASSWORD: password}
+        )
+        assert result["type"] == "form"
+        assert result["errors"] == errors
+
+    result = await flow.async_step_users()
+    assert result["description_placeholders"] == {"username": "admin", "count": "1"}
+
+
+@pytest.mark.asyncio
+async def test_targets_step_binds_and_unbinds_relays(hass):
+    entry = make_entry(
+        **{CONF_RELAY_TARGETS: {"2": {CONF_TARGET_ENTITIES: ["light.porch"]}}}
+    )
+    flow = options_flow(hass, entry)
+
+    result = await flow.async_step_targets(
+        {
+            CONF_TARGET_RELAY: "1",
+            CONF_TARGET_ENTITIES: ["lock.front"],
+            CONF_TARGET_ON_SERVICE: "lock.unlock",
+            CONF_TARGET_OFF_SERVICE: "",
+        }
+    )
+    assert result["type"] == "create_entry"
+    assert result["data"][CONF_RELAY_TARGETS] == {
+        "1": {CONF_TARGET_ENTITIES: ["lock.front"], CONF_TARGET_ON_SERVICE: "lock.unlock"},
+        "2": {CONF_TARGET_ENTITIES: ["light.porch"]},
+    }
+
+    # Without entities the binding is removed
+    result = await flow.async_step_targets({CONF_TARGET_RELAY: "2", CONF_TARGET_ENTITIES: []})
+    assert result["data"][CONF_RELAY_TARGETS] == {}
+
+    result = await flow.async_step_targets(
+        {
+            CONF_TARGET_RELAY: "1",
+            CONF_TARGET_ENTITIES: ["lock.front"],
+            CONF_TARGET_ON_SERVICE: "unlock",
+            CONF_TARGET_OFF_SERVICE: "Lock.Lock",
+        }
+    )
+    assert result["errors"] == {
+        CONF_TARGET_ON_SERVICE: "invalid_service",
+        CONF_TARGET_OFF_SERVICE: "invalid_service",
+    }
+    assert result["description_placeholders"] == {"targets": "2: 1"}
@@ -0,0 +1,470 @@
+"""End-to-end tests running the integration on the Home Assistant stand-in."""
+import asyncio
+
+import pytest
+
+from custom_components.relay_emulator_2n.const import (
+    AUTH_MODE_BASIC,
+    AUTH_MODE_BOTH,
+    CONF_AUTH_MODE,
+    CONF_BASIC_AUTH_TLS_ONLY,
+    CONF_PERMISSIONS,
+    CONF_PULSE_DURATION,
+    CONF_RELAY_TARGETS,
+    CONF_SUBPATH,
+    CONF_USERS,
+    DOMAIN,
+    HTTP_SERVER_KEY,
+)
+from custom_components.relay_emulator_2n.http_server import compute_ha1
+from tests.ha_fake import BASIC_AUTH, EVENT_STATE_CHANGED, digest_get, make_entry
+
+
+@pytest.mark.asyncio
+async def test_relay_command_reaches_switch_state(hass, client):
+    await hass.config_entries.async_add(make_entry())
+
+    resp = await digest_get(client, "/2n-relay/api/relay/ctrl?relay=1&value=on")
+
+    assert resp.status == 200
+    state = hass.states.get("switch.ip_relay_emulator_for_2n_2n_relay_relay_1")
+    assert state.state == "on"
+    assert state.attributes["relay_number"] == 1
+    assert hass.services.calls[-1].domain == "switch"
+
+    resp = await digest_get(client, "/2n-relay/api/relay/status")
+    assert await resp.text() == "relay1=on\nrelay2=off"
+
+
+@pytest.mark.asyncio
+async def test_state_change_event_fired_once_per_command(hass, client):
+    await hass.config_entries.async_add(make_entry())
+    events = []
+    hass.bus.async_listen(EVENT_STATE_CHANGED, events.append)
+
+    await digest_get(client, "/2n-relay/api/relay/ctrl?relay=2&value=on")
+
+    assert [event.data["entity_id"] for event in events] == [
+        "switch.ip_relay_emulator_for_2n_2n_relay_relay_2"
+    ]
+    assert events[0].context is hass.services.calls[-1].context
+
+
+@pytest.mark.asyncio
+async def test_button_trigger_presses_button(hass, client):
+    await hass.config_entries.async_add(make_entry())
+
+    resp = await digest_get(client, "/2n-relay/api/button/trigger?button=1")
+
+    assert resp.status == 200
+    state = hass.states.get("button.ip_relay_emulator_for_2n_2n_relay_button_1")
+    assert state.state is not None
+
+
+@pytest.mark.asyncio
+async def test_wrong_password_is_rejected(hass, client):
+    await hass.config_entries.async_add(make_entry())
+
+    resp = await digest_get(client, "/2n-relay/api/relay/ctrl?relay=1&value=on", password="wrong")
+
+    assert resp.status == 401
+    assert hass.states.get("switch.ip_relay_emulator_for_2n_2n_relay_relay_1").state == "off"
+
+
+@pytest.mark.asyncio
+async def test_reload_replaces_route(hass, client):
+    entry = await hass.config_entries.async_add(make_entry())
+
+    hass.config_entries.async_update_entry(entry, data={**entry.data, CONF_SUBPATH: "door"})
+    await hass.config_entries.async_reload(entry.entry_id)
+
+    resp = await digest_get(client, "/2n-relay/api/relay/status")
+    assert resp.status == 404
+    resp = await digest_get(client, "/door/api/relay/status")
+    assert resp.status == 200
+
+
+@pytest.mark.asyncio
+async def test_basic_auth_needs_single_round_trip(hass, client):
+    await hass.config_entries.async_add(
+        make_entry(**{CONF_AUTH_MODE: AUTH_MODE_BOTH, CONF_BASIC_AUTH_TLS_ONLY: False})
+    )
+
+    resp = await client.get("/2n-relay/api/relay/ctrl?relay=1&value=on", headers=BASIC_AUTH)
+
+    assert resp.status == 200
+    assert hass.states.get("switch.ip_relay_emulator_for_2n_2n_relay_relay_1").state == "on"
+    # Digest keeps working in mode "both"
+    resp = await digest_get(client, "/2n-relay/api/relay/status")
+    assert resp.status == 200
+
+
+@pytest.mark.asyncio
+async def test_basic_auth_rejected_without_tls(hass, client):
+    await hass.config_entries.async_add(make_entry(**{CONF_AUTH_MODE: AUTH_MODE_BOTH}))
+
+    resp = await client.get("/2n-relay/api/relay/ctrl?relay=1&value=on", headers=BASIC_AUTH)
+
+    assert resp.status == 401
+    # Only digest is offered on plain HTTP
+    assert [header.split()[0] for header in resp.headers.getall("WWW-Authenticate")] == ["Digest"]
+    assert hass.states.get("switch.ip_relay_emulator_for_2n_2n_relay_relay_1").state == "off"
+
+
+@pytest.mark.asyncio
+async def test_basic_mode_without_tls_offers_no_challenge(hass, client, caplog):
+    await hass.config_entries.async_add(make_entry(**{CONF_AUTH_MODE: AUTH_MODE_BASIC}))
+
+    for headers in ({}, BASIC_AUTH):
+        resp = await client.get("/2n-relay/api/relay/ctrl?relay=1&value=on", headers=headers)
+        assert resp.status == 401
+        # A Basic challenge would only lead to refused credentials
+        assert "WWW-Authenticate" not in resp.headers
+
+    errors = [record for record in caplog.records if record.levelname == "ERROR"]
+    assert len(errors) == 1
+    assert "only allows Basic auth over TLS" in errors[0].getMessage()
+
+
+@pytest.mark.asyncio
+async def test_challenges_per_auth_mode(hass, client):
+    await hass.config_entries.async_add(
+        make_entry(**{CONF_AUTH_MODE: AUTH_MODE_BOTH, CONF_BASIC_AUTH_TLS_ONLY: False})
+    )
+    await hass.config_entries.async_add(
+        make_entry(subpath="basic", **{CONF_AUTH_MODE: AUTH_MODE_BASIC, CONF_BASIC_AUTH_TLS_ONLY: False})
+    )
+
+    resp = await client.get("/2n-relay/api/relay/status")
+    assert [header.split()[0] for header in resp.headers.getall("WWW-Authenticate")] == ["Digest", "Basic"]
+
+    resp = await client.get("/basic/api/relay/status")
+    assert resp.headers.getall("WWW-Authenticate") == ['Basic realm="2N"']
+    # Digest is refused in basic mode
+    resp = await client.get(
+        "/basic/api/relay/status", headers={"Authorization": 'Digest username="admin"'}
+    )
+    assert resp.status == 401
+    resp = await client.get("/basic/api/relay/status", headers=BASIC_AUTH)
+    assert resp.status == 200
+
+
+@pytest.mark.asyncio
+async def test_basic_auth_rejected_in_digest_mode(hass, client):
+    await hass.config_entries.async_add(make_entry())
+
+    resp = await client.get("/2n-relay/api/relay/status", headers=BASIC_AUTH)
+
+    assert resp.status == 401
+    assert resp.headers["WWW-Authenticate"].startswith("Digest ")
+
+
+@pytest.mark.asyncio
+async def test_users_are_updated_without_reload(hass, client):
+    entry = await hass.config_entries.async_add(make_entry())
+    view = hass.data[DOMAIN][HTTP_SERVER_KEY][entry.entry_id]
+
+    resp = await digest_get(client, "/2n-relay/api/relay/status", username="lobby", password="secret")
+    assert resp.status == 401
+
+    hass.config_entries.async_update_entry(
+        entry, options={**entry.options, CONF_USERS: {"lobby": compute_ha1("lobby", "secret")}}
+    )
+    await asyncio.sleep(0)
+
+    resp = await digest_get(client, "/2n-relay/api/relay/status", username="lobby", password="secret")
+    assert resp.status == 200
+    assert hass.data[DOMAIN][HTTP_SERVER_KEY][entry.entry_id] is view
+
+    hass.config_entries.async_update_entry(entry, options={**entry.options, CONF_USERS: {}})
+    await asyncio.sleep(0)
+
+    resp = await digest_get(client, "/2n-relay/api/relay/status", username="lobby", password="secret")
+    assert resp.status == 401
+    resp = await digest_get(client, "/2n-relay/api/relay/status")
+    assert resp.status == 200
+
+
+@pytest.mark.asyncio
+async def test_user_permissions_restrict_relays_and_buttons(hass, client):
+    entry = await hass.config_entries.async_add(
+        make_entry(
+            **{
+                CONF_USERS: {"lobby": compute_ha1("lobby", "secret")},
+                CONF_PERMISSIONS: {"lobby": {"relays": [1], "buttons": []}},
+            }
+        )
+    )
+
+    async def lobby_get(uri):
+        return await digest_get(client, uri, username="lobby", password="secret")
+
+    resp = await lobby_get("/2n-relay/api/relay/ctrl?relay=1&value=on")
+    assert resp.status == 200
+    resp = await lobby_get("/2n-relay/api/relay/ctrl?relay=2&value=on")
+    assert resp.status == 403
+    assert hass.states.get("switch.ip_relay_emulator_for_2n_2n_relay_relay_2").state == "off"
+    resp = await lobby_get("/2n-relay/api/button/trigger?button=1")
+    assert resp.status == 403
+    # Status endpoints are not restricted
+    resp = await lobby_get("/2n-relay/api/relay/status")
+    assert resp.status == 200
+    # The configured user may use every relay
+    resp = await digest_get(client, "/2n-relay/api/relay/ctrl?relay=2&value=on")
+    assert resp.status == 200
+
+    hass.config_entries.async_update_entry(entry, options={**entry.options, CONF_PERMISSIONS: {}})
+    await asyncio.sleep(0)
+
+    resp = await lobby_get("/2n-relay/api/button/trigger?button=1")
+    assert resp.status == 200
+
+
+@pytest.mark.asyncio
+async def test_native_switch_api(hass, client):
+    await hass.config_entries.async_add(make_entry(**{CONF_PULSE_DURATION: 0.05}))
+    relay_1 = "switch.ip_relay_emulator_for_2n_2n_relay_relay_1"
+
+    resp = await digest_get(client, "/2n-relay/api/switch/ctrl?switch=1&action=on")
+    assert resp.status == 200
+    assert await resp.json() == {"success": True}
+    assert hass.states.get(relay_1).state == "on"
+
+    resp = await digest_get(client, "/2n-relay/api/switch/status?switch=1")
+    assert await resp.json() == {
+        "success": True,
+        "result": {
+            "switches": [
+                {"switch": 1, "enabled": True, "active": True, "locked": False, "held": False}
+            ]
+        },
+    }
+
+    resp = await digest_get(client, "/2n-relay/api/io/status")
+    assert (await resp.json())["result"]["ports"] == [
+        {"port": "relay1", "state": 1},
+        {"port": "relay2", "state": 0},
+        {"port": "input1", "state": 0},
+    ]
+
+    resp = await digest_get(client, "/2n-relay/api/switch/ctrl?switch=1&action=off")
+    assert resp.status == 200
+    assert hass.states.get(relay_1).state == "off"
+
+
+@pytest.mark.asyncio
+async def test_switch_trigger_pulses_relay(hass, client):
+    await hass.config_entries.async_add(make_entry(**{CONF_PULSE_DURATION: 0.05}))
+    relay_2 = "switch.ip_relay_emulator_for_2n_2n_relay_relay_2"
+
+    resp = await digest_get(client, "/2n-relay/api/switch/ctrl?switch=2&action=trigger")
+    assert resp.status == 200
+    on_context = hass.states.get(relay_2).context
+    assert hass.states.get(relay_2).state == "on"
+
+    await asyncio.sleep(0.1)
+    state = hass.states.get(relay_2)
+    assert state.state == "off"
+    assert state.context.parent_id == on_context.id
+
+    # Switching the relay on during a pulse latches it
+    await digest_get(client, "/2n-relay/api/switch/ctrl?switch=2&action=trigger")
+    await digest_get(client, "/2n-relay/api/switch/ctrl?switch=2&action=on")
+    await asyncio.sleep(0.1)
+    assert hass.states.get(relay_2).state == "on"
+
+
+@pytest.mark.asyncio
+async def test_concurrent_triggers_do_not_cut_a_retrigger_short(hass, client):
+    await hass.config_entries.async_add(
+        make_entry(
+            **{
+                CONF_AUTH_MODE: AUTH_MODE_BOTH,
+                CONF_BASIC_AUTH_TLS_ONLY: False,
+                CONF_PULSE_DURATION: 0.2,
+            }
+        )
+    )
+    relay_2 = "switch.ip_relay_emulator_for_2n_2n_relay_relay_2"
+    trigger = "/2n-relay/api/switch/ctrl?switch=2&action=trigger"
+
+    responses = await asyncio.gather(
+        client.get(trigger, headers=BASIC_AUTH), client.get(trigger, headers=BASIC_AUTH)
+    )
+    assert [resp.status for resp in responses] == [200, 200]
+    await asyncio.sleep(0.1)
+    resp = await client.get(trigger, headers=BASIC_AUTH)
+    assert resp.status == 200
+
+    # The pulse of the first triggers would have ended here
+    await asyncio.sleep(0.15)
+    assert hass.states.get(relay_2).state == "on"
+    await asyncio.sleep(0.1)
+    assert hass.states.get(relay_2).state == "off"
+
+
+@pytest.mark.asyncio
+async def test_trigger_during_a_pending_pulse_end(hass, client, monkeypatch):
+    entry = await hass.config_entries.async_add(make_entry(**{CONF_PULSE_DURATION: 0.1}))
+    view = hass.data[DOMAIN][HTTP_SERVER_KEY][entry.entry_id]
+    relay_2 = "switch.ip_relay_emulator_for_2n_2n_relay_relay_2"
+    end_pulse = view._async_end_pulse
+    retriggered = []
+
+    async def _end_pulse_after_trigger(*args):
+        # A trigger arrives after the end was scheduled but before it switches
+        if not retriggered:
+            retriggered.append(True)
+            await view._async_pulse_relay(2)
+        await end_pulse(*args)
+
+    monkeypatch.setattr(view, "_async_end_pulse", _end_pulse_after_trigger)
+    resp = await digest_get(client, "/2n-relay/api/switch/ctrl?switch=2&action=trigger")
+    assert resp.status == 200
+
+    await asyncio.sleep(0.15)
+    assert retriggered
+    # The stale end is skipped; the relay stays on for the new pulse
+    assert hass.states.get(relay_2).state == "on"
+    await asyncio.sleep(0.1)
+    assert hass.states.get(relay_2).state == "off"
+
+
+@pytest.mark.asyncio
+async def test_switch_api_errors(hass, client):
+    await hass.config_entries.async_add(
+        make_entry(
+            **{
+                CONF_USERS: {"lobby": compute_ha1("lobby", "secret")},
+                CONF_PERMISSIONS: {"lobby": {"relays": [1]}},
+            }
+        )
+    )
+
+    resp = await digest_get(client, "/2n-relay/api/switch/ctrl?action=on")
+    assert resp.status == 400
+    assert (await resp.json())["error"] == {
+        "code": 11,
+        "param": "switch",
+        "description": "missing mandatory parameter",
+    }
+    resp = await digest_get(client, "/2n-relay/api/switch/ctrl?switch=3&action=on")
+    assert (await resp.json())["error"]["code"] == 12
+    resp = await digest_get(client, "/2n-relay/api/switch/ctrl?switch=1&action=toggle")
+    assert (await resp.json())["error"]["param"] == "action"
+    resp = await digest_get(
+        client, "/2n-relay/api/switch/ctrl?switch=2&action=on", username="lobby", password="secret"
+    )
+    assert resp.status == 403
+    assert (await resp.json())["error"]["code"] == 10
+
+
+@pytest.mark.asyncio
+async def test_relay_states_are_mirrored_in_view(hass, client):
+    entry = await hass.config_entries.async_add(make_entry(relay_count=3))
+    view = hass.data[DOMAIN][HTTP_SERVER_KEY][entry.entry_id]
+    assert view.relay_known == 0b111
+
+    await digest_get(client, "/2n-relay/api/relay/ctrl?relay=3&value=on")
+    await digest_get(client, "/2n-relay/api/relay/ctrl?relay=1&value=on")
+    assert view.relay_states == 0b101
+
+    resp = await digest_get(client, "/2n-relay/api/relay/status?format=bitmask")
+    assert await resp.text() == "5"
+
+    await hass.config_entries.async_unload(entry.entry_id)
+    assert view.relay_known == 0
+
+
+@pytest.mark.asyncio
+async def test_relay_targets_are_switched_concurrently(hass, client):
+    entry = await hass.config_entries.async_add(
+        make_entry(
+            **{
+                CONF_RELAY_TARGETS: {
+                    "1": {"entities": ["lock.front_door", "cover.garage"]},
+                    "2": {"entities": ["light.porch"], "on_service": "light.turn_on"},
+                }
+            }
+        )
+    )
+    calls = []
+
+    async def slow_service(call):
+        calls.append((call.domain, call.service, call.data["entity_id"]))
+        await asyncio.sleep(0.05)
+
+    for domain, service in (
+        ("lock", "unlock"),
+        ("lock", "lock"),
+        ("cover", "open_cover"),
+        ("cover", "close_cover"),
+        ("light", "turn_on"),
+        ("homeassistant", "turn_off"),
+    ):
+        hass.services.async_register(domain, service, slow_service)
+
+    resp = await digest_get(client, "/2n-relay/api/relay/ctrl?relay=1&value=on")
+    assert resp.status == 200
+    assert hass.states.get("switch.ip_relay_emulator_for_2n_2n_relay_relay_1").state == "on"
+    assert calls == [("lock", "unlock", ["lock.front_door"]), ("cover", "open_cover", ["cover.garage"])]
+
+    calls.clear()
+    start = asyncio.get_running_loop().time()
+    resp = await digest_get(client, "/2n-relay/api/relay/ctrl?relay=1&value=off")
+    elapsed = asyncio.get_running_loop().time() - start
+    assert resp.status == 200
+    assert calls == [("lock", "lock", ["lock.front_door"]), ("cover", "close_cover", ["cover.garage"])]
+    # Both targets sleep 50 ms; called one after the other they would take 100 ms
+    assert elapsed < 0.095
+
+    calls.clear()
+    await digest_get(client, "/2n-relay/api/relay/ctrl?relay=2&value=on")
+    await digest_get(client, "/2n-relay/api/relay/ctrl?relay=2&value=off")
+    assert calls == [("light", "turn_on", ["light.porch"]), ("homeassistant", "turn_off", ["light.porch"])]
+
+    # Targets are updated without reload
+    view = hass.data[DOMAIN][HTTP_SERVER_KEY][entry.entry_id]
+    hass.config_entries.async_update_entry(entry, options={**entry.options, CONF_RELAY_TARGETS: {}})
+    await asyncio.sleep(0)
+    assert hass.data[DOMAIN][HTTP_SERVER_KEY][entry.entry_id] is view
+    calls.clear()
+    await digest_get(client, "/2n-relay/api/relay/ctrl?relay=1&value=on")
+    assert calls == []
+
+
+@pytest.mark.asyncio
+async def test_failing_relay_target_fails_command(hass, client):
+    await hass.config_entries.async_add(
+        make_entry(**{CONF_RELAY_TARGETS: {"1": {"entities": ["lock.front_door"]}}})
+    )
+
+    # lock.unlock is not registered
+    resp = await digest_get(client, "/2n-relay/api/relay/ctrl?relay=1&value=on")
+
+    assert resp.status == 500
+    # The relay switch itself is still switched
+    assert hass.states.get("switch.ip_relay_emulator_for_2n_2n_relay_relay_1").state == "on"
+
+
+@pytest.mark.asyncio
+async def test_nested_subpath_is_dispatched_to_longest_match(hass, client):
+    # The route of "door" is registered first and also matches "door/garage"
+    door = await hass.config_entries.async_add(make_entry(subpath="door"))
+    garage = await hass.config_entries.async_add(make_entry(subpath="door/garage"))
+
+    resp = await digest_get(client, "/door/garage/api/relay/ctrl?relay=1&value=on")
+    assert resp.status == 200
+    assert hass.states.get("switch.ip_relay_emulator_for_2n_door_garage_relay_1").state == "on"
+    assert hass.states.get("switch.ip_relay_emulator_for_2n_door_relay_1").state == "off"
+
+    resp = await digest_get(client, "/door/api/relay/ctrl?relay=2&value=on")
+    assert resp.status == 200
+    assert hass.states.get("switch.ip_relay_emulator_for_2n_door_relay_2").state == "on"
+
+    # Once the nested instance is removed, its requests are handled by "door" again
+    await hass.config_entries.async_unload(garage.entry_id)
+    view = hass.data[DOMAIN][HTTP_SERVER_KEY][door.entry_id]
+    assert view.subpath_node.children == {}
+    resp = await digest_get(client, "/door/garage/api/relay/ctrl?relay=1&value=on")
+    assert resp.status == 404
@@ -0,0 +1,189 @@
+"""Tests for the get_urls endpoint and the get_endpoint_url service."""
+from types import SimpleNamespace
+
+import pytest
+
+from custom_components.relay_emulator_2n.const import DOMAIN
+from custom_components.relay_emulator_2n.http_server import RelayView2N
+from custom_components.relay_emulator_2n.services import (
+    SERVICE_GET_ENDPOINT_URL,
+    async_setup_services,
+)
+from custom_components.relay_emulator_2n.urls import get_endpoint_urls
+from homeassistant.core import ServiceCall
+from homeassistant.exceptions import ServiceValidationError
+
+
+class DummyServices:
+    def __init__(self):
+        self.handlers = {}
+
+    def async_register(self, domain, service, handler, schema=None, supports_response=None):
+        self.handlers[(domain, service)] = (handler, schema)
+
+
+class DummyHass:
+    def __init__(self):
+        self.data = {}
+        self.services = DummyServices()
+        self.http = SimpleNamespace(app=None)
+
+
+class DummyEntry:
+    def __init__(self, entry_id, data):
+        self.entry_id = entry_id
+        self.data = data
+
+
+class Req:
+    def __init__(self, query=None):
+        self.query = query or {}
+        self.remote = "127.0.0.1"
+
+
+def make_entry(entry_id="abcd1234", subpath="2n-relay", relay_count=2, button_count=1):
+    return DummyEntry(entry_id, {
+        "subpath": subpath,
+        "username": "admin",
+        "relay_count": relay_count,
+        "button_count": button_count,
+    })
+
+
+async def call_service(hass, data):
+    handler, schema = hass.services.handlers[(DOMAIN, SERVICE_GET_ENDPOINT_URL)]
+    return handler(ServiceCall(DOMAIN, SERVICE_GET_ENDPOINT_URL, schema(data)))
+
+
+# ============================================================================
+# Endpoint Tests
+# ============================================================================
+
+@pytest.mark.asyncio
+async def test_get_urls_all():
+    hass = DummyHass()
+    entry = make_entry()
+    view = RelayView2N(hass, entry, "2n-relay", "admin", "2n", 2, 1)
+
+    resp = await view.handle_get_urls(Req())
+
+    assert resp.status == 200
+    lines = resp.text.split("\n")
+    assert "relay1_on_url=http://homeassistant.local:8123/2n-relay/api/relay/ctrl?relay=1&value=on" in lines
+    assert "relay2_status_url=http://homeassistant.local:8123/2n-relay/api/relay/status?relay=2" in lines
+    assert "button1_trigger_url=http://homeassistant.local:8123/2n-relay/api/button/trigger?button=1" in lines
+    assert len(lines) == 8
+
+
+@pytest.mark.asyncio
+async def test_get_urls_single_relay():
+    hass = DummyHass()
+    entry = make_entry()
+    view = RelayView2N(hass, entry, "2n-relay", "admin", "2n", 2, 1)
+
+    resp = await view.handle_get_urls(Req({"relay": "2"}))
+
+    assert resp.status == 200
+    assert resp.text.split("\n") == [
+        "relay2_on_url=http://homeassistant.local:8123/2n-relay/api/relay/ctrl?relay=2&value=on",
+        "relay2_off_url=http://homeassistant.local:8123/2n-relay/api/relay/ctrl?relay=2&value=off",
+        "relay2_status_url=http://homeassistant.local:8123/2n-relay/api/relay/status?relay=2",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_get_urls_single_button():
+    hass = DummyHass()
+    entry = make_entry()
+    view = RelayView2N(hass, entry, "2n-relay", "admin", "2n", 2, 1)
+
+    resp = await view.handle_get_urls(Req({"button": "1"}))
+
+    assert resp.status == 200
+    assert "button1_status_url=" in resp.text
+    assert "relay" not in resp.text.replace("2n-relay", "")
+
+
+@pytest.mark.asyncio
+async def test_get_urls_invalid_number():
+    hass = DummyHass()
+    entry = make_entry()
+    view = RelayView2N(hass, entry, "2n-relay", "admin", "2n", 2, 1)
+
+    resp = await view.handle_get_urls(Req({"relay": "3"}))
+    assert resp.status == 400
+    assert "Invalid relay number" in resp.text
+
+    resp = await view.handle_get_urls(Req({"button": "x"}))
+    assert resp.status == 400
+
+
+@pytest.mark.asyncio
+async def test_get_urls_uses_shared_cache():
+    """Endpoint and entity attributes read the same prebuilt dicts."""
+    hass = DummyHass()
+    entry = make_entry()
+    urls = get_endpoint_urls(hass, entry)
+    view = RelayView2N(hass, entry, "2n-relay", "admin", "2n", 2, 1)
+
+    await view.handle_get_urls(Req())
+
+    assert urls.as_dict(relay=1)["relays"][0] is urls.relay_attributes(1)
+
+
+# ============================================================================
+# Service Tests
+# ============================================================================
+
+@pytest.mark.asyncio
+async def test_service_returns_all_instances():
+    hass = DummyHass()
+    async_setup_services(hass)
+    get_endpoint_urls(hass, make_entry("entry_a", "front-door", 2, 0))
+    get_endpoint_urls(hass, make_entry("entry_b", "garage", 1, 1))
+
+    result = await call_service(hass, {})
+
+    assert [instance["subpath"] for instance in result["instances"]] == ["front-door", "garage"]
+    assert len(result["instances"][0]["relays"]) == 2
+    assert result["instances"][1]["buttons"][0]["button_number"] == 1
+
+
+@pytest.mark.asyncio
+async def test_service_filters_by_subpath_and_relay():
+    hass = DummyHass()
+    async_setup_services(hass)
+    get_endpoint_urls(hass, make_entry("entry_a", "front-door", 2, 0))
+    get_endpoint_urls(hass, make_entry("entry_b", "garage", 1, 1))
+
+    result = await call_service(hass, {"subpath": "/front-door", "relay": 2})
+
+    assert len(result["instances"]) == 1
+    instance = result["instances"][0]
+    assert instance["buttons"] == []
+    assert instance["relays"][0]["relay_off_url"].endswith("/front-door/api/relay/ctrl?relay=2&value=off")
+
+
+@pytest.mark.asyncio
+async def test_service_relay_filter_skips_instances_without_relay():
+    hass = DummyHass()
+    async_setup_services(hass)
+    get_endpoint_urls(hass, make_entry("entry_a", "front-door", 2, 0))
+    get_endpoint_urls(hass, make_entry("entry_b", "garage", 1, 1))
+
+    result = await call_service(hass, {"relay": 2})
+
+    assert [instance["subpath"] for instance in result["instances"]] == ["front-door"]
+
+
+@pytest.mark.asyncio
+async def test_service_unknown_subpath():
+    hass = DummyHass()
+    async_setup_services(hass)
+    get_endpoint_urls(hass, make_entry())
+
+    with pytest.raises(ServiceValidationError):
+        await call_service(hass, {"subpath": "unknown"})
+
+    with pytest.raises(ServiceValidationError):
+        await call_service(hass, {"subpath": "2n-relay", "button": 5})
@@ -2,13 +2,16 @@
 import pytest
 from types import SimpleNamespace
 
+from custom_components.relay_emulator_2n import urls as urls_module
 from custom_components.relay_emulator_2n.switch import RelaySwitch
 from custom_components.relay_emulator_2n.button import RelayButton
+from custom_components.relay_emulator_2n.urls import get_endpoint_urls
 
 
 class DummyHass:
     """Dummy Home Assistant instance for testing."""
-    pass
+    def __init__(self):
+        self.data = {}
 
 
 class DummyEntry:
@@ -195,3 +198,104 @@ async def test_button_url_format():
     # URLs should contain /api/ path
     assert "/api/" in attrs["button_trigger_url"]
     assert "/api/" in attrs["button_status_url"]
+
+
+@pytest.mark.asyncio
+async def test_base_url_resolved_once(monkeypatch):
+    """Base URL is resolved once per entry and attribute dicts are reused."""
+    calls = []
+
+    def counting_get_url(hass, allow_internal=False, allow_external=False):
+        calls.append((allow_internal, allow_external))
+        return "http://homeassistant.local:8123"
+
+    monkeypatch.setattr(urls_module, "get_url", counting_get_url)
+
+    hass = DummyHass()
+    entry = DummyEntry("test_entry_id", {
+        "subpath": "2n-relay",
+        "relay_count": 2,
+        "button_count": 1,
+    })
+
+    relays = [RelaySwitch(hass, entry, relay_num=num) for num in (1, 2)]
+    button = RelayButton(hass, entry, button_num=1)
+
+    first = relays[0].extra_state_attributes
+    for _ in range(10):
+        for relay in relays:
+            relay.extra_state_attributes
+        button.extra_state_attributes
+
+    assert len(calls) == 1
+    assert relays[0].extra_state_attributes is first
+
+
+@pytest.mark.asyncio
+async def test_invalidate_picks_up_new_base_url(monkeypatch):
+    """Invalidating the cache resolves the base URL again."""
+    base_urls = ["http://old.local:8123", "https://new.example.com"]
+    monkeypatch.setattr(urls_module, "get_url", lambda hass, **kwargs: base_urls[0])
+
+    hass = DummyHass()
+    entry = DummyEntry("test_entry_id", {"subpath": "2n-relay", "relay_count": 1})
+    relay = RelaySwitch(hass, entry, relay_num=1)
+
+    assert relay.extra_state_attributes["relay_on_url"].startswith("http://old.local:8123/")
+
+    base_urls.pop(0)
+    assert relay.extra_state_attributes["relay_on_url"].startswith("http://old.local:8123/")
+
+    get_endpoint_urls(hass, entry).invalidate()
+    assert relay.extra_state_attributes["relay_on_url"].startswith("https://new.example.com/")
+
+
+@pytest.mark.asyncio
+async def test_missing_base_url_is_not_cached(monkeypatch):
+    """An unconfigured URL yields an error attribute and is retried later."""
+    base_urls = [None, "http://homeassistant.local:8123"]
+    monkeypatch.setattr(
+        urls_module, "get_url", lambda hass, **kwargs: base_urls[0]
+    )
+
+    hass = DummyHass()
+    entry = DummyEntry("test_entry_id", {"subpath": "2n-relay", "button_count": 1})
+    button = RelayButton(hass, entry, button_num=1)
+
+    assert button.extra_state_attributes["error"] == "Home Assistant URL not configured"
+
+    base_urls.pop(0)
+    assert "button_trigger_url" in button.extra_state_attributes
+
+
+@pytest.mark.asyncio
+async def test_platform_setup_shares_device_info():
+    """All entities of an entry share one DeviceInfo instance."""
+    from custom_components.relay_emulator_2n import switch
+
+    hass = DummyHass()
+    entry = DummyEntry("test_entry_id", {"subpath": "2n-relay", "relay_count": 200})
+
+    entities = []
+    await switch.async_setup_entry(hass, entry, entities.extend)
+
+    assert len(entities) == 200
+    assert all(entity._attr_device_info is entities[0]._attr_device_info for entity in entities)
+    assert entities[-1].extra_state_attributes["relay_number"] == 200
+
+
+def test_url_attributes_are_not_recorded():
+    """Test that only the static URL attributes are excluded from the recorder."""
+    hass = DummyHass()
+    entry = DummyEntry("test_entry_id", {
+        "subpath": "2n-relay",
+        "username": "admin",
+        "relay_count": 1,
+        "button_count": 1,
+    })
+
+    relay_attrs = RelaySwitch(hass, entry, relay_num=1).extra_state_attributes
+    button_attrs = RelayButton(hass, entry, button_num=1).extra_state_attributes
+
+    assert RelaySwitch._unrecorded_attributes == set(relay_attrs) - {"relay_number"}
+    assert RelayButton._unrecorded_attributes == set(button_attrs) - {"button_number"}
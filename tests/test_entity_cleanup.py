@@ -7,6 +7,7 @@ from custom_components.relay_emulator_2n.const import (
     CONF_RELAY_COUNT,
     CONF_BUTTON_COUNT,
 )
+from tests.ha_fake import FakeHass, RegistryEntry, make_entry
 
 
 class DummyHass:
@@ -26,16 +27,25 @@ class DummyEntityRegistry:
     def __init__(self):
         self.entities = {}  # Track registered entities
         self.removed = []   # Track removed entity IDs
+        self.lookups = 0    # Count per-entity lookups
 
-    def add_entity(self, entity_type, unique_id, entity_id):
-        """Register an entity."""
+    def add_entity(self, entity_type, unique_id, entity_id, config_entry_id=None):
+        """Register an entity; it belongs to the entry its unique id starts with."""
+        if config_entry_id is None:
+            config_entry_id = unique_id.rsplit("_", 2)[0]
         key = (entity_type, DOMAIN, unique_id)
-        self.entities[key] = entity_id
+        self.entities[key] = RegistryEntry(entity_id, unique_id, DOMAIN, entity_type, config_entry_id)
 
     def async_get_entity_id(self, entity_type, domain, unique_id):
         """Get entity ID from registry."""
+        self.lookups += 1
         key = (entity_type, domain, unique_id)
-        return self.entities.get(key)
+        entry = self.entities.get(key)
+        return entry.entity_id if entry else None
+
+    def entries_for_config_entry(self, config_entry_id):
+        """Return the entities of a config entry."""
+        return [entry for entry in self.entities.values() if entry.config_entry_id == config_entry_id]
 
     def async_remove(self, entity_id):
         """Remove an entity."""
@@ -280,3 +290,48 @@ async def test_cleanup_different_entry_ids():
     # Entry B's entities should not be in removed list
     assert "switch.relay_b_1" not in registry.removed
     assert "switch.relay_b_2" not in registry.removed
+
+
+@pytest.mark.asyncio
+async def test_cleanup_removes_entities_with_stale_unique_ids():
+    """Test that entities of the entry outside the expected unique ids are removed without count change."""
+    hass = DummyHass()
+    entry = DummyEntry("test_entry_9", {
+        CONF_RELAY_COUNT: 2,
+        CONF_BUTTON_COUNT: 1,
+    })
+
+    registry = DummyEntityRegistry()
+    registry.add_entity("switch", "test_entry_9_relay_1", "switch.relay_1")
+    registry.add_entity("switch", "test_entry_9_relay_2", "switch.relay_2")
+    registry.add_entity("button", "test_entry_9_button_1", "button.button_1")
+    # Left behind by an older unique id scheme and by an interrupted setup
+    registry.add_entity("switch", "relay_1", "switch.legacy_relay_1", config_entry_id="test_entry_9")
+    registry.add_entity("button", "test_entry_9_relay_2", "button.wrong_domain")
+
+    with patch("custom_components.relay_emulator_2n.er.async_get", return_value=registry):
+        await async_cleanup_orphaned_entities(hass, entry, new_relay_count=2, new_button_count=1)
+
+    assert sorted(registry.removed) == ["button.wrong_domain", "switch.legacy_relay_1"]
+    # The entities of the entry are enumerated instead of looked up one by one
+    assert registry.lookups == 0
+
+
+@pytest.mark.asyncio
+async def test_orphaned_entities_are_removed_at_setup(tmp_path):
+    """Test that setting up an entry removes orphaned entities before adding its entities."""
+    hass = FakeHass(str(tmp_path))
+    entry = make_entry(relay_count=1, button_count=0)
+    orphan = hass.entity_registry.async_get_or_create(
+        "switch", DOMAIN, f"{entry.entry_id}_relay_5", config_entry_id=entry.entry_id
+    )
+    other = hass.entity_registry.async_get_or_create(
+        "switch", DOMAIN, "other_entry_relay_5", config_entry_id="other_entry"
+    )
+
+    await hass.config_entries.async_add(entry)
+
+    assert orphan.entity_id not in hass.entity_registry.entities
+    assert other.entity_id in hass.entity_registry.entities
+    registry_entries = hass.entity_registry.entries_for_config_entry(entry.entry_id)
+    assert [registry_entry.unique_id for registry_entry in registry_entries] == [f"{entry.entry_id}_relay_1"]
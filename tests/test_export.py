@@ -0,0 +1,161 @@
+"""Tests for the bulk provisioning export."""
+import csv
+import io
+import json
+from types import SimpleNamespace
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+
+from custom_components.relay_emulator_2n.const import DOMAIN, HTTP_SERVER_KEY
+from custom_components.relay_emulator_2n.export import (
+    CSV_FIELDS,
+    ProvisioningExportView,
+    iter_csv_chunks,
+    iter_json_chunks,
+)
+from custom_components.relay_emulator_2n.http_server import RelayView2N
+from custom_components.relay_emulator_2n.services import (
+    SERVICE_EXPORT_PROVISIONING,
+    async_setup_services,
+)
+from custom_components.relay_emulator_2n.urls import get_endpoint_urls
+from homeassistant.core import ServiceCall
+
+
+class DummyServices:
+    def __init__(self):
+        self.handlers = {}
+
+    def async_register(self, domain, service, handler, schema=None, supports_response=None):
+        self.handlers[(domain, service)] = handler
+
+
+class DummyHass:
+    def __init__(self):
+        self.data = {}
+        self.services = DummyServices()
+        self.http = SimpleNamespace(app=None)
+
+
+class DummyEntry:
+    def __init__(self, entry_id, data):
+        self.entry_id = entry_id
+        self.data = data
+
+
+def add_instance(hass, entry_id, subpath, relay_count, button_count, username="admin"):
+    entry = DummyEntry(entry_id, {
+        "subpath": subpath,
+        "username": username,
+        "relay_count": relay_count,
+        "button_count": button_count,
+    })
+    view = RelayView2N(hass, entry, subpath, username, "2n", relay_count, button_count)
+    hass.data.setdefault(DOMAIN, {}).setdefault(HTTP_SERVER_KEY, {})[entry_id] = view
+    get_endpoint_urls(hass, entry)
+
+
+def make_hass():
+    hass = DummyHass()
+    add_instance(hass, "entry_a", "front-door", 2, 0)
+    add_instance(hass, "entry_b", "garage", 1, 1, username="garage")
+    return hass
+
+
+async def make_client(hass, is_admin=True):
+    """Serve the export view behind a stand-in for HA's auth middleware."""
+    view = ProvisioningExportView(hass)
+
+    @web.middleware
+    async def fake_auth(request, handler):
+        request["hass_user"] = SimpleNamespace(is_admin=is_admin)
+        return await handler(request)
+
+    app = web.Application(middlewares=[fake_auth])
+    app.router.add_get(view.url, view.get)
+    client = TestClient(TestServer(app))
+    await client.start_server()
+    return client
+
+
+def test_json_chunks_are_streamed_per_instance():
+    hass = make_hass()
+
+    chunks = list(iter_json_chunks(hass))
+
+    # opening, one chunk per instance, closing
+    assert len(chunks) == 4
+    document = json.loads("".join(chunks))
+    front_door, garage = document["instances"]
+    assert front_door["subpath"] == "front-door"
+    assert front_door["realm"] == "2N"
+    assert front_door["username"] == "admin"
+    assert len(front_door["relays"]) == 2
+    assert garage["username"] == "garage"
+    assert garage["buttons"][0]["button_trigger_url"].endswith("/garage/api/button/trigger?button=1")
+
+
+def test_csv_rows_per_url():
+    hass = make_hass()
+
+    rows = list(csv.DictReader(io.StringIO("".join(iter_csv_chunks(hass)))))
+
+    # 2 relays * 3 URLs + 1 relay * 3 URLs + 1 button * 2 URLs
+    assert len(rows) == 11
+    assert tuple(rows[0].keys()) == CSV_FIELDS
+    assert rows[0]["subpath"] == "front-door"
+    assert rows[0]["type"] == "relay"
+    assert rows[0]["number"] == "1"
+    assert rows[0]["action"] == "on"
+    assert rows[-1]["type"] == "button"
+    assert rows[-1]["action"] == "status"
+
+
+def test_export_without_instances():
+    hass = DummyHass()
+
+    assert json.loads("".join(iter_json_chunks(hass))) == {"instances": []}
+    assert "".join(iter_csv_chunks(hass)).strip() == ",".join(CSV_FIELDS)
+
+
+@pytest.mark.asyncio
+async def test_export_view_streams_json_and_csv():
+    client = await make_client(make_hass())
+    try:
+        resp = await client.get("/api/relay_emulator_2n/export")
+        assert resp.status == 200
+        assert resp.headers["Content-Type"].startswith("application/json")
+        assert len((await resp.json())["instances"]) == 2
+
+        resp = await client.get("/api/relay_emulator_2n/export?format=csv")
+        assert resp.status == 200
+        assert resp.headers["Content-Type"].startswith("text/csv")
+        assert (await resp.text()).startswith(",".join(CSV_FIELDS))
+
+        resp = await client.get("/api/relay_emulator_2n/export?format=xml")
+        assert resp.status == 400
+    finally:
+        await client.close()
+
+
+@pytest.mark.asyncio
+async def test_export_view_requires_admin():
+    client = await make_client(make_hass(), is_admin=False)
+    try:
+        resp = await client.get("/api/relay_emulator_2n/export")
+        assert resp.status == 403
+    finally:
+        await client.close()
+
+
+@pytest.mark.asyncio
+async def test_export_service():
+    hass = make_hass()
+    async_setup_services(hass)
+
+    handler = hass.services.handlers[(DOMAIN, SERVICE_EXPORT_PROVISIONING)]
+    result = handler(ServiceCall(DOMAIN, SERVICE_EXPORT_PROVISIONING))
+
+    assert [instance["subpath"] for instance in result["instances"]] == ["front-door", "garage"]
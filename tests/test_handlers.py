@@ -3,14 +3,14 @@ import asyncio
 import pytest
 from types import SimpleNamespace
 
-from custom_components.relay_emulator_2n.http_server import RelayView2N
+from custom_components.relay_emulator_2n.http_server import RelayView2N, compile_relay_targets
 
 
 class DummyServices:
     def __init__(self):
         self.calls = []
 
-    async def async_call(self, domain, service, data, blocking=True):
+    async def async_call(self, domain, service, data, blocking=True, context=None):
         self.calls.append((domain, service, data, blocking))
         return None
 
@@ -243,6 +243,66 @@ async def test_handle_relay_status_all_off(monkeypatch):
     assert "relay3=off" in text
 
 
+@pytest.mark.asyncio
+async def test_handle_relay_status_mirrored_and_bitmask(monkeypatch):
+    hass = DummyHass()
+    entry = DummyEntry("abcd1234", {"subpath": "2n-relay", "username": "admin", "relay_count": 3, "button_count": 0})
+
+    # Only relay 3 is not mirrored and falls back to the state machine
+    registry = Registry({f"{entry.entry_id}_relay_3": "switch.r3"})
+    import homeassistant.helpers.entity_registry as er
+    monkeypatch.setattr(er, "async_get", lambda hass_arg: registry)
+    hass.states["switch.r3"] = SimpleNamespace(state="on")
+
+    view = RelayView2N(hass, entry, entry.data["subpath"], "admin", "2n", 3, 0)
+    view.set_relay_state(1, True)
+    view.set_relay_state(2, False)
+
+    class Req:
+        def __init__(self):
+            self.query = {}
+
+    resp = await view.handle_relay_status(Req())
+    assert resp.text == "relay1=on\nrelay2=off\nrelay3=on"
+
+    resp = await view.handle_relay_status(Req(), "bitmask")
+    assert resp.text == "5"
+
+    view.set_relay_state(3, False)
+    view.set_relay_state(1, False)
+    resp = await view.handle_relay_status(Req(), "bitmask")
+    assert resp.text == "0"
+
+
+@pytest.mark.asyncio
+async def test_handle_relay_status_relay_filter(monkeypatch):
+    hass = DummyHass()
+    entry = DummyEntry("abcd1234", {"subpath": "2n-relay", "username": "admin", "relay_count": 4, "button_count": 0})
+    import homeassistant.helpers.entity_registry as er
+    monkeypatch.setattr(er, "async_get", lambda hass_arg: Registry({}))
+
+    view = RelayView2N(hass, entry, entry.data["subpath"], "admin", "2n", 4, 0)
+    for relay in range(1, 5):
+        view.set_relay_state(relay, relay in (2, 4))
+
+    class Req:
+        def __init__(self, relay):
+            self.query = {"relay": relay}
+
+    resp = await view.handle_relay_status(Req("2"))
+    assert resp.text == "relay2=on"
+
+    resp = await view.handle_relay_status(Req("3,1,3"))
+    assert resp.text == "relay3=off\nrelay1=off"
+
+    resp = await view.handle_relay_status(Req("1,2"), "bitmask")
+    assert resp.text == "2"
+
+    for invalid in ("0", "5", "x", "1,"):
+        resp = await view.handle_relay_status(Req(invalid))
+        assert resp.status == 400
+
+
 # ============================================================================
 # Button Trigger Tests
 # ============================================================================
@@ -252,6 +312,11 @@ async def test_handle_button_trigger(monkeypatch):
     hass = DummyHass()
     entry = DummyEntry("abcd1234", {"subpath": "2n-relay", "username": "admin", "relay_count": 0, "button_count": 2})
 
+    registry = Registry({f"{entry.entry_id}_button_1": "button.test_button1"})
+    import homeassistant.helpers.entity_registry as er
+
+    monkeypatch.setattr(er, "async_get", lambda hass_arg: registry)
+
     view = RelayView2N(hass, entry, entry.data["subpath"], "admin", "2n", 0, 2)
 
     class Req:
@@ -268,6 +333,7 @@ async def test_handle_button_trigger(monkeypatch):
     domain, service, data, blocking = hass.services.calls[0]
     assert domain == "button"
     assert service == "press"
+    assert data == {"entity_id": "button.test_button1"}
 
 
 @pytest.mark.asyncio
@@ -391,4 +457,34 @@ async def test_handle_root(monkeypatch):
     resp = await view.handle_root(req)
 
     assert resp.status == 200
-    assert "IP Relay Emulator for 2N" in resp.text
\ No newline at end of file
+    assert "IP Relay Emulator for 2N" in resp.text
+
+
+def test_compile_relay_targets_groups_calls_by_service():
+    targets = compile_relay_targets(
+        {
+            "1": {"entities": ["lock.front", "lock.back", "button.bell"]},
+            "2": {"entities": ["light.porch"], "off_service": "light.turn_off"},
+            "3": {"entities": []},
+        }
+    )
+
+    assert targets == {
+        1: (
+            [("lock", "lock", ["lock.front", "lock.back"])],
+            [("lock", "unlock", ["lock.front", "lock.back"]), ("button", "press", ["button.bell"])],
+        ),
+        2: (
+            [("light", "turn_off", ["light.porch"])],
+            [("homeassistant", "turn_on", ["light.porch"])],
+        ),
+    }
+
+    hass = DummyHass()
+    entry = DummyEntry("abcd1234", {"subpath": "2n-relay", "username": "admin", "relay_count": 1, "button_count": 0})
+    view = RelayView2N(
+        hass, entry, entry.data["subpath"], "admin", "2n", 1, 0,
+        relay_targets={"1": {"entities": ["lock.front"]}, "2": {"entities": ["lock.back"]}},
+    )
+    # Targets of relays beyond the relay count are ignored
+    assert list(view.relay_targets) == [1]
@@ -0,0 +1,237 @@
+"""Tests for the performance monitor and request tracing."""
+import asyncio
+import time
+
+import pytest
+from aiohttp.test_utils import TestClient, TestServer
+
+from custom_components.relay_emulator_2n.const import (
+    CONF_PERFORMANCE_MONITOR,
+    CONF_REQUEST_TRACING,
+    CONF_SLOW_REQUEST_THRESHOLD,
+    DOMAIN,
+    HTTP_SERVER_KEY,
+)
+from custom_components.relay_emulator_2n.diagnostics import async_get_config_entry_diagnostics
+from custom_components.relay_emulator_2n.monitor import (
+    PHASE_AUTH,
+    PHASE_ENTITY,
+    PHASE_LOOKUP,
+    PHASE_RESPONSE,
+    PHASE_SERVICE_CALL,
+    PHASE_STATE_WRITE,
+    SETUP_PHASE_CLEANUP,
+    SETUP_PHASE_DEFERRED,
+    SETUP_PHASE_HTTP,
+    SETUP_PHASE_PLATFORMS,
+    SETUP_PHASE_STORE,
+    LoopLagMonitor,
+    RequestMonitor,
+    RequestTimer,
+    RequestTracer,
+    mark_phase,
+    track_request,
+)
+from tests.ha_fake import EVENT_STATE_CHANGED, FakeHass, digest_get, make_entry
+
+
+def test_request_timer_phases():
+    timer = RequestTimer("GET", "api/relay/ctrl")
+    timer.marks = [(PHASE_AUTH, 1.0), (PHASE_LOOKUP, 1.001), (PHASE_SERVICE_CALL, 1.003)]
+
+    phases = timer.phases(end=1.013)
+
+    assert phases == pytest.approx({PHASE_AUTH: 1.0, PHASE_LOOKUP: 2.0, PHASE_SERVICE_CALL: 10.0})
+
+
+def test_mark_phase_without_monitored_request_is_noop():
+    mark_phase(PHASE_LOOKUP)
+
+
+@pytest.mark.asyncio
+async def test_slow_request_is_attributed_to_slowest_phase():
+    monitor = RequestMonitor(asyncio.get_running_loop(), threshold_ms=20)
+
+    with track_request("GET", "api/relay/ctrl", monitor):
+        mark_phase(PHASE_SERVICE_CALL)
+        await asyncio.sleep(0.03)
+    with track_request("GET", "api/relay/status", monitor):
+        pass
+
+    assert monitor.requests == 2
+    (record,) = monitor.slow_requests
+    assert record["endpoint"] == "api/relay/ctrl"
+    assert record["phase"] == PHASE_SERVICE_CALL
+    assert record["duration_ms"] >= 20
+    assert set(record["phases"]) == {PHASE_AUTH, PHASE_SERVICE_CALL}
+
+
+@pytest.mark.asyncio
+async def test_loop_lag_monitor_records_blocked_loop():
+    monitor = LoopLagMonitor(asyncio.get_running_loop(), threshold_ms=30, interval=0.01)
+    monitor.start()
+    try:
+        await asyncio.sleep(0.02)
+        # Block the event loop like a slow synchronous listener
+        time.sleep(0.05)
+        await asyncio.sleep(0.02)
+    finally:
+        monitor.stop()
+
+    assert monitor.samples >= 2
+    assert monitor.max_lag_ms >= 30
+    assert monitor.spikes
+
+
+@pytest.mark.asyncio
+async def test_slow_listener_shows_up_in_diagnostics(tmp_path):
+    hass = FakeHass(str(tmp_path))
+    entry = make_entry()
+    entry.options.update({CONF_PERFORMANCE_MONITOR: True, CONF_SLOW_REQUEST_THRESHOLD: 20})
+    await hass.config_entries.async_add(entry)
+    # A state_changed listener blocking the loop while the relay switches
+    hass.bus.async_listen(EVENT_STATE_CHANGED, lambda event: time.sleep(0.03))
+
+    client = TestClient(TestServer(hass.http.app))
+    await client.start_server()
+    try:
+        resp = await digest_get(client, "/2n-relay/api/relay/ctrl?relay=1&value=on")
+        assert resp.status == 200
+    finally:
+        await client.close()
+
+    diagnostics = await async_get_config_entry_diagnostics(hass, entry)
+
+    assert diagnostics["entry"]["options"]["password"] == "**REDACTED**"
+    performance = diagnostics["performance"]
+    assert performance["threshold_ms"] == 20
+    (record,) = performance["slow_requests"]
+    assert record["endpoint"] == "api/relay/ctrl"
+    assert record["status"] == 200
+    # The listener runs while the switch writes its state
+    assert record["phase"] == PHASE_STATE_WRITE
+
+    view = hass.data[DOMAIN][HTTP_SERVER_KEY][entry.entry_id]
+    await hass.config_entries.async_unload(entry.entry_id)
+    assert view.monitor.loop_lag._handle is None
+
+
+@pytest.mark.asyncio
+async def test_monitoring_disabled_by_default(tmp_path):
+    hass = FakeHass(str(tmp_path))
+    entry = await hass.config_entries.async_add(make_entry())
+
+    diagnostics = await async_get_config_entry_diagnostics(hass, entry)
+
+    assert hass.data[DOMAIN][HTTP_SERVER_KEY][entry.entry_id].monitor is None
+    assert diagnostics["performance"] == {"enabled": False}
+    assert diagnostics["http"]["relay_count"] == 2
+    assert diagnostics["http"]["users"] == ["admin"]
+    assert diagnostics["endpoint_urls"]["relays"][0]["relay_on_url"] == (
+        "http://homeassistant.local:8123/2n-relay/api/relay/ctrl?relay=1&value=on"
+    )
+
+
+@pytest.mark.asyncio
+async def test_request_trace_is_correlated_with_state_change(tmp_path):
+    hass = FakeHass(str(tmp_path))
+    entry = make_entry()
+    entry.options[CONF_REQUEST_TRACING] = True
+    await hass.config_entries.async_add(entry)
+
+    client = TestClient(TestServer(hass.http.app))
+    await client.start_server()
+    try:
+        resp = await digest_get(client, "/2n-relay/api/relay/ctrl?relay=1&value=on")
+        assert resp.status == 200
+    finally:
+        await client.close()
+
+    view = hass.data[DOMAIN][HTTP_SERVER_KEY][entry.entry_id]
+    state = hass.states.get("switch.ip_relay_emulator_for_2n_2n_relay_relay_1")
+    trace = view.tracer.get(state.context.id)
+
+    assert trace["endpoint"] == "api/relay/ctrl"
+    assert trace["status"] == 200
+    assert [span["name"] for span in trace["spans"]] == [
+        PHASE_AUTH,
+        PHASE_LOOKUP,
+        PHASE_SERVICE_CALL,
+        PHASE_ENTITY,
+        PHASE_STATE_WRITE,
+        PHASE_RESPONSE,
+    ]
+    assert trace["spans"][0]["start_ms"] == 0
+    assert hass.services.calls[-1].context is state.context
+
+    diagnostics = await async_get_config_entry_diagnostics(hass, entry)
+    # The unauthenticated challenge request is traced as well, most recent first
+    assert [t["status"] for t in diagnostics["request_traces"]["traces"]] == [200, 401]
+    assert diagnostics["performance"] == {"enabled": False}
+
+
+def test_tracer_keeps_most_recent_requests():
+    tracer = RequestTracer(size=2)
+
+    for endpoint in ("a", "b", "c"):
+        timer = RequestTimer("GET", endpoint)
+        tracer.record(timer, timer.start)
+
+    assert [trace["endpoint"] for trace in tracer.as_dict()["traces"]] == ["c", "b"]
+    assert tracer.get(timer.context.id)["endpoint"] == "c"
+
+
+@pytest.mark.asyncio
+async def test_setup_is_timed_and_defers_work_until_started(tmp_path):
+    hass = FakeHass(str(tmp_path), running=False)
+    entry = make_entry()
+    entry.options[CONF_PERFORMANCE_MONITOR] = True
+    await hass.config_entries.async_add(entry)
+    view = hass.data[DOMAIN][HTTP_SERVER_KEY][entry.entry_id]
+    relay = hass.entities["switch.ip_relay_emulator_for_2n_2n_relay_relay_1"]
+    button = hass.entities["button.ip_relay_emulator_for_2n_2n_relay_button_1"]
+
+    # Door commands are served while Home Assistant is starting
+    client = TestClient(TestServer(hass.http.app))
+    await client.start_server()
+    try:
+        resp = await digest_get(client, "/2n-relay/api/relay/ctrl?relay=1&value=on")
+        assert resp.status == 200
+    finally:
+        await client.close()
+
+    assert relay.extra_state_attributes == {"relay_number": 1}
+    assert button.extra_state_attributes == {"button_number": 1}
+    assert "relay_on_url" not in hass.states.get(relay.entity_id).attributes
+    assert view.monitor.loop_lag._handle is None
+    diagnostics = await async_get_config_entry_diagnostics(hass, entry)
+    assert list(diagnostics["setup"]["phases"]) == [
+        SETUP_PHASE_HTTP,
+        SETUP_PHASE_STORE,
+        SETUP_PHASE_CLEANUP,
+        SETUP_PHASE_PLATFORMS,
+    ]
+
+    hass.async_start()
+
+    # The start rewrites the states with the URL attributes
+    assert "relay_on_url" in hass.states.get(relay.entity_id).attributes
+    assert "button_trigger_url" in hass.states.get(button.entity_id).attributes
+    assert view.monitor.loop_lag._handle is not None
+    diagnostics = await async_get_config_entry_diagnostics(hass, entry)
+    assert SETUP_PHASE_DEFERRED in diagnostics["setup"]["phases"]
+
+    await hass.config_entries.async_unload(entry.entry_id)
+    assert view.monitor.loop_lag._handle is None
+
+
+@pytest.mark.asyncio
+async def test_entries_set_up_after_start_write_urls_right_away(hass):
+    states = []
+    hass.bus.async_listen(EVENT_STATE_CHANGED, lambda event: states.append(event.data["new_state"]))
+    await hass.config_entries.async_add(make_entry())
+
+    # No state is written without the URL attributes first
+    relay_states = [state for state in states if state.entity_id.startswith("switch.")]
+    assert relay_states
+    assert all("relay_on_url" in state.attributes for state in relay_states)
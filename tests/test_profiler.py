@@ -0,0 +1,96 @@
+"""Tests for the on-demand profiling service."""
+import asyncio
+import os
+import pstats
+
+import pytest
+from aiohttp.test_utils import TestClient, TestServer
+
+from custom_components.relay_emulator_2n.const import DOMAIN, HTTP_SERVER_KEY
+from custom_components.relay_emulator_2n.services import SERVICE_PROFILE
+from homeassistant.exceptions import ServiceValidationError
+from tests.ha_fake import FakeHass, digest_get, make_entry
+
+
+async def wait_for_file(filename):
+    for _ in range(100):
+        if os.path.exists(filename):
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"{filename} was not written")
+
+
+@pytest.mark.asyncio
+async def test_profile_next_requests(tmp_path):
+    hass = FakeHass(str(tmp_path))
+    entry = await hass.config_entries.async_add(make_entry())
+    view = hass.data[DOMAIN][HTTP_SERVER_KEY][entry.entry_id]
+
+    result = await hass.services.async_call(
+        DOMAIN, SERVICE_PROFILE, {"requests": 2}, blocking=True, return_response=True
+    )
+
+    assert result["requests"] == 2
+    assert os.path.dirname(result["filename"]) == str(tmp_path)
+    assert view.profiler is not None
+
+    client = TestClient(TestServer(hass.http.app))
+    await client.start_server()
+    try:
+        # Challenge and authenticated request
+        resp = await digest_get(client, "/2n-relay/api/relay/ctrl?relay=1&value=on")
+        assert resp.status == 200
+        assert view.profiler is None
+        await wait_for_file(result["filename"])
+
+        # Requests after the profiled ones are handled without the profiler
+        resp = await digest_get(client, "/2n-relay/api/relay/status")
+        assert resp.status == 200
+    finally:
+        await client.close()
+
+    functions = {func[2] for func in pstats.Stats(result["filename"]).stats}
+    assert "handle_relay_control" in functions
+    assert "handle_relay_status" not in functions
+
+
+@pytest.mark.asyncio
+async def test_profile_rejects_unknown_subpath_and_concurrent_runs(tmp_path):
+    hass = FakeHass(str(tmp_path))
+    await hass.config_entries.async_add(make_entry())
+
+    with pytest.raises(ServiceValidationError):
+        await hass.services.async_call(DOMAIN, SERVICE_PROFILE, {"subpath": "garage"}, blocking=True)
+
+    await hass.services.async_call(DOMAIN, SERVICE_PROFILE, {"subpath": "/2n-relay/"}, blocking=True)
+    with pytest.raises(ServiceValidationError):
+        await hass.services.async_call(DOMAIN, SERVICE_PROFILE, {}, blocking=True)
+
+
+@pytest.mark.asyncio
+async def test_unloading_writes_the_partial_profile(tmp_path):
+    hass = FakeHass(str(tmp_path))
+    entry = await hass.config_entries.async_add(make_entry())
+    result = await hass.services.async_call(
+        DOMAIN, SERVICE_PROFILE, {"requests": 10}, blocking=True, return_response=True
+    )
+
+    client = TestClient(TestServer(hass.http.app))
+    await client.start_server()
+    try:
+        resp = await digest_get(client, "/2n-relay/api/relay/ctrl?relay=1&value=on")
+        assert resp.status == 200
+    finally:
+        await client.close()
+    await hass.config_entries.async_unload(entry.entry_id)
+
+    await wait_for_file(result["filename"])
+    functions = {func[2] for func in pstats.Stats(result["filename"]).stats}
+    assert "handle_relay_control" in functions
+
+    # A new profile started right away gets its own file
+    await hass.config_entries.async_add(make_entry())
+    second = await hass.services.async_call(
+        DOMAIN, SERVICE_PROFILE, {}, blocking=True, return_response=True
+    )
+    assert second["filename"] != result["filename"]
@@ -0,0 +1,93 @@
+"""Tests for the JSON response format."""
+import json
+
+import pytest
+
+from custom_components.relay_emulator_2n.const import (
+    AUTH_MODE_BOTH,
+    CONF_AUTH_MODE,
+    CONF_BASIC_AUTH_TLS_ONLY,
+)
+from custom_components.relay_emulator_2n.responses import JsonTemplates, result_list
+from tests.ha_fake import BASIC_AUTH, digest_get, make_entry
+
+
+def test_templates_are_valid_json():
+    templates = JsonTemplates(3, 2, {"model": 'IP "Relay"', "relays": 3})
+
+    assert json.loads(result_list(b"relays", [states[2] for states in templates.relay_states])) == {
+        "success": True,
+        "result": {"relays": [{"relay": n, "state": "unknown"} for n in (1, 2, 3)]},
+    }
+    assert json.loads(templates.switches[1][1]) == {
+        "switch": 2, "enabled": True, "active": True, "locked": False, "held": False,
+    }
+    assert json.loads(templates.relay_ports[0][1]) == {"port": "relay1", "state": 1}
+    assert json.loads(templates.button_status)["result"]["buttons"][1] == {
+        "button": 2, "state": "available",
+    }
+    assert json.loads(templates.system_info)["result"]["model"] == 'IP "Relay"'
+    assert json.loads(templates.relay_control(2, "off"))["result"] == {"relay": 2, "value": "off"}
+    assert json.loads(templates.button_trigger(1))["result"] == {"button": 1, "triggered": True}
+    assert json.loads(result_list(b"buttons", [])) == {"success": True, "result": {"buttons": []}}
+
+
+@pytest.mark.asyncio
+async def test_json_format_query_parameter(hass, client):
+    await hass.config_entries.async_add(make_entry())
+
+    resp = await digest_get(client, "/2n-relay/api/relay/ctrl?relay=1&value=on&format=json")
+    assert resp.status == 200
+    assert resp.content_type == "application/json"
+    assert await resp.json() == {"success": True, "result": {"relay": 1, "value": "on"}}
+
+    resp = await digest_get(client, "/2n-relay/api/relay/status?format=json")
+    assert await resp.json() == {
+        "success": True,
+        "result": {"relays": [{"relay": 1, "state": "on"}, {"relay": 2, "state": "off"}]},
+    }
+
+    resp = await digest_get(client, "/2n-relay/api/button/trigger?button=1&format=json")
+    assert (await resp.json())["result"] == {"button": 1, "triggered": True}
+
+    resp = await digest_get(client, "/2n-relay/api/relay/ctrl?relay=9&value=on&format=json")
+    assert resp.status == 400
+    assert await resp.json() == {
+        "success": False,
+        "error": {"code": 12, "param": "relay", "description": "invalid parameter value"},
+    }
+
+    # Text stays the default
+    resp = await digest_get(client, "/2n-relay/api/relay/status")
+    assert resp.content_type == "text/plain"
+    assert await resp.text() == "relay1=on\nrelay2=off"
+
+
+@pytest.mark.asyncio
+async def test_json_format_accept_header(hass, client):
+    await hass.config_entries.async_add(
+        make_entry(**{CONF_AUTH_MODE: AUTH_MODE_BOTH, CONF_BASIC_AUTH_TLS_ONLY: False})
+    )
+    headers = {**BASIC_AUTH, "Accept": "application/json"}
+
+    resp = await client.get("/2n-relay/api/system/info", headers=headers)
+    assert (await resp.json())["result"]["relays"] == 2
+
+    resp = await client.get("/2n-relay/api/button/status", headers=headers)
+    assert (await resp.json())["result"] == {"buttons": [{"button": 1, "state": "available"}]}
+
+    # The query parameter wins over the Accept header
+    resp = await client.get("/2n-relay/api/button/status?format=text", headers=headers)
+    assert await resp.text() == "button1=available"
+
+    # JSON must be preferred over text, not only accepted
+    for accept in ("application/json, */*", "text/plain, application/json;q=0.9"):
+        resp = await client.get(
+            "/2n-relay/api/button/status", headers={**BASIC_AUTH, "Accept": accept}
+        )
+        assert await resp.text() == "button1=available"
+    resp = await client.get(
+        "/2n-relay/api/button/status",
+        headers={**BASIC_AUTH, "Accept": "application/json, */*;q=0.8"},
+    )
+    assert resp.content_type == "application/json"
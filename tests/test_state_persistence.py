@@ -0,0 +1,129 @@
+"""Tests for relay state restoration and coalesced persistence."""
+from types import SimpleNamespace
+
+import pytest
+
+from custom_components.relay_emulator_2n.const import DOMAIN, STATE_SAVE_INTERVAL, STATE_STORE_KEY
+from custom_components.relay_emulator_2n.store import RelayStateStore
+from custom_components.relay_emulator_2n.switch import RelaySwitch
+
+
+class DummyHass:
+    """Dummy Home Assistant instance for testing."""
+
+    def __init__(self):
+        self.data = {}
+
+
+class DummyEntry:
+    """Dummy config entry for testing."""
+
+    def __init__(self, entry_id, data):
+        self.entry_id = entry_id
+        self.data = data
+
+
+def make_relay(hass, store, relay_num=1, last_state=None):
+    """Create a relay switch wired to the given store."""
+    entry = DummyEntry("entry_1", {"subpath": "2n-relay", "relay_count": 2})
+    hass.data.setdefault(DOMAIN, {}).setdefault(STATE_STORE_KEY, {})[entry.entry_id] = store
+    relay = RelaySwitch(hass, entry, relay_num)
+    relay.writes = 0
+
+    def write_state():
+        relay.writes += 1
+
+    async def get_last_state():
+        return last_state
+
+    relay.async_write_ha_state = write_state
+    relay.async_get_last_state = get_last_state
+    return relay
+
+
+@pytest.mark.asyncio
+async def test_store_coalesces_writes():
+    """Many toggles before a flush schedule exactly one delayed save."""
+    store = RelayStateStore(DummyHass(), "entry_1")
+
+    for _ in range(50):
+        store.async_set(1, True)
+        store.async_set(1, False)
+    store.async_set(2, True)
+
+    assert len(store._store.delayed_saves) == 1
+    data_func, delay = store._store.delayed_saves[0]
+    assert delay == STATE_SAVE_INTERVAL
+    assert data_func() == {"relays": {"1": False, "2": True}}
+
+    # After the write, the next change schedules a new save
+    store.async_set(1, True)
+    assert len(store._store.delayed_saves) == 2
+
+
+@pytest.mark.asyncio
+async def test_store_skips_unchanged_state():
+    """Writing the current state again does not schedule a save."""
+    store = RelayStateStore(DummyHass(), "entry_1")
+    store._store.data = {"relays": {"1": True}}
+    await store.async_load()
+
+    store.async_set(1, True)
+
+    assert store.get(1) is True
+    assert store.get(2) is None
+    assert store._store.delayed_saves == []
+
+
+@pytest.mark.asyncio
+async def test_store_flush_writes_pending_state():
+    """Flushing persists pending changes immediately."""
+    store = RelayStateStore(DummyHass(), "entry_1")
+    store.async_set(3, True)
+
+    await store.async_flush()
+
+    assert store._store.data == {"relays": {"3": True}}
+
+
+@pytest.mark.asyncio
+async def test_relay_restores_from_store():
+    """A relay comes back on after restart if it was on before."""
+    hass = DummyHass()
+    store = RelayStateStore(hass, "entry_1")
+    store._store.data = {"relays": {"1": True}}
+    await store.async_load()
+
+    relay = make_relay(hass, store, last_state=SimpleNamespace(state="off"))
+    await relay.async_added_to_hass()
+
+    assert relay._attr_is_on is True
+
+
+@pytest.mark.asyncio
+async def test_relay_falls_back_to_last_state():
+    """Without stored data the restore state cache is used."""
+    hass = DummyHass()
+    store = RelayStateStore(hass, "entry_1")
+
+    relay = make_relay(hass, store, relay_num=2, last_state=SimpleNamespace(state="on"))
+    await relay.async_added_to_hass()
+
+    assert relay._attr_is_on is True
+
+
+@pytest.mark.asyncio
+async def test_relay_toggle_is_persisted():
+    """Turning a relay on or off records the state in the store."""
+    hass = DummyHass()
+    store = RelayStateStore(hass, "entry_1")
+    relay = make_relay(hass, store)
+    await relay.async_added_to_hass()
+
+    await relay.async_turn_on()
+    assert store.get(1) is True
+    await relay.async_turn_off()
+    assert store.get(1) is False
+
+    assert relay.writes == 2
+    assert len(store._store.delayed_saves) == 1
@@ -0,0 +1,42 @@
+"""Tests for the subpath trie."""
+from custom_components.relay_emulator_2n.subpaths import SubpathTrie
+
+
+def test_conflict_detects_equal_and_nested_subpaths():
+    subpaths = SubpathTrie()
+    subpaths.add("door", "a")
+    subpaths.add("site/gate", "b")
+
+    assert subpaths.conflict("door") == "door"
+    assert subpaths.conflict("door/garage") == "door"
+    assert subpaths.conflict("site") == "site/gate"
+    # Prefixes are compared by segment, not by character
+    assert subpaths.conflict("doorbell") is None
+    assert subpaths.conflict("site/gatehouse") is None
+
+
+def test_longest_prefix_is_independent_of_insertion_order():
+    for order in (("door", "door/garage"), ("door/garage", "door")):
+        subpaths = SubpathTrie()
+        for subpath in order:
+            subpaths.add(subpath, subpath)
+
+        assert subpaths.longest_prefix("door/garage/api/relay/ctrl") == ("door/garage", "api/relay/ctrl")
+        assert subpaths.longest_prefix("door/api/relay/ctrl") == ("door", "api/relay/ctrl")
+        assert subpaths.longest_prefix("door/garage") == ("door/garage", "")
+        assert subpaths.longest_prefix("gate/api") == (None, "gate/api")
+
+
+def test_remove_prunes_nodes_and_checks_value():
+    subpaths = SubpathTrie()
+    subpaths.add("door", "old")
+    subpaths.add("door/garage", "garage")
+
+    assert not subpaths.remove("door", "new")
+    assert subpaths.remove("door", "old")
+    assert subpaths.get("door") is None
+    assert subpaths.get("door/garage") == "garage"
+
+    assert subpaths.remove("door/garage")
+    assert subpaths.root.children == {}
+    assert not subpaths.remove("door/garage")
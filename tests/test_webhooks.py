@@ -0,0 +1,190 @@
+"""Tests for the outbound webhooks of relay and button events."""
+import asyncio
+
+import pytest
+import pytest_asyncio
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
+
+from custom_components.relay_emulator_2n import webhooks as webhooks_module
+from custom_components.relay_emulator_2n.const import (
+    CONF_AUTH_MODE,
+    CONF_BASIC_AUTH_TLS_ONLY,
+    CONF_WEBHOOK_URLS,
+)
+from custom_components.relay_emulator_2n.diagnostics import async_get_config_entry_diagnostics
+from custom_components.relay_emulator_2n.webhooks import WebhookSender, redact_url
+from tests.ha_fake import BASIC_AUTH, make_entry
+
+
+class Receiver:
+    """Local HTTP server standing in for a webhook endpoint."""
+
+    def __init__(self) -> None:
+        self.batches: list[dict] = []
+        # Statuses answered before accepting batches with 200
+        self.statuses: list[int] = []
+        self.server = TestServer(web.Application())
+        self.server.app.router.add_post("/hook", self.handle)
+        self.received = asyncio.Event()
+
+    async def handle(self, request: web.Request) -> web.Response:
+        if self.statuses:
+            return web.Response(status=self.statuses.pop(0))
+        self.batches.append(await request.json())
+        self.received.set()
+        return web.Response(status=204)
+
+    @property
+    def url(self) -> str:
+        return str(self.server.make_url("/hook"))
+
+    @property
+    def events(self) -> list[tuple]:
+        return [
+            (event["event"], event["number"], event["state"])
+            for batch in self.batches
+            for event in batch["events"]
+        ]
+
+    async def wait(self, count: int) -> None:
+        while len(self.events) < count:
+            self.received.clear()
+            await asyncio.wait_for(self.received.wait(), 2)
+
+
+@pytest.fixture(autouse=True)
+def fast_delays(monkeypatch):
+    monkeypatch.setattr(webhooks_module, "WEBHOOK_BATCH_DELAY", 0.01)
+    monkeypatch.setattr(webhooks_module, "WEBHOOK_RETRY_DELAY", 0.01)
+
+
+@pytest_asyncio.fixture
+async def receiver():
+    receiver = Receiver()
+    await receiver.server.start_server()
+    yield receiver
+    await receiver.server.close()
+
+
+def make_webhook_entry(urls):
+    return make_entry(
+        "door",
+        **{CONF_AUTH_MODE: "basic", CONF_BASIC_AUTH_TLS_ONLY: False, CONF_WEBHOOK_URLS: urls},
+    )
+
+
+@pytest.mark.asyncio
+async def test_relay_and_button_events_are_posted_in_batches(hass, client, receiver):
+    entry = make_webhook_entry([receiver.url])
+    await hass.config_entries.async_add(entry)
+
+    for uri in (
+        "/door/api/relay/ctrl?relay=1&value=on",
+        "/door/api/relay/ctrl?relay=2&value=on",
+        "/door/api/button/trigger?button=1",
+    ):
+        response = await client.get(uri, headers=BASIC_AUTH)
+        assert response.status == 200
+    # Switched in Home Assistant instead of by a 2N device
+    await hass.services.async_call(
+        "switch", "turn_off", {"entity_id": hass.states.async_all()[0].entity_id}, blocking=True
+    )
+
+    await receiver.wait(4)
+    assert receiver.events == [
+        ("relay", 1, "on"),
+        ("relay", 2, "on"),
+        ("button", 1, "pressed"),
+        ("relay", 1, "off"),
+    ]
+    # Commands in quick succession share a request
+    assert len(receiver.batches) < 4
+    assert receiver.batches[0]["subpath"] == "door"
+    assert receiver.batches[0]["entry_id"] == entry.entry_id
+
+    diagnostics = await async_get_config_entry_diagnostics(hass, entry)
+    assert receiver.url not in str(diagnostics)
+    assert diagnostics["entry"]["options"][CONF_WEBHOOK_URLS] == "**REDACTED**"
+    assert diagnostics["webhooks"] == {
+        "enabled": True,
+        "urls": 1,
+        "queued": 0,
+        "sent": 4,
+        "rejected": 0,
+        "dropped": 0,
+    }
+    await hass.config_entries.async_unload(entry.entry_id)
+
+
+@pytest.mark.asyncio
+async def test_queued_events_are_sent_when_home_assistant_stops(
+    hass, client, receiver, monkeypatch
+):
+    monkeypatch.setattr(webhooks_module, "WEBHOOK_BATCH_DELAY", 60)
+    await hass.config_entries.async_add(make_webhook_entry([receiver.url]))
+
+    response = await client.get("/door/api/relay/ctrl?relay=1&value=on", headers=BASIC_AUTH)
+    assert response.status == 200
+    assert receiver.events == []
+
+    hass.bus.async_fire(EVENT_HOMEASSISTANT_STOP)
+    await receiver.wait(1)
+    assert receiver.events == [("relay", 1, "on")]
+
+
+def test_redact_url_keeps_scheme_and_host():
+    assert redact_url("https://user:pw@hooks.example.com/t/SECRET?key=1") == (
+        "https://hooks.example.com"
+    )
+    assert redact_url("http://10.0.0.2:8080/hook") == "http://10.0.0.2:8080"
+
+
+@pytest.mark.asyncio
+async def test_failed_batches_are_retried_in_order(hass, receiver):
+    sender = WebhookSender(hass, receiver.url, {"subpath": "door"})
+    receiver.statuses = [503, 429]
+    sender.send({"event": "relay", "number": 1, "state": "on"})
+    sender.send({"event": "relay", "number": 1, "state": "off"})
+
+    await receiver.wait(2)
+    assert receiver.events == [("relay", 1, "on"), ("relay", 1, "off")]
+    assert sender.sent == 2
+    assert sender.queued == 0
+
+
+@pytest.mark.asyncio
+async def test_rejected_batches_are_not_retried(hass, receiver, caplog):
+    url = receiver.url + "?token=SECRET"
+    sender = WebhookSender(hass, url, {"subpath": "door"})
+    receiver.statuses = [400]
+    sender.send({"event": "relay", "number": 1, "state": "on"})
+    await asyncio.sleep(0.1)
+    sender.send({"event": "relay", "number": 2, "state": "on"})
+
+    await receiver.wait(1)
+    assert receiver.events == [("relay", 2, "on")]
+    assert sender.rejected == 1
+    # The URL may carry a token and is not logged
+    assert "rejected 1 events" in caplog.text
+    assert "SECRET" not in caplog.text
+
+
+@pytest.mark.asyncio
+async def test_unreachable_url_keeps_the_newest_events(hass, receiver, monkeypatch):
+    monkeypatch.setattr(webhooks_module, "WEBHOOK_QUEUE_SIZE", 3)
+    url = receiver.url
+    await receiver.server.close()
+    sender = WebhookSender(hass, url, {"subpath": "door"})
+
+    for number in range(1, 6):
+        sender.send({"event": "relay", "number": number, "state": "on"})
+        await asyncio.sleep(0.02)
+
+    assert sender.queued == 3
+    assert sender.dropped == 2
+    assert [event["number"] for event in sender._queue] == [3, 4, 5]
+    await sender.async_stop()
+    assert sender.queued == 0
+    assert sender.dropped == 5